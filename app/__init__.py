@@ -1,14 +1,15 @@
-import logging
-
 from flask import Flask
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
 
+from app.replica import SesionRuteada
 from config import Config
 
 # --- Inicialización de Extensiones (Capas) ---
-db = SQLAlchemy()
+# La sesión manda las lecturas de algunas vistas a la réplica (ver app/replica.py)
+db = SQLAlchemy(session_options={"class_": SesionRuteada})
 login = LoginManager()
 login.login_view = "auth.login"  # Vista de login
 migrate = Migrate()
@@ -25,16 +26,26 @@ def create_app(config_class=Config):
 
     # 1. Cargar Configuración
     app.config.from_object(config_class)
+
+    # 2. Configurar Logging (cola + hilo de escritura, JSON; ver app/logs.py)
+    from app.logs import configurar_logging
+
+    configurar_logging(app)
+    # Sin la URI completa: lleva usuario y contraseña
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
     app.logger.info(
-        f"Conectando a la base de datos: {app.config['SQLALCHEMY_DATABASE_URI']}"
+        "Conectando a la base de datos",
+        extra={"motor": url.get_backend_name(), "base": url.database},
     )
 
-    # 2. Configurar Logging
-    logging.basicConfig(level=logging.DEBUG)
-
     # 3. Inicializar Extensiones (conectar capas a la app)
     #    ¡ESTE ES EL ORDEN CRÍTICO! db y login PRIMERO.
+    from app import metricas, replica
+
+    replica.configurar_bind(app)
     db.init_app(app)
+    replica.init_app(app, db)
+    metricas.init_app(app, db)
     login.init_app(app)
     migrate.init_app(app, db)  # Migrate DESPUÉS, ya que depende de db.
 
@@ -57,13 +68,27 @@ def create_app(config_class=Config):
     # --- Configurar el User Loader ---
     # Esto ahora funciona porque 'login' está inicializado
     # y los blueprints han importado 'app.models'.
-    from app.models import User
+    # El usuario se arma desde la foto guardada en la sesión (sin consultar la
+    # base en cada request); ver app/auth/principal.py
+    from app.auth.principal import cargar_principal
 
     @login.user_loader
     def load_user(user_id):
-        return db.session.get(User, int(user_id))
+        return cargar_principal(user_id)
 
     # ---------------------------------
 
+    # --- Perfilado a pedido (?perfilar=1 o header firmado; ver app/perfilador.py)
+    # y pico de memoria de los endpoints configurados (ver app/memoria.py)
+    from app import memoria, perfilador
+
+    perfilador.init_app(app)
+    memoria.init_app(app)
+
+    # --- Comandos de consola (flask saldos ...) ---
+    from app.cli import register_commands
+
+    register_commands(app)
+
     app.logger.info("Aplicación Lúdicus Park iniciada.")
     return app
@@ -1,18 +1,61 @@
 import json
+import logging
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from flask import flash, jsonify, redirect, url_for
+from flask import (
+    Response,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    request,
+    url_for,
+)
 from flask_login import current_user, login_required
 
 from app import db
 from app.api import bp
+from app.main.calendario import calendario_mes, invalidar_mes
+from app.main.catalogo import (
+    aplicar_catalogo,
+    etag_opciones,
+    listar_sedes,
+    obtener_sede,
+    opciones_reserva,
+)
+from app.main.disponibilidad import (
+    SlotOcupado,
+    buscar_ocupante,
+    clave_slot,
+    horarios_libres,
+    sincronizar_slot,
+)
 from app.main.forms import PaymentForm, ReservationForm
+from app.main.rollups import registrar_reserva
 from app.main.services import (
+    CAMPOS_API_ABONO_DEFECTO,
+    CAMPOS_API_RESERVA_DEFECTO,
+    allocate_reservation_code,
     create_payment,
     get_all_reservations,
+    get_deudores,
     get_next_reservation_code,
+    get_reservation_detail,
+    listar_abonos_api,
+    listar_reservas_api,
 )
-from app.models import Reservation, Sede
+from app.models import Reservation
+from app.replica import usar_replica
+
+logger = logging.getLogger(__name__)
+
+
+def _sede_del_formulario():
+    """Sede con la que se valida el formulario (la elegida, si es admin)."""
+    if current_user.is_admin:
+        return request.form.get("sede_seleccionada", current_user.sede_id, type=int)
+    return current_user.sede_id
 
 
 @bp.route("/reservas/nueva", methods=["POST"])
@@ -22,28 +65,44 @@ def nueva_reserva():
 
     # Lógica de sedes para Admin
     if current_user.is_admin:
-        form.sede_seleccionada.choices = [(s.id, s.nombre) for s in Sede.query.all()]
+        form.sede_seleccionada.choices = [(s.id, s.nombre) for s in listar_sedes()]
     else:
         form.sede_seleccionada.choices = []
+    aplicar_catalogo(form, _sede_del_formulario())
 
     if form.validate_on_submit():
         try:
             # 1. Determinar Sede
             if current_user.is_admin:
                 sede_id_final = form.sede_seleccionada.data
-                sede_obj = db.session.get(Sede, sede_id_final)
+                sede_obj = obtener_sede(sede_id_final)
                 if not sede_obj:
                     flash("Error: Sede seleccionada no válida.", "danger")
                     return redirect(url_for("main.reservas"))
+                sede_id_final = sede_obj.id
             else:
-                if not current_user.sede:
+                sede_obj = obtener_sede(current_user.sede_id)
+                if not sede_obj:
                     flash("Error: Tu usuario no tiene una sede asignada.", "danger")
                     return redirect(url_for("main.reservas"))
-                sede_obj = current_user.sede
                 sede_id_final = sede_obj.id
 
+            # Turno libre (se verifica antes de gastar un código de reserva)
+            ocupante = buscar_ocupante(
+                clave_slot(
+                    sede_id_final,
+                    form.fecha_celebracion.data,
+                    form.salon.data,
+                    form.horario.data,
+                    form.estado.data,
+                )
+            )
+            if ocupante:
+                flash(f"El horario elegido ya está reservado ({ocupante}).", "warning")
+                return redirect(url_for("main.reservas"))
+
             # 2. Generar Código
-            codigo_reserva_generado = get_next_reservation_code(
+            codigo_reserva_generado = allocate_reservation_code(
                 sede_id=sede_id_final, prefijo=sede_obj.prefijo
             )
 
@@ -51,13 +110,13 @@ def nueva_reserva():
             total_reserva = form.total.data or Decimal("0.0")
             total_final = total_reserva
 
-            # === 🔍 DEBUG: VERIFICAR DATOS ANTES DE GUARDAR ===
-            print("\n" + "=" * 30)
-            print("🔍 DEBUG: INTENTANDO GUARDAR RESERVA")
-            print(f"👉 DATA RECIBIDA EN FORM (Adicionales): '{form.adicionales.data}'")
-            print(f"👉 TIPO DE DATO: {type(form.adicionales.data)}")
-            print("=" * 30 + "\n")
-            # ==================================================
+            logger.debug(
+                "Guardando reserva",
+                extra={
+                    "codigo": codigo_reserva_generado,
+                    "adicionales": form.adicionales.data,
+                },
+            )
 
             # 4. Crear Objeto
             nueva_reserva = Reservation(
@@ -78,32 +137,35 @@ def nueva_reserva():
                 adultos=form.adultos.data,
                 estado=form.estado.data,
                 total=total_final,
+                total_abonado=Decimal("0.00"),
+                saldo=total_final,
                 # ASIGNACIÓN DE ADICIONALES
                 adicionales=form.adicionales.data,
                 accesorios=form.accesorios.data,
                 comentarios=form.comentarios.data,
             )
 
-            # === 🔍 DEBUG: VERIFICAR OBJETO ===
-            print(f"👉 DATA EN OBJETO SQLALCHEMY: '{nueva_reserva.adicionales}'")
-            # =================================
-
             db.session.add(nueva_reserva)
+            sincronizar_slot(nueva_reserva)
+            registrar_reserva(nueva_reserva)
+            invalidar_mes(nueva_reserva.sede_id, nueva_reserva.fecha_dia)
             db.session.commit()
 
             flash(f"Reserva {codigo_reserva_generado} creada exitosamente.", "success")
             return redirect(url_for("main.reservas"))
 
+        except SlotOcupado as e:
+            db.session.rollback()
+            flash(str(e), "warning")
         except Exception as e:
             db.session.rollback()
-            print(f"❌ ERROR EXCEPCIÓN AL GUARDAR: {e}")  # Debug de error
+            logger.exception("Error al crear la reserva")
             flash(f"Error al crear la reserva: {e}", "danger")
             return redirect(url_for("main.reservas"))
 
-    # Debug de validación fallida
-    print("\n❌ EL FORMULARIO NO ES VÁLIDO:")
+    if form.errors:
+        logger.info("Formulario de reserva inválido", extra={"errores": form.errors})
     for field, errors in form.errors.items():
-        print(f"   - Campo '{field}': {errors}")
         flash(
             f"Error en {getattr(form, field).label.text}: {', '.join(errors)}", "danger"
         )
@@ -116,7 +178,9 @@ def nueva_reserva():
 def nuevo_abono():
     form = PaymentForm()
     sede_filtro = current_user.sede_id if not current_user.is_admin else None
-    reservas_pendientes = get_all_reservations(estado="Reservado", sede_id=sede_filtro)
+    reservas_pendientes = get_all_reservations(
+        estado="Reservado", sede_id=sede_filtro, carga="list"
+    )
 
     form.reservation_id.choices = [
         (r.id, f"{r.codigo_reserva} - {r.nombre_padres}") for r in reservas_pendientes
@@ -140,53 +204,35 @@ def nuevo_abono():
     return redirect(url_for("main.abonos"))
 
 
-# --- MAPA DE OPCIONES ORIGINAL (Sin agregados no solicitados) ---
-OPCIONES_RESERVA = {
-    "minimos": {
-        "Exclusivo": {"ninos": 0, "adultos": 0},
-        "Salón 1": {"ninos": 17, "adultos": 17},
-        "Salón 2": {"ninos": 12, "adultos": 12},
-    },
-    "precios_paquete": {
-        "Exclusivo": 3200.00,
-        "Paquete LUDI": 39.90,
-        "Paquete JESSI": 49.90,
-        "Paquete LUDI SUPER ESTRELLA": 59.90,
-    },
-    "horarios": {
-        "Salón 1": [
-            {"id": "3:00 PM - 5:30 PM", "texto": "3:00 PM - 5:30 PM"},
-            {"id": "6:30 PM - 9:00 PM", "texto": "6:30 PM - 9:00 PM"},
-            {"id": "11:00 AM - 1:30 PM", "texto": "11:00 AM - 1:30 PM"},
-        ],
-        "Salón 2": [
-            {"id": "3:30 PM - 6:00 PM", "texto": "3:30 PM - 6:00 PM"},
-            {"id": "7:00 PM - 9:30 PM", "texto": "7:00 PM - 9:30 PM"},
-            {"id": "11:30 AM - 2:00 PM", "texto": "11:30 AM - 2:00 PM"},
-        ],
-    },
-    "paquetes": {
-        "Paquete LUDI": [
-            {"id": "Hot Dog", "texto": "Hot Dog"},
-            {"id": "Pan con Pollo", "texto": "Pan con Pollo"},
-        ],
-        "Paquete JESSI": [{"id": "Hot Dog", "texto": "Hot Dog"}],
-        "Paquete LUDI SUPER ESTRELLA": [{"id": "Chicharrón", "texto": "Chicharrón"}],
-        "Exclusivo": [],
-    },
-}
-
-
 @bp.route("/opciones-reserva")
 @login_required
+@usar_replica
 def get_opciones_reserva():
-    return jsonify(OPCIONES_RESERVA)
+    """
+    Catálogo de reservas de la sede. Con ?v=<versión actual> la URL es
+    inmutable y el navegador la guarda un año; sin ella, se revalida con el
+    ETag y normalmente se responde 304.
+    """
+    sede_id = current_user.sede_id
+    if current_user.is_admin:
+        sede_id = request.args.get("sede_id", sede_id, type=int)
+
+    version, _, cuerpo = opciones_reserva(sede_id)
+    respuesta = Response(cuerpo, mimetype="application/json")
+    respuesta.set_etag(etag_opciones(version, sede_id))
+    respuesta.cache_control.private = True
+    if request.args.get("v", type=int) == version:
+        respuesta.cache_control.max_age = 31536000
+        respuesta.cache_control.immutable = True
+    else:
+        respuesta.cache_control.no_cache = True
+    return respuesta.make_conditional(request)
 
 
 @bp.route("/proximo-codigo/<int:sede_id>")
 @login_required
 def proximo_codigo_sede(sede_id):
-    sede = db.session.get(Sede, sede_id)
+    sede = obtener_sede(sede_id)
     if not sede:
         return jsonify({"codigo": "Error"})
     codigo = get_next_reservation_code(sede.id, sede.prefijo)
@@ -195,58 +241,83 @@ def proximo_codigo_sede(sede_id):
 
 @bp.route("/reservas/<int:id>", methods=["GET"])
 @login_required
+@usar_replica
 def obtener_detalle_reserva(id):
-    reserva = db.session.get(Reservation, id)
+    """
+    Detalle de la reserva (modales de ver/editar) en una sola consulta. El
+    ETag cambia con la reserva o con sus abonos: si no cambió, 304 sin armar
+    el JSON.
+    """
+    reserva = get_reservation_detail(id)
     if not reserva:
         return jsonify({"error": "Reserva no encontrada"}), 404
 
-    lista_adicionales = []
-    if reserva.adicionales:
-        try:
-            lista_adicionales = json.loads(reserva.adicionales)
-        except json.JSONDecodeError:
-            lista_adicionales = []
-
-    fecha_fmt = (
-        reserva.fecha_celebracion.strftime("%d/%m/%Y")
-        if reserva.fecha_celebracion
-        else "-"
+    etag = "res-{}-{}-{}-{}-{}".format(
+        reserva.id,
+        reserva.updated_at.strftime("%Y%m%d%H%M%S%f") if reserva.updated_at else 0,
+        reserva.abonos,
+        reserva.ultimo_abono or 0,
+        (
+            reserva.abonos_actualizados.strftime("%Y%m%d%H%M%S%f")
+            if reserva.abonos_actualizados
+            else 0
+        ),
     )
+    if etag in request.if_none_match:
+        respuesta = Response(status=304)
+    else:
+        lista_adicionales = []
+        if reserva.adicionales:
+            try:
+                lista_adicionales = json.loads(reserva.adicionales)
+            except json.JSONDecodeError:
+                lista_adicionales = []
+
+        fecha_fmt = (
+            reserva.fecha_celebracion.strftime("%d/%m/%Y")
+            if reserva.fecha_celebracion
+            else "-"
+        )
 
-    # === CÁLCULO DE SALDOS ===
-    # Sumamos todos los pagos asociados a esta reserva
-    total_abonado = sum(p.monto for p in reserva.payments)
-    saldo_pendiente = reserva.total - total_abonado
-    # =========================
+        # === SALDOS (suma de los abonos, calculada en la consulta) ===
+        total_abonado = reserva.abonado
+        saldo_pendiente = (reserva.total or 0) - total_abonado
+        # =========================
+
+        respuesta = jsonify(
+            {
+                "codigo": reserva.codigo_reserva,
+                "estado": reserva.estado,
+                "nombre_padres": reserva.nombre_padres,
+                "dni": reserva.dni_padres or "-",
+                "telefono": reserva.telefono,
+                "correo": reserva.correo or "-",
+                "nombre_cumpleanero": reserva.nombre_cumpleanero or "-",
+                "fecha": fecha_fmt,
+                "created_at": reserva.created_at.strftime(
+                    "%d de %B de %Y"
+                ),  # Fecha de creación para el contrato
+                "horario": reserva.horario or "-",
+                "salon": reserva.salon or "-",
+                "modalidad": reserva.modalidad,
+                "paquete": reserva.paquete or "-",
+                "ninos": reserva.ninos,
+                "adultos": reserva.adultos,
+                "total": float(reserva.total),
+                # Nuevos campos calculados
+                "a_cuenta": float(total_abonado),
+                "saldo": float(saldo_pendiente),
+                "accesorios": reserva.accesorios or "Ninguno",
+                "comentarios": reserva.comentarios or "Ninguno",
+                "adicionales": lista_adicionales,
+            }
+        )
 
-    return jsonify(
-        {
-            "codigo": reserva.codigo_reserva,
-            "estado": reserva.estado,
-            "nombre_padres": reserva.nombre_padres,
-            "dni": reserva.dni_padres or "-",
-            "telefono": reserva.telefono,
-            "correo": reserva.correo or "-",
-            "nombre_cumpleanero": reserva.nombre_cumpleanero or "-",
-            "fecha": fecha_fmt,
-            "created_at": reserva.created_at.strftime(
-                "%d de %B de %Y"
-            ),  # Fecha de creación para el contrato
-            "horario": reserva.horario or "-",
-            "salon": reserva.salon or "-",
-            "modalidad": reserva.modalidad,
-            "paquete": reserva.paquete or "-",
-            "ninos": reserva.ninos,
-            "adultos": reserva.adultos,
-            "total": float(reserva.total),
-            # Nuevos campos calculados
-            "a_cuenta": float(total_abonado),
-            "saldo": float(saldo_pendiente),
-            "accesorios": reserva.accesorios or "Ninguno",
-            "comentarios": reserva.comentarios or "Ninguno",
-            "adicionales": lista_adicionales,
-        }
-    )
+    respuesta.set_etag(etag)
+    # El navegador la guarda, pero revalida cada vez (el modal debe verse al día)
+    respuesta.cache_control.private = True
+    respuesta.cache_control.no_cache = True
+    return respuesta
 
 
 @bp.route("/reservas/editar/<int:id>", methods=["POST"])
@@ -261,12 +332,31 @@ def editar_reserva(id):
 
     # Lógica de Sedes para validación (igual que en nueva)
     if current_user.is_admin:
-        form.sede_seleccionada.choices = [(s.id, s.nombre) for s in Sede.query.all()]
+        form.sede_seleccionada.choices = [(s.id, s.nombre) for s in listar_sedes()]
     else:
         form.sede_seleccionada.choices = []
+    aplicar_catalogo(form, reserva.sede_id, reserva)
 
     if form.validate_on_submit():
+        ocupante = buscar_ocupante(
+            clave_slot(
+                reserva.sede_id,
+                form.fecha_celebracion.data,
+                form.salon.data,
+                form.horario.data,
+                form.estado.data,
+            ),
+            excluir_id=reserva.id,
+        )
+        if ocupante:
+            flash(f"El horario elegido ya está reservado ({ocupante}).", "warning")
+            return redirect(url_for("main.reservas"))
+
         try:
+            # 0. Quitar el aporte anterior de la reserva en los resúmenes
+            registrar_reserva(reserva, -1)
+            invalidar_mes(reserva.sede_id, reserva.fecha_dia)
+
             # 1. Actualizar campos básicos
             reserva.nombre_padres = form.nombre_padres.data
             reserva.correo = form.correo.data
@@ -290,16 +380,25 @@ def editar_reserva(id):
 
             # El total ya viene calculado desde el JS en el campo readonly
             reserva.total = form.total.data or Decimal("0.0")
+            reserva.recalcular_saldo()
 
             # JSON de adicionales actualizado
             reserva.adicionales = form.adicionales.data
 
+            # 4. Mover el turno ocupado y sumar el aporte actualizado
+            sincronizar_slot(reserva)
+            registrar_reserva(reserva)
+            invalidar_mes(reserva.sede_id, reserva.fecha_dia)
+
             db.session.commit()
             flash(
                 f"Reserva {reserva.codigo_reserva} actualizada correctamente.",
                 "success",
             )
 
+        except SlotOcupado as e:
+            db.session.rollback()
+            flash(str(e), "warning")
         except Exception as e:
             db.session.rollback()
             flash(f"Error al actualizar: {e}", "danger")
@@ -312,3 +411,190 @@ def editar_reserva(id):
             )
 
     return redirect(url_for("main.reservas"))
+
+
+@bp.route("/deudores", methods=["GET"])
+@login_required
+@usar_replica
+def listar_deudores():
+    """Reservas con saldo pendiente (paginadas con ?cursor=)."""
+    if current_user.is_admin:
+        sede_id = request.args.get("sede_id", type=int)
+    else:
+        sede_id = current_user.sede_id
+        if not sede_id:
+            return jsonify({"error": "Usuario sin sede asignada"}), 403
+
+    limite = min(max(request.args.get("limite", 50, type=int), 1), 200)
+    pagina = get_deudores(
+        sede_id=sede_id,
+        orden=request.args.get("orden", "fecha"),
+        limite=limite,
+        cursor=request.args.get("cursor"),
+    )
+
+    return jsonify(
+        {
+            "deudores": [
+                {
+                    "id": d["id"],
+                    "codigo": d["codigo"],
+                    "cliente": d["cliente"],
+                    "fecha": d["fecha"].strftime("%Y-%m-%d"),
+                    "deuda": float(d["deuda"]),
+                }
+                for d in pagina.items
+            ],
+            "siguiente": pagina.next_cursor,
+        }
+    )
+
+
+def _listado(listar, campos_defecto):
+    """
+    Página JSON de un listado con ?fields=, ?sede_id= (solo admin; sin él,
+    todas las sedes), ?desde=/?hasta= (YYYY-MM-DD), ?estado=, ?limite= y
+    ?cursor= (el "siguiente" de la página anterior). Con ?contar=1 incluye el
+    total de filas.
+    """
+    if current_user.is_admin:
+        sede_id = request.args.get("sede_id", type=int)
+    else:
+        sede_id = current_user.sede_id
+        if not sede_id:
+            return jsonify({"error": "Usuario sin sede asignada"}), 403
+
+    campos = request.args.get("fields")
+    campos = [c.strip() for c in campos.split(",") if c.strip()] if campos else None
+
+    fechas = {}
+    try:
+        for nombre in ("desde", "hasta"):
+            texto = request.args.get(nombre)
+            fechas[nombre] = (
+                datetime.strptime(texto, "%Y-%m-%d").date() if texto else None
+            )
+    except ValueError:
+        return jsonify({"error": "Formato de fecha inválido. Usar YYYY-MM-DD."}), 400
+
+    config = current_app.config
+    limite = request.args.get("limite", config["PAGE_SIZE"], type=int)
+    try:
+        pagina = listar(
+            campos=campos or campos_defecto,
+            sede_id=sede_id,
+            desde=fechas["desde"],
+            hasta=fechas["hasta"],
+            estado=request.args.get("estado") or None,
+            limite=min(max(limite, 1), config["PAGE_SIZE_MAX"]),
+            cursor=request.args.get("cursor"),
+            contar=request.args.get("contar") == "1",
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cuerpo = {"items": pagina.items, "siguiente": pagina.next_cursor}
+    if pagina.total is not None:
+        cuerpo["total"] = pagina.total
+    # Los valores ya vienen convertidos (Decimal -> float, fechas -> ISO)
+    return Response(
+        json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":")),
+        mimetype="application/json",
+    )
+
+
+@bp.route("/reservas", methods=["GET"])
+@login_required
+@usar_replica
+def listar_reservas():
+    """Reservas paginadas, con solo los campos pedidos (ver _listado)."""
+    return _listado(listar_reservas_api, CAMPOS_API_RESERVA_DEFECTO)
+
+
+@bp.route("/abonos", methods=["GET"])
+@login_required
+@usar_replica
+def listar_abonos():
+    """Abonos paginados; ?estado= filtra por el estado de la reserva."""
+    return _listado(listar_abonos_api, CAMPOS_API_ABONO_DEFECTO)
+
+
+def _sede_consultada():
+    """Sede del usuario o, si es admin, la indicada con ?sede_id=."""
+    if current_user.is_admin:
+        return request.args.get("sede_id", current_user.sede_id, type=int)
+    return current_user.sede_id
+
+
+# Máximo de días por consulta de disponibilidad
+DISPONIBILIDAD_MAX_DIAS = 62
+
+
+@bp.route("/disponibilidad", methods=["GET"])
+@login_required
+@usar_replica
+def disponibilidad():
+    """
+    Horarios libres por día y salón entre ?desde= y ?hasta= (YYYY-MM-DD).
+    Por defecto, los próximos 14 días.
+    """
+    sede_id = _sede_consultada()
+    if not sede_id:
+        return jsonify({"error": "Debe indicar una sede (sede_id)"}), 400
+
+    try:
+        desde = datetime.strptime(
+            request.args.get("desde") or date.today().isoformat(), "%Y-%m-%d"
+        ).date()
+        hasta = request.args.get("hasta")
+        hasta = (
+            datetime.strptime(hasta, "%Y-%m-%d").date()
+            if hasta
+            else desde + timedelta(days=13)
+        )
+    except ValueError:
+        return jsonify({"error": "Formato de fecha inválido. Usar YYYY-MM-DD."}), 400
+
+    if hasta < desde or (hasta - desde).days >= DISPONIBILIDAD_MAX_DIAS:
+        return (
+            jsonify(
+                {"error": f"El rango debe ser de 1 a {DISPONIBILIDAD_MAX_DIAS} días."}
+            ),
+            400,
+        )
+
+    return jsonify(
+        {
+            "sede_id": sede_id,
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "dias": horarios_libres(sede_id, desde, hasta),
+        }
+    )
+
+
+@bp.route("/calendario", methods=["GET"])
+@login_required
+@usar_replica
+def calendario():
+    """
+    Reservas del mes ?mes=YYYY-MM (por defecto, el actual) agrupadas por día,
+    salón y horario. Se revalida con el ETag: si el mes no cambió, 304.
+    """
+    sede_id = _sede_consultada()
+    if not sede_id:
+        return jsonify({"error": "Debe indicar una sede (sede_id)"}), 400
+
+    try:
+        mes = datetime.strptime(
+            request.args.get("mes") or date.today().strftime("%Y-%m"), "%Y-%m"
+        )
+    except ValueError:
+        return jsonify({"error": "Formato de mes inválido. Usar YYYY-MM."}), 400
+
+    version, cuerpo = calendario_mes(sede_id, mes.year, mes.month)
+    respuesta = Response(cuerpo, mimetype="application/json")
+    respuesta.set_etag(f"cal-{sede_id}-{mes:%Y-%m}-{version}")
+    respuesta.cache_control.private = True
+    respuesta.cache_control.no_cache = True
+    return respuesta.make_conditional(request)
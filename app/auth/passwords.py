@@ -0,0 +1,88 @@
+"""
+Política de hash de contraseñas.
+
+- PASSWORD_HASH_METHOD define el algoritmo y su costo (formato de werkzeug,
+  ej: "scrypt:32768:8:1" o "pbkdf2:sha256:600000"). Al iniciar sesión, si el
+  hash guardado usa otros parámetros se vuelve a generar con los actuales
+  (la contraseña en texto plano solo está disponible en ese momento).
+- Con PASSWORD_VERIFY_WORKERS > 0 la verificación corre en un pool de hilos
+  de ese tamaño: scrypt y pbkdf2 liberan el GIL, así que una ráfaga de logins
+  ocupa como mucho esa cantidad de núcleos y el resto de requests del worker
+  sigue atendiéndose. Si la verificación no termina en
+  PASSWORD_VERIFY_TIMEOUT segundos se lanza VerificacionOcupada.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from flask import current_app
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+_pool = None
+_pool_tamano = 0
+_pool_lock = threading.Lock()
+
+
+class VerificacionOcupada(Exception):
+    """El pool de verificación está saturado; el login debe reintentarse."""
+
+
+def metodo_canonico(metodo):
+    """Método con sus parámetros explícitos ("scrypt" -> "scrypt:32768:8:1")."""
+    nombre, *args = metodo.split(":")
+    if nombre == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if nombre == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iteraciones = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iteraciones}"
+    return metodo
+
+
+def hashear(password):
+    return generate_password_hash(
+        password,
+        method=current_app.config["PASSWORD_HASH_METHOD"],
+        salt_length=current_app.config["PASSWORD_SALT_LENGTH"],
+    )
+
+
+def necesita_rehash(password_hash):
+    """True si el hash se generó con un método o costo distinto al configurado."""
+    actual = password_hash.split("$", 1)[0]
+    return metodo_canonico(actual) != metodo_canonico(
+        current_app.config["PASSWORD_HASH_METHOD"]
+    )
+
+
+def _obtener_pool(tamano):
+    global _pool, _pool_tamano
+    with _pool_lock:
+        # Se crea en el primer uso (después del fork de gunicorn)
+        if _pool is None or _pool_tamano != tamano:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(
+                max_workers=tamano, thread_name_prefix="verificar-password"
+            )
+            _pool_tamano = tamano
+        return _pool
+
+
+def verificar(password_hash, password):
+    """check_password_hash, en el pool si PASSWORD_VERIFY_WORKERS > 0."""
+    tamano = current_app.config["PASSWORD_VERIFY_WORKERS"]
+    if not tamano:
+        return check_password_hash(password_hash, password)
+
+    futuro = _obtener_pool(tamano).submit(check_password_hash, password_hash, password)
+    try:
+        return futuro.result(timeout=current_app.config["PASSWORD_VERIFY_TIMEOUT"])
+    except FuturesTimeoutError:
+        futuro.cancel()
+        raise VerificacionOcupada() from None
@@ -0,0 +1,138 @@
+"""
+Usuario de la sesión (current_user) sin consultar la base en cada request.
+
+Al iniciar sesión se guarda en la sesión de Flask (cookie firmada con
+SECRET_KEY) una foto compacta del usuario: id, username, is_admin,
+is_active, auth_version y su sede. En cada request el user_loader arma el
+Principal desde esa foto y solo la valida contra:
+
+- el mapa {user_id: auth_version}, cacheado como catálogo "usuarios" (ver
+  app/main/cache.py); editar_usuario/eliminar_usuario incrementan la
+  auth_version del usuario e invalidan el catálogo;
+- el catálogo de sedes, por si la sede cambió de nombre o prefijo.
+
+Si la versión no coincide (usuario editado o eliminado) se vuelve a leer el
+usuario de la base y se reescribe la foto. En el caso normal un request
+autenticado no hace ninguna consulta de user ni de sede.
+"""
+
+from types import MappingProxyType
+
+from flask import session
+from flask_login import UserMixin
+
+from app import db
+from app.main.cache import CacheCatalogo
+from app.main.catalogo import SedeInfo, obtener_sede
+from app.models import User
+
+CLAVE_SESION = "_principal"
+
+
+class Principal(UserMixin):
+    """Lo que las rutas y plantillas usan de current_user, sin objetos del ORM."""
+
+    def __init__(
+        self, id, username, is_admin, activo, auth_version, sede_id, prefijo, nombre
+    ):
+        self.id = id
+        self.username = username
+        self.is_admin = is_admin
+        self._activo = activo
+        self.auth_version = auth_version
+        self.sede_id = sede_id
+        self.sede = SedeInfo(sede_id, nombre, prefijo) if sede_id else None
+
+    @property
+    def is_active(self):
+        return self._activo
+
+    @classmethod
+    def desde_usuario(cls, user):
+        # La sede sale del catálogo en memoria; si todavía no la tiene (recién
+        # creada en otro worker), de la base.
+        sede = obtener_sede(user.sede_id) or user.sede
+        return cls(
+            user.id,
+            user.username,
+            bool(user.is_admin),
+            user.is_active is not False,
+            user.auth_version,
+            user.sede_id,
+            sede.prefijo if sede else None,
+            sede.nombre if sede else None,
+        )
+
+    def foto(self):
+        """Lista serializable (JSON) que se guarda en la sesión."""
+        sede = self.sede or SedeInfo(None, None, None)
+        return [
+            self.id,
+            self.username,
+            self.is_admin,
+            self._activo,
+            self.auth_version,
+            self.sede_id,
+            sede.prefijo,
+            sede.nombre,
+        ]
+
+    def __repr__(self):
+        return f"<Principal {self.username}>"
+
+
+# --- Versiones de Usuarios ---
+
+
+def _cargar_versiones():
+    filas = db.session.execute(db.select(User.id, User.auth_version))
+    return MappingProxyType({user_id: version for user_id, version in filas})
+
+
+_versiones = CacheCatalogo("usuarios", _cargar_versiones)
+
+
+def invalidar_usuario(user):
+    """
+    Marca como vencidas las sesiones del usuario (llamar antes del commit de
+    una edición o eliminación).
+    """
+    user.auth_version = (user.auth_version or 0) + 1
+    _versiones.invalidar()
+
+
+# --- Carga y Guardado en la Sesión ---
+
+
+def guardar_principal(user):
+    """Guarda la foto del usuario en la sesión al iniciar sesión."""
+    principal = Principal.desde_usuario(user)
+    session[CLAVE_SESION] = principal.foto()
+    return principal
+
+
+def olvidar_principal():
+    session.pop(CLAVE_SESION, None)
+
+
+def cargar_principal(user_id):
+    """user_loader: Principal desde la sesión, validado contra las versiones."""
+    user_id = int(user_id)
+    foto = session.get(CLAVE_SESION)
+
+    if foto and foto[0] == user_id:
+        principal = Principal(*foto)
+        if _versiones.obtener().get(user_id) == principal.auth_version:
+            sede = obtener_sede(principal.sede_id)
+            if sede is not None and sede != principal.sede:
+                principal.sede = sede
+                session[CLAVE_SESION] = principal.foto()
+            return principal if principal.is_active else None
+        # Versión distinta o mapa desactualizado: se revisa en la base
+        _versiones.descartar()
+
+    user = db.session.get(User, user_id)
+    if user is None or user.is_active is False:
+        olvidar_principal()
+        return None
+    return guardar_principal(user)
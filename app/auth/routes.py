@@ -3,8 +3,11 @@ from urllib.parse import urlsplit
 from flask import flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_user, logout_user
 
+from app import db
 from app.auth import bp
 from app.auth.forms import LoginForm
+from app.auth.passwords import VerificacionOcupada, necesita_rehash
+from app.auth.principal import guardar_principal, olvidar_principal
 from app.models import User
 
 
@@ -17,15 +20,25 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
 
-        if (
-            user is None
-            or not user.check_password(form.password.data)
-            or not user.is_active
-        ):
+        try:
+            password_ok = user is not None and user.check_password(form.password.data)
+        except VerificacionOcupada:
+            flash(
+                "El servidor está ocupado. Intenta de nuevo en unos segundos.",
+                "warning",
+            )
+            return redirect(url_for("auth.login"))
+
+        if not password_ok or not user.is_active:
             flash("Usuario o contraseña incorrectos.", "danger")
             return redirect(url_for("auth.login"))
 
-        login_user(user, remember=form.remember_me.data)
+        # Migrar el hash a la política actual (costo o algoritmo cambiados)
+        if necesita_rehash(user.password_hash):
+            user.set_password(form.password.data)
+            db.session.commit()
+
+        login_user(guardar_principal(user), remember=form.remember_me.data)
 
         next_page = request.args.get("next")
         if not next_page or urlsplit(next_page).netloc != "":
@@ -39,5 +52,6 @@ def login():
 @bp.route("/logout")
 def logout():
     logout_user()
+    olvidar_principal()
     flash("Has cerrado sesión.", "info")
     return redirect(url_for("auth.login"))
@@ -0,0 +1,386 @@
+"""
+Comandos de consola (flask <comando>) para mantenimiento de datos.
+"""
+
+import os
+import time
+from datetime import date
+
+import click
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import event
+
+from app import db
+from app.models import Payment, Reservation, ResumenVentasDiario, Sede
+
+saldos_cli = AppGroup("saldos", help="Mantenimiento de total_abonado / saldo.")
+
+# Diferencia máxima aceptada (SQLite suma en coma flotante: 558.5999999999999)
+TOLERANCIA_SALDO = 0.005
+
+
+def _suma_abonos():
+    """Subconsulta correlacionada: total abonado de cada reserva según Payment."""
+    return (
+        db.select(db.func.coalesce(db.func.sum(Payment.monto), 0))
+        .where(Payment.reservation_id == Reservation.id)
+        .scalar_subquery()
+    )
+
+
+@saldos_cli.command("backfill")
+def saldos_backfill():
+    """Recalcula total_abonado y saldo de todas las reservas desde Payment."""
+    suma = _suma_abonos()
+    resultado = db.session.execute(
+        db.update(Reservation).values(
+            total_abonado=suma,
+            saldo=db.func.coalesce(Reservation.total, 0) - suma,
+        )
+    )
+    db.session.commit()
+    click.echo(f"Saldos recalculados en {resultado.rowcount} reservas.")
+
+
+@saldos_cli.command("verificar")
+@click.option("--mostrar", default=20, help="Cantidad de diferencias a listar.")
+def saldos_verificar(mostrar):
+    """Compara los saldos guardados con la suma real de abonos."""
+    suma = _suma_abonos().label("suma_real")
+    query = db.select(
+        Reservation.codigo_reserva,
+        Reservation.total,
+        Reservation.total_abonado,
+        Reservation.saldo,
+        suma,
+    ).where(
+        db.or_(
+            db.func.abs(Reservation.total_abonado - suma) > TOLERANCIA_SALDO,
+            db.func.abs(
+                Reservation.saldo - (db.func.coalesce(Reservation.total, 0) - suma)
+            )
+            > TOLERANCIA_SALDO,
+        )
+    )
+
+    diferencias = db.session.execute(query).all()
+    if not diferencias:
+        click.echo("OK: todos los saldos coinciden con los abonos.")
+        return
+
+    click.echo(f"{len(diferencias)} reservas con saldo desactualizado:")
+    for codigo, total, abonado, saldo, real in diferencias[:mostrar]:
+        click.echo(
+            f"  {codigo}: total={total} abonado={abonado} saldo={saldo} "
+            f"(abonado real={real})"
+        )
+    click.echo("Ejecuta 'flask saldos backfill' para corregirlos.")
+    raise SystemExit(1)
+
+
+# --- Verificación de Índices (EXPLAIN) ---
+
+indices_cli = AppGroup("indices", help="Verificación de índices de las consultas.")
+
+
+def _consultas_de_servicio(sede_id):
+    """(nombre, función) de las consultas de lectura de la capa de servicios."""
+    from app.main import services
+
+    hoy = date.today()
+    desde, hasta = hoy.replace(month=1, day=1), hoy.replace(month=12, day=31)
+
+    def primer_bloque(generador):
+        next(generador, None)
+
+    return [
+        (
+            "get_all_reservations (pendientes)",
+            lambda: services.get_all_reservations(estado="Reservado", sede_id=sede_id),
+        ),
+        (
+            "paginate_reservations_by_date_range",
+            lambda: services.paginate_reservations_by_date_range(
+                desde, hasta, sede_id=sede_id
+            ),
+        ),
+        (
+            "paginate_payments_by_date_range",
+            lambda: services.paginate_payments_by_date_range(
+                desde, hasta, sede_id=sede_id
+            ),
+        ),
+        ("get_deudores (fecha)", lambda: services.get_deudores(sede_id=sede_id)),
+        (
+            "get_deudores (deuda)",
+            lambda: services.get_deudores(sede_id=sede_id, orden="deuda"),
+        ),
+        (
+            "get_next_reservation_code",
+            lambda: services.get_next_reservation_code(sede_id, "XX"),
+        ),
+        (
+            "iter_reservations_export",
+            lambda: primer_bloque(
+                services.iter_reservations_export(desde, hasta, sede_id)
+            ),
+        ),
+        (
+            "iter_payments_export",
+            lambda: primer_bloque(services.iter_payments_export(desde, hasta, sede_id)),
+        ),
+    ]
+
+
+def _planes_sin_indice(conn, sentencia, parametros):
+    """Ejecuta EXPLAIN y devuelve las tablas que se recorren completas."""
+    if conn.dialect.name == "sqlite":
+        filas = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sentencia, parametros)
+        return [
+            f.detail
+            for f in filas
+            if f.detail.startswith("SCAN") and "INDEX" not in f.detail
+        ]
+
+    filas = conn.exec_driver_sql("EXPLAIN " + sentencia, parametros).mappings()
+    return [
+        f"SCAN {f['table']}" for f in filas if f["type"] == "ALL" and f["key"] is None
+    ]
+
+
+@indices_cli.command("verificar")
+@click.option("--sede", "sede_id", type=int, help="Sede a usar en los filtros.")
+def indices_verificar(sede_id):
+    """Corre EXPLAIN sobre cada consulta de los servicios y reporta las que no usan índice."""
+    if sede_id is None:
+        sede_id = db.session.scalar(db.select(db.func.min(Sede.id))) or 1
+
+    capturadas = []
+
+    def capturar(conn, cursor, sentencia, parametros, context, executemany):
+        if sentencia.lstrip().upper().startswith("SELECT"):
+            capturadas.append((sentencia, parametros))
+
+    fallos = 0
+    event.listen(db.engine, "before_cursor_execute", capturar)
+    try:
+        for nombre, consulta in _consultas_de_servicio(sede_id):
+            capturadas.clear()
+            consulta()
+            db.session.rollback()
+
+            with db.engine.connect() as conn:
+                problemas = []
+                for sentencia, parametros in capturadas:
+                    problemas.extend(_planes_sin_indice(conn, sentencia, parametros))
+
+            if problemas:
+                fallos += 1
+                click.echo(f"[SIN ÍNDICE] {nombre}: {'; '.join(problemas)}")
+            else:
+                click.echo(f"[OK] {nombre} ({len(capturadas)} consulta(s))")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capturar)
+
+    if fallos:
+        click.echo(
+            f"{fallos} consulta(s) sin índice. Con tablas casi vacías el motor puede "
+            "preferir un recorrido completo: verificar con datos representativos."
+        )
+        raise SystemExit(1)
+
+
+# --- Resúmenes Diarios ---
+
+resumenes_cli = AppGroup("resumenes", help="Resúmenes diarios de los reportes.")
+
+
+@resumenes_cli.command("reconstruir")
+def resumenes_reconstruir():
+    """Recalcula los resúmenes de ventas y cobros desde reservas y abonos."""
+    from app.main.rollups import reconstruir_resumenes
+
+    reconstruir_resumenes()
+    dias = db.session.scalar(
+        db.select(db.func.count(db.distinct(ResumenVentasDiario.dia)))
+    )
+    click.echo(f"Resúmenes reconstruidos ({dias} días con ventas).")
+
+
+# --- Ocupación de Horarios ---
+
+slots_cli = AppGroup("slots", help="Ocupación de horarios (reserva_slot).")
+
+
+@slots_cli.command("reconstruir")
+def slots_reconstruir():
+    """Recalcula los turnos ocupados y lista las reservas que chocan."""
+    from app.main.disponibilidad import reconstruir_slots
+
+    conflictos = reconstruir_slots()
+    if not conflictos:
+        click.echo("OK: turnos reconstruidos, sin reservas en conflicto.")
+        return
+
+    click.echo(f"{len(conflictos)} reservas comparten turno con otra:")
+    for codigo, ocupante in conflictos:
+        click.echo(f"  {codigo} choca con {ocupante}")
+    raise SystemExit(1)
+
+
+# --- Perfilado de Requests ---
+
+perfil_cli = AppGroup("perfil", help="Perfilado de requests puntuales.")
+
+
+@perfil_cli.command("firmar")
+def perfil_firmar():
+    """Genera el valor del header X-Perfilar (ver app/perfilador.py)."""
+    from flask import current_app
+
+    from app.perfilador import HEADER, firmador
+
+    token = firmador(current_app).sign("perfilar").decode()
+    vigencia = current_app.config["PROFILER_TOKEN_MAX_AGE"]
+    click.echo(f"{HEADER}: {token}")
+    click.echo(f"Válido por {vigencia:.0f} segundos.")
+
+
+# --- Importación desde Wix ---
+
+
+@click.command("import-wix")
+@click.option(
+    "--reservas",
+    "ruta_reservas",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Exportación de reservas (ReservasBD.csv).",
+)
+@click.option(
+    "--abonos",
+    "ruta_abonos",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Exportación de abonos (AbonosBD.csv).",
+)
+@click.option(
+    "--checkpoint",
+    default="import-wix.checkpoint.json",
+    show_default=True,
+    help="Archivo donde se guarda el avance para continuar si se interrumpe.",
+)
+@click.option("--reiniciar", is_flag=True, help="Ignorar el checkpoint existente.")
+@click.option("--lote", default=1000, show_default=True, help="Filas por INSERT.")
+@click.option(
+    "--commit-cada", default=10000, show_default=True, help="Filas por commit."
+)
+@click.option("--delimitador", default=",", show_default=True)
+@click.option(
+    "--sede",
+    "sede_por_defecto",
+    help="Prefijo de sede para códigos cuyo prefijo no corresponde a ninguna.",
+)
+@with_appcontext
+def import_wix(
+    ruta_reservas,
+    ruta_abonos,
+    checkpoint,
+    reiniciar,
+    lote,
+    commit_cada,
+    delimitador,
+    sede_por_defecto,
+):
+    """Importa ReservasBD.csv y AbonosBD.csv exportados de Wix."""
+    from app.main.disponibilidad import reconstruir_slots
+    from app.main.importacion_wix import ErrorImportacion, ImportadorWix
+    from app.main.rollups import reconstruir_resumenes
+
+    if not ruta_reservas and not ruta_abonos:
+        raise click.UsageError("Indique --reservas y/o --abonos.")
+    if reiniciar and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    importador = ImportadorWix(
+        checkpoint=checkpoint,
+        lote=lote,
+        commit_cada=commit_cada,
+        delimitador=delimitador,
+        sede_por_defecto=sede_por_defecto and sede_por_defecto.upper(),
+        informar=click.echo,
+    )
+    inicio = time.perf_counter()
+    try:
+        if ruta_reservas:
+            cantidad = importador.importar_reservas(ruta_reservas)
+            click.echo(f"Reservas insertadas: {cantidad}")
+            importador.ajustar_secuencias()
+        if ruta_abonos:
+            cantidad = importador.importar_abonos(ruta_abonos)
+            click.echo(f"Abonos insertados: {cantidad}")
+    except ErrorImportacion as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+
+    click.echo("Reconstruyendo resúmenes diarios y ocupación de horarios...")
+    reconstruir_resumenes()
+    conflictos = reconstruir_slots()
+    meses = importador.invalidar_calendarios()
+    click.echo(
+        f"Listo en {time.perf_counter() - inicio:.1f} s "
+        f"({meses} meses de calendario actualizados)."
+    )
+
+    if conflictos:
+        click.echo(
+            f"{len(conflictos)} reservas comparten turno con otra "
+            "(ver 'flask slots reconstruir')."
+        )
+    if importador.rechazadas:
+        click.echo(f"{len(importador.rechazadas)} filas rechazadas:")
+        for archivo, numero, motivo in importador.rechazadas[:20]:
+            click.echo(f"  {archivo} fila {numero}: {motivo}")
+        raise SystemExit(1)
+
+
+# --- Datos Sintéticos ---
+
+
+@click.command("seed-synthetic")
+@click.option("--sedes", default=3, show_default=True, help="Sedes nuevas a crear.")
+@click.option("--usuarios", default=10, show_default=True)
+@click.option("--reservas", default=10000, show_default=True)
+@click.option(
+    "--anios", default=2, show_default=True, help="Años de historia hacia atrás."
+)
+@click.option("--semilla", default=42, show_default=True)
+@click.option("--lote", default=5000, show_default=True, help="Filas por INSERT.")
+@with_appcontext
+def seed_synthetic(sedes, usuarios, reservas, anios, semilla, lote):
+    """Crea sedes, usuarios, reservas y abonos sintéticos (pruebas de carga)."""
+    from app.main.datos_sinteticos import PASSWORD_SINTETICO, generar
+
+    resumen = generar(
+        sedes=sedes,
+        usuarios=usuarios,
+        reservas=reservas,
+        anios=anios,
+        semilla=semilla,
+        lote=lote,
+        informar=click.echo,
+    )
+    click.echo(
+        f"Listo en {resumen['segundos']} s: {resumen['sedes']} sedes, "
+        f"{resumen['usuarios']} usuarios, {resumen['reservas']} reservas y "
+        f"{resumen['abonos']} abonos. Contraseña de los usuarios: "
+        f"{PASSWORD_SINTETICO}"
+    )
+
+
+def register_commands(app):
+    app.cli.add_command(saldos_cli)
+    app.cli.add_command(indices_cli)
+    app.cli.add_command(resumenes_cli)
+    app.cli.add_command(slots_cli)
+    app.cli.add_command(perfil_cli)
+    app.cli.add_command(import_wix)
+    app.cli.add_command(seed_synthetic)
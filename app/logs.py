@@ -0,0 +1,154 @@
+"""
+Logging de la aplicación.
+
+- Los requests solo encolan el registro (QueueHandler); un hilo aparte
+  (QueueListener) lo formatea y lo escribe en stderr, así la E/S no ocurre en
+  el hilo del request. Si la cola se llena, los registros se descartan (y se
+  cuentan) en lugar de bloquear.
+- Formato JSON, una línea por registro, con los campos pasados en `extra=`
+  (LOG_FORMAT="texto" para una salida legible en desarrollo).
+- Nivel general LOG_LEVEL y niveles por módulo con LOG_LEVELS, ej:
+  "app.api=DEBUG,sqlalchemy.engine=WARNING".
+- Los registros DEBUG se muestrean: pasa solo una fracción
+  LOG_DEBUG_SAMPLE_RATE (1 = todos). Un registro puede indicar su propia
+  fracción con extra={"muestra": 0.1}.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask.logging import default_handler
+
+# Atributos propios de LogRecord (el resto viene de `extra=`)
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "muestra"}
+
+_listener = None
+_handler = None
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, msg, campos extra y exc."""
+
+    def format(self, record):
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_text:
+            datos["exc"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FormatoTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        texto = super().format(record)
+        extra = {k: v for k, v in vars(record).items() if k not in _ATRIBUTOS_RECORD}
+        return f"{texto} {extra}" if extra else texto
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar una fracción de los DEBUG (o la indicada en extra["muestra"])."""
+
+    def __init__(self, fraccion):
+        super().__init__()
+        self.fraccion = fraccion
+
+    def filter(self, record):
+        fraccion = getattr(record, "muestra", None)
+        if fraccion is None:
+            fraccion = self.fraccion if record.levelno <= logging.DEBUG else 1.0
+        return fraccion >= 1.0 or random.random() < fraccion
+
+
+class ColaSinBloqueo(QueueHandler):
+    """QueueHandler que descarta el registro si la cola está llena."""
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+    def prepare(self, record):
+        # Se resuelve el mensaje (y la traza) en el hilo que registra, pero
+        # sin formatear: el formato lo aplica el listener
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def niveles_por_modulo(texto):
+    """"app.api=DEBUG,werkzeug=WARNING" -> {"app.api": "DEBUG", ...}"""
+    niveles = {}
+    for parte in (texto or "").split(","):
+        if "=" in parte:
+            modulo, nivel = parte.split("=", 1)
+            niveles[modulo.strip()] = nivel.strip().upper()
+    return niveles
+
+
+def descartados():
+    """Registros perdidos por tener la cola llena (desde que se configuró)."""
+    return _handler.descartados if _handler is not None else 0
+
+
+def detener():
+    """Vacía la cola y detiene el hilo de escritura."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().removeHandler(_handler)
+        _listener = _handler = None
+
+
+def configurar_logging(app):
+    """Instala la cola y el hilo de escritura (una vez por proceso)."""
+    global _listener, _handler
+    detener()  # otra app creada en el mismo proceso (tests, benchmarks)
+
+    destino = logging.StreamHandler(sys.stderr)
+    formato = app.config["LOG_FORMAT"]
+    destino.setFormatter(FormatoTexto() if formato == "texto" else FormatoJSON())
+
+    cola = queue.Queue(maxsize=app.config["LOG_QUEUE_SIZE"])
+    _handler = ColaSinBloqueo(cola)
+    _handler.addFilter(FiltroMuestreo(app.config["LOG_DEBUG_SAMPLE_RATE"]))
+    _listener = QueueListener(cola, destino)
+    _listener.start()
+
+    raiz = logging.getLogger()
+    raiz.addHandler(_handler)
+    raiz.setLevel(app.config["LOG_LEVEL"].upper())
+    for modulo, nivel in niveles_por_modulo(app.config["LOG_LEVELS"]).items():
+        logging.getLogger(modulo).setLevel(nivel)
+
+    # app.logger propaga a la raíz; sin el handler propio de Flask no se duplica
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(logging.NOTSET)
+
+
+atexit.register(detener)
@@ -0,0 +1,125 @@
+"""
+Caché en memoria de catálogos que casi nunca cambian (sedes, adicionales,
+opciones de reserva).
+
+Cada catálogo tiene un número de versión en la tabla version_catalogo. Las
+rutas de admin que lo modifican llaman a `invalidar()`, que incrementa esa
+versión dentro de la misma transacción. Cada worker guarda su copia junto con
+la versión con que la cargó y, como mucho una vez cada CATALOG_CACHE_TTL
+segundos, compara con la base (una lectura por clave primaria): si cambió,
+descarta la copia y la vuelve a cargar en el siguiente uso.
+
+Los valores guardados se comparten entre requests, así que deben ser
+inmutables (tuplas, namedtuples) y no objetos del ORM ligados a una sesión.
+
+La versión y las cargas se leen siempre de la base principal, también en las
+vistas con @usar_replica: una réplica atrasada daría datos viejos que
+quedarían guardados bajo la versión nueva.
+"""
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+
+from app import db
+from app.models import VersionCatalogo
+from app.replica import en_principal
+
+
+def version_catalogo(nombre):
+    """Versión actual del catálogo en la base principal (0 si nunca se registró)."""
+    with en_principal():
+        version = db.session.scalar(
+            db.select(VersionCatalogo.version).where(VersionCatalogo.nombre == nombre)
+        )
+    return version or 0
+
+
+def incrementar_version(nombre):
+    """
+    Incrementa la versión dentro de la transacción actual (se confirma con el
+    commit del cambio que la motivó).
+    """
+    actualizado = db.session.execute(
+        db.update(VersionCatalogo)
+        .where(VersionCatalogo.nombre == nombre)
+        .values(version=VersionCatalogo.version + 1)
+    )
+    if not actualizado.rowcount:
+        db.session.add(VersionCatalogo(nombre=nombre, version=1))
+
+
+class CacheCatalogo:
+    """
+    Valores de un catálogo por clave, cargados con `cargar(*clave)` y válidos
+    mientras no cambie la versión del catálogo en la base.
+    """
+
+    def __init__(self, nombre, cargar):
+        self.nombre = nombre
+        self._cargar = cargar
+        self._lock = threading.Lock()
+        self._version = None
+        self._revisar_en = 0.0
+        self._valores = {}
+        # Cambia con cada descarte: lo leído antes de un descarte no se guarda
+        self._generacion = 0
+
+    def version(self):
+        """Versión vigente; consulta la base como mucho una vez por TTL."""
+        ahora = time.monotonic()
+        if ahora < self._revisar_en:
+            return self._version
+
+        generacion = self._generacion
+        version = version_catalogo(self.nombre)
+        with self._lock:
+            if generacion != self._generacion:
+                # Se confirmó un cambio mientras se consultaba: la versión
+                # leída puede ser la anterior, no se fija hasta revisar de nuevo
+                return version
+            if version != self._version:
+                self._valores = {}
+                self._version = version
+            self._revisar_en = ahora + current_app.config["CATALOG_CACHE_TTL"]
+        return self._version
+
+    def obtener_versionado(self, *clave):
+        """(versión, valor) del catálogo para la clave dada."""
+        generacion = self._generacion
+        version = self.version()
+        valores = self._valores
+        if clave in valores:
+            return version, valores[clave]
+
+        with en_principal():
+            valor = self._cargar(*clave)
+        with self._lock:
+            if self._version == version and self._generacion == generacion:
+                self._valores[clave] = valor
+        return version, valor
+
+    def obtener(self, *clave):
+        return self.obtener_versionado(*clave)[1]
+
+    def invalidar(self):
+        """
+        Incrementa la versión en la transacción actual y, cuando se confirma,
+        descarta la copia de este worker (antes del commit, un request en
+        paralelo volvería a cargar los datos viejos). Los demás workers lo
+        notan en su próxima revisión (<= TTL).
+        """
+        incrementar_version(self.nombre)
+        event.listen(
+            db.session(), "after_commit", lambda sesion: self.descartar(), once=True
+        )
+
+    def descartar(self):
+        """Descarta la copia de este worker sin tocar la versión en la base."""
+        with self._lock:
+            self._valores = {}
+            self._version = None
+            self._revisar_en = 0.0
+            self._generacion += 1
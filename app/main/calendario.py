@@ -0,0 +1,132 @@
+"""
+Calendario mensual de reservas por sede.
+
+Para un (sede, mes) devuelve, por día, salón y horario, la cantidad de
+reservas, los niños/adultos y el desglose por estado, calculados con una sola
+consulta agrupada (usa el índice sede_id + fecha_dia).
+
+Cada (sede, mes) tiene su versión en version_catalogo ("calendario:<sede>:<mes>").
+El alta o edición de una reserva, y los abonos (cambian el estado), llaman a
+`invalidar_mes` dentro de su transacción. Cada worker guarda el calendario ya
+armado con la versión con que lo calculó, y en cada pedido solo compara esa
+versión con la de la base (una lectura por clave primaria). Versión y
+cálculo se leen de la principal aunque la vista use la réplica, para no
+guardar un mes atrasado bajo la versión nueva.
+"""
+
+import json
+import threading
+from calendar import monthrange
+from datetime import date, datetime
+
+from app import db
+from app.main.cache import incrementar_version, version_catalogo
+from app.models import Reservation
+from app.replica import en_principal
+
+ESTADO_CANCELADO = "Cancelado"
+
+# Meses (sede, año, mes) que guarda cada worker
+CALENDARIO_MAX_MESES = 256
+
+_lock = threading.Lock()
+_meses = {}  # (sede_id, anio, mes) -> (version, cuerpo JSON)
+
+
+def _nombre(sede_id, anio, mes):
+    return f"calendario:{sede_id}:{anio:04d}-{mes:02d}"
+
+
+def invalidar_mes(sede_id, dia):
+    """
+    Marca como vencido el calendario del mes de `dia` (llamar antes del commit
+    de un cambio en una reserva de ese mes).
+    """
+    if not sede_id or dia is None:
+        return
+    if isinstance(dia, datetime):
+        dia = dia.date()
+    incrementar_version(_nombre(sede_id, dia.year, dia.month))
+    with _lock:
+        _meses.pop((sede_id, dia.year, dia.month), None)
+
+
+def _vacio():
+    return {"reservas": 0, "ninos": 0, "adultos": 0, "estados": {}}
+
+
+def _sumar(nodo, estado, cantidad, ninos, adultos):
+    nodo["estados"][estado] = nodo["estados"].get(estado, 0) + cantidad
+    if estado != ESTADO_CANCELADO:
+        nodo["reservas"] += cantidad
+        nodo["ninos"] += ninos
+        nodo["adultos"] += adultos
+
+
+def calcular_mes(sede_id, anio, mes):
+    """
+    {"YYYY-MM-DD": {reservas, ninos, adultos, estados, salones: {salon: {...,
+    horarios: {horario: {...}}}}}} con los días que tienen reservas.
+
+    `estados` cuenta todas las reservas; los totales no incluyen las canceladas.
+    Las reservas sin salón (Exclusivo) van con salón "".
+    """
+    desde = date(anio, mes, 1)
+    hasta = date(anio, mes, monthrange(anio, mes)[1])
+
+    filas = db.session.execute(
+        db.select(
+            Reservation.fecha_dia,
+            db.func.coalesce(Reservation.salon, ""),
+            db.func.coalesce(Reservation.horario, ""),
+            Reservation.estado,
+            db.func.count(),
+            db.func.coalesce(db.func.sum(Reservation.ninos), 0),
+            db.func.coalesce(db.func.sum(Reservation.adultos), 0),
+        )
+        .where(Reservation.sede_id == sede_id, Reservation.fecha_dia.between(desde, hasta))
+        .group_by(
+            Reservation.fecha_dia,
+            db.func.coalesce(Reservation.salon, ""),
+            db.func.coalesce(Reservation.horario, ""),
+            Reservation.estado,
+        )
+    )
+
+    dias = {}
+    for dia, salon, horario, estado, cantidad, ninos, adultos in filas:
+        if isinstance(dia, str):  # SQLite devuelve el texto en consultas agrupadas
+            dia = date.fromisoformat(dia)
+        nodo_dia = dias.setdefault(dia.isoformat(), {**_vacio(), "salones": {}})
+        nodo_salon = nodo_dia["salones"].setdefault(salon, {**_vacio(), "horarios": {}})
+        nodo_horario = nodo_salon["horarios"].setdefault(horario, _vacio())
+        for nodo in (nodo_dia, nodo_salon, nodo_horario):
+            _sumar(nodo, estado or "", cantidad, int(ninos), int(adultos))
+    return dias
+
+
+def calendario_mes(sede_id, anio, mes):
+    """(versión, cuerpo JSON) del calendario, desde la copia del worker si sigue vigente."""
+    clave = (sede_id, anio, mes)
+    version = version_catalogo(_nombre(sede_id, anio, mes))
+    guardado = _meses.get(clave)
+    if guardado and guardado[0] == version:
+        return guardado
+
+    with en_principal():
+        dias = calcular_mes(sede_id, anio, mes)
+    cuerpo = json.dumps(
+        {
+            "sede_id": sede_id,
+            "mes": f"{anio:04d}-{mes:02d}",
+            "version": version,
+            "dias": dias,
+        },
+        ensure_ascii=False,
+    )
+    with _lock:
+        _meses.pop(clave, None)
+        while len(_meses) >= CALENDARIO_MAX_MESES:
+            _meses.pop(next(iter(_meses)))
+        _meses[clave] = (version, cuerpo)
+    return version, cuerpo
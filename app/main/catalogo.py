@@ -0,0 +1,235 @@
+"""
+Catálogos servidos desde memoria (ver app/main/cache.py): sedes, adicionales
+y el catálogo de reservas (salones, horarios, modalidades y opciones de
+paquete) con el que se arma /api/opciones-reserva.
+
+Las rutas de admin que modifican alguno llaman a su `invalidar_*()` antes del
+commit; así cada worker lo recarga solo cuando cambió.
+"""
+
+import json
+from collections import namedtuple
+from decimal import Decimal
+
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.main.cache import CacheCatalogo, incrementar_version
+from app.models import Adicional, Horario, Modalidad, OpcionPaquete, Salon, Sede
+
+SedeInfo = namedtuple("SedeInfo", "id nombre prefijo")
+AdicionalInfo = namedtuple("AdicionalInfo", "id nombre precio")
+
+# Datos con los que se siembra una base nueva (el antiguo OPCIONES_RESERVA)
+CATALOGO_INICIAL = {
+    # (nombre, min_ninos, min_adultos, horarios)
+    "salones": [
+        (
+            "Salón 1",
+            17,
+            17,
+            ["3:00 PM - 5:30 PM", "6:30 PM - 9:00 PM", "11:00 AM - 1:30 PM"],
+        ),
+        (
+            "Salón 2",
+            12,
+            12,
+            ["3:30 PM - 6:00 PM", "7:00 PM - 9:30 PM", "11:30 AM - 2:00 PM"],
+        ),
+    ],
+    # (nombre, precio, precio_fijo, min_ninos, min_adultos, opciones)
+    "modalidades": [
+        ("Exclusivo", "3200.00", True, 0, 0, []),
+        ("Paquete LUDI", "39.90", False, 0, 0, ["Hot Dog", "Pan con Pollo"]),
+        ("Paquete JESSI", "49.90", False, 0, 0, ["Hot Dog"]),
+        ("Paquete LUDI SUPER ESTRELLA", "59.90", False, 0, 0, ["Chicharrón"]),
+    ],
+}
+
+
+# --- Sedes ---
+
+
+def _cargar_sedes():
+    filas = db.session.execute(
+        db.select(Sede.id, Sede.nombre, Sede.prefijo).order_by(Sede.nombre)
+    )
+    return tuple(SedeInfo(*fila) for fila in filas)
+
+
+_sedes = CacheCatalogo("sedes", _cargar_sedes)
+
+
+def listar_sedes():
+    """Todas las sedes ordenadas por nombre (tupla de SedeInfo)."""
+    return _sedes.obtener()
+
+
+def obtener_sede(sede_id):
+    """SedeInfo de la sede o None si no existe (acepta el id como texto)."""
+    try:
+        sede_id = int(sede_id)
+    except (TypeError, ValueError):
+        return None
+    return next((s for s in listar_sedes() if s.id == sede_id), None)
+
+
+def invalidar_sedes():
+    _sedes.invalidar()
+
+
+# --- Adicionales ---
+
+
+def _cargar_adicionales():
+    filas = db.session.execute(
+        db.select(Adicional.id, Adicional.nombre, Adicional.precio).order_by(
+            Adicional.nombre
+        )
+    )
+    return tuple(AdicionalInfo(*fila) for fila in filas)
+
+
+_adicionales = CacheCatalogo("adicionales", _cargar_adicionales)
+
+
+def listar_adicionales():
+    """Todos los adicionales ordenados por nombre (tupla de AdicionalInfo)."""
+    return _adicionales.obtener()
+
+
+def invalidar_adicionales():
+    _adicionales.invalidar()
+
+
+# --- Armado de /api/opciones-reserva ---
+
+
+def _de_la_sede(modelo, hijos, sede_id):
+    """Filas globales y de la sede; ante nombres repetidos gana la de la sede."""
+    filtro = modelo.sede_id.is_(None)
+    if sede_id:
+        filtro = db.or_(filtro, modelo.sede_id == sede_id)
+    filas = db.session.scalars(
+        db.select(modelo)
+        .options(selectinload(hijos))
+        .where(filtro)
+        .order_by(modelo.orden, modelo.nombre)
+    ).all()
+
+    elegidas = {}
+    for fila in filas:
+        if fila.nombre not in elegidas or fila.sede_id is not None:
+            elegidas[fila.nombre] = fila
+    return [f for f in filas if elegidas[f.nombre] is f]
+
+
+def construir_opciones(sede_id=None):
+    """Dict con la forma que espera reservas.js (minimos, precios, horarios...)."""
+    datos = {"minimos": {}, "precios_paquete": {}, "horarios": {}, "paquetes": {}}
+
+    for modalidad in _de_la_sede(Modalidad, Modalidad.opciones, sede_id):
+        datos["precios_paquete"][modalidad.nombre] = float(modalidad.precio)
+        datos["paquetes"][modalidad.nombre] = [
+            {"id": o.texto, "texto": o.texto} for o in modalidad.opciones
+        ]
+        if modalidad.precio_fijo:
+            datos["minimos"][modalidad.nombre] = {
+                "ninos": modalidad.min_ninos,
+                "adultos": modalidad.min_adultos,
+            }
+
+    for salon in _de_la_sede(Salon, Salon.horarios, sede_id):
+        datos["minimos"][salon.nombre] = {
+            "ninos": salon.min_ninos,
+            "adultos": salon.min_adultos,
+        }
+        datos["horarios"][salon.nombre] = [
+            {"id": h.texto, "texto": h.texto} for h in salon.horarios
+        ]
+
+    return datos
+
+
+def _cargar_opciones(sede_id):
+    datos = construir_opciones(sede_id)
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode()
+    return datos, cuerpo
+
+
+_opciones = CacheCatalogo("reservas", _cargar_opciones)
+
+
+def opciones_reserva(sede_id=None):
+    """(version, datos, cuerpo_json) del catálogo de reservas de la sede."""
+    version, (datos, cuerpo) = _opciones.obtener_versionado(sede_id)
+    return version, datos, cuerpo
+
+
+def invalidar_opciones():
+    _opciones.invalidar()
+
+
+def etag_opciones(version, sede_id=None):
+    return f"reservas-{sede_id or 0}-v{version}"
+
+
+def aplicar_catalogo(form, sede_id=None, reserva=None):
+    """
+    Usa las modalidades y salones del catálogo como choices del formulario.
+    Al editar, los valores actuales de la reserva siguen siendo válidos aunque
+    ya no estén en el catálogo. Devuelve la versión del catálogo usada.
+    """
+    version, datos, _ = opciones_reserva(sede_id)
+    modalidades = list(datos["precios_paquete"])
+    salones = list(datos["horarios"])
+    if reserva is not None:
+        if reserva.modalidad and reserva.modalidad not in modalidades:
+            modalidades.append(reserva.modalidad)
+        if reserva.salon and reserva.salon not in salones:
+            salones.append(reserva.salon)
+
+    form.modalidad.choices = [(m, m) for m in modalidades]
+    form.salon.choices = [(s, s) for s in salones]
+    return version
+
+
+# --- Siembra Inicial ---
+
+
+def sembrar_catalogo():
+    """Crea el catálogo inicial si está vacío. Devuelve True si sembró."""
+    if db.session.scalar(db.select(db.func.count(Modalidad.id))):
+        return False
+
+    for orden, (nombre, ninos, adultos, horarios) in enumerate(
+        CATALOGO_INICIAL["salones"]
+    ):
+        db.session.add(
+            Salon(
+                nombre=nombre,
+                min_ninos=ninos,
+                min_adultos=adultos,
+                orden=orden,
+                horarios=[Horario(texto=t, orden=i) for i, t in enumerate(horarios)],
+            )
+        )
+    for orden, (nombre, precio, fijo, ninos, adultos, opciones) in enumerate(
+        CATALOGO_INICIAL["modalidades"]
+    ):
+        db.session.add(
+            Modalidad(
+                nombre=nombre,
+                precio=Decimal(precio),
+                precio_fijo=fijo,
+                min_ninos=ninos,
+                min_adultos=adultos,
+                orden=orden,
+                opciones=[
+                    OpcionPaquete(texto=t, orden=i) for i, t in enumerate(opciones)
+                ],
+            )
+        )
+    incrementar_version("reservas")
+    db.session.commit()
+    return True
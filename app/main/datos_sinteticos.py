@@ -0,0 +1,343 @@
+"""
+Datos sintéticos para pruebas de carga y benchmarks (flask seed-synthetic).
+
+Genera sedes, usuarios, reservas y abonos con distribuciones parecidas a las
+reales:
+
+- Temporada: más celebraciones en vacaciones (enero-marzo, julio, diciembre)
+  y en fines de semana; las reservas se crean entre 5 y 90 días antes.
+- Mezcla de modalidades y opciones de paquete según el catálogo sembrado.
+- Abonos: la mayoría paga todo en 1 a 3 abonos, otra parte solo un adelanto
+  y el resto nada todavía; una fracción de reservas queda cancelada.
+- Un turno (sede, día, salón, horario) no se reserva dos veces: si está
+  tomado se prueba otro y, si no hay, la reserva queda cancelada. Cada sede
+  tiene unos 2.500 turnos por año, así que para muchas reservas conviene
+  crear más sedes o más años de historia.
+
+Todo se inserta por lotes (INSERT de varias filas, sin crear objetos del
+ORM), igual en SQLite que en MySQL. Los códigos de reserva se piden a la
+secuencia de cada sede, y al final se reconstruyen los resúmenes diarios y
+la ocupación de horarios.
+"""
+
+import random
+import string
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app import db
+from app.auth.passwords import hashear
+from app.main.calendario import invalidar_mes
+from app.main.catalogo import CATALOGO_INICIAL
+from app.main.disponibilidad import reconstruir_slots
+from app.main.rollups import reconstruir_resumenes
+from app.main.services import _format_reservation_code, reserve_code_block
+from app.models import Payment, Reservation, Sede, User
+
+PASSWORD_SINTETICO = "sintetico123"
+
+SEDES = [
+    ("Trujillo", "TR"),
+    ("Chiclayo", "CH"),
+    ("Piura", "PI"),
+    ("Lima", "LI"),
+    ("Arequipa", "AR"),
+    ("Cusco", "CU"),
+    ("Ica", "IC"),
+    ("Huancayo", "HU"),
+    ("Tacna", "TA"),
+    ("Cajamarca", "CA"),
+]
+
+# Peso relativo de cada mes (1 = enero) y de cada día (0 = lunes)
+PESO_MES = [1.6, 1.5, 1.4, 0.8, 0.8, 0.9, 1.4, 1.0, 0.8, 0.9, 1.0, 1.5]
+PESO_DIA = [0.4, 0.4, 0.5, 0.6, 1.2, 2.6, 2.3]
+
+# Mezcla de modalidades (mismo orden que CATALOGO_INICIAL["modalidades"])
+PESO_MODALIDAD = [0.1, 0.45, 0.3, 0.15]
+
+METODOS_PAGO = ["Efectivo", "Yape", "Plin", "Transferencia", "Tarjeta"]
+PESO_METODO = [0.3, 0.3, 0.1, 0.2, 0.1]
+
+NOMBRES = ["Ana", "Luis", "María", "Carlos", "Rosa", "Jorge", "Lucía", "Pedro"]
+APELLIDOS = ["Pérez", "García", "Rodríguez", "Flores", "Torres", "Díaz", "Vargas"]
+
+PROB_CANCELADA = 0.05
+INTENTOS_TURNO = 5
+PROB_PAGO_TOTAL = 0.55
+PROB_ADELANTO = 0.3
+
+
+def _dias_ponderados(desde, hasta):
+    """(días, pesos acumulados) entre `desde` y `hasta` según la temporada."""
+    dias, acumulado, total = [], [], 0.0
+    dia = desde
+    while dia <= hasta:
+        total += PESO_MES[dia.month - 1] * PESO_DIA[dia.weekday()]
+        dias.append(dia)
+        acumulado.append(total)
+        dia += timedelta(days=1)
+    return dias, acumulado
+
+
+def crear_sedes(cantidad):
+    """Crea hasta `cantidad` sedes nuevas (omite prefijos ya usados)."""
+    usados = set(db.session.scalars(db.select(Sede.prefijo)))
+    candidatas = SEDES + [
+        (f"Sede S{a}{b}", f"S{a}{b}")
+        for a in string.ascii_uppercase
+        for b in string.ascii_uppercase
+    ]
+    creadas = 0
+    for nombre, prefijo in candidatas:
+        if creadas >= cantidad:
+            break
+        if prefijo in usados:
+            continue
+        db.session.add(Sede(nombre=nombre, prefijo=prefijo))
+        creadas += 1
+    db.session.commit()
+    return creadas
+
+
+def crear_usuarios(cantidad, sede_ids):
+    """`cantidad` usuarios repartidos entre las sedes; el primero es admin."""
+    password_hash = hashear(PASSWORD_SINTETICO)  # un solo hash para todos
+    inicio = db.session.scalar(db.select(db.func.count(User.id))) or 0
+    filas = [
+        {
+            "username": f"sintetico{inicio + i}",
+            "password_hash": password_hash,
+            "is_active": True,
+            "is_admin": i == 0,
+            "sede_id": sede_ids[i % len(sede_ids)],
+            "auth_version": 1,
+        }
+        for i in range(cantidad)
+    ]
+    if filas:
+        db.session.execute(db.insert(User), filas)
+    db.session.commit()
+    return [f["username"] for f in filas]
+
+
+def _reserva(rnd, id_, codigo, sede_id, user_id, dia, turno, hoy):
+    nombre, precio, fijo, opciones = turno["modalidad"]
+    ninos = max(8, int(rnd.gauss(24, 7)))
+    adultos = max(4, int(ninos * rnd.uniform(0.6, 1.2)))
+    total = precio if fijo else (precio * ninos).quantize(Decimal("0.01"))
+
+    fecha = datetime(dia.year, dia.month, dia.day, rnd.choice([11, 15, 18]))
+    creada = min(
+        fecha - timedelta(days=rnd.randint(5, 90)),
+        datetime(hoy.year, hoy.month, hoy.day),
+    )
+    padre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}"
+    return {
+        "id": id_,
+        "codigo_reserva": codigo,
+        "sede_id": sede_id,
+        "user_id": user_id,
+        "created_at": creada,
+        "updated_at": creada,
+        "nombre_padres": padre,
+        "telefono": f"9{rnd.randint(10000000, 99999999)}",
+        "nombre_cumpleanero": f"{rnd.choice(NOMBRES)} {rnd.randint(1, 12)}",
+        "dni_padres": f"{rnd.randint(10000000, 79999999)}",
+        "correo": f"{padre.split()[0].lower()}{id_}@example.com",
+        "fecha_celebracion": fecha,
+        "fecha_dia": dia,
+        "modalidad": nombre,
+        "paquete": rnd.choice(opciones) if opciones else None,
+        "salon": turno["salon"],
+        "horario": turno["horario"],
+        "ninos": ninos,
+        "adultos": adultos,
+        "adicionales": "[]",
+        "estado": "Reservado",
+        "total": total,
+        "total_abonado": Decimal("0.00"),
+        "saldo": total,
+    }
+
+
+def _abonos(rnd, reserva, user_id, hoy):
+    """Abonos de la reserva según el perfil de pago; actualiza estado y saldo."""
+    sorteo = rnd.random()
+    if sorteo < PROB_PAGO_TOTAL:
+        partes = rnd.choice([1, 2, 2, 3])
+        cuota = (reserva["total"] / partes).quantize(Decimal("0.01"))
+        # La última cuota lleva el resto del redondeo: saldo exactamente 0
+        montos = [cuota] * (partes - 1)
+        montos.append(reserva["total"] - sum(montos))
+    elif sorteo < PROB_PAGO_TOTAL + PROB_ADELANTO:
+        adelanto = reserva["total"] * Decimal(str(rnd.uniform(0.2, 0.7)))
+        montos = [adelanto.quantize(Decimal("0.01"))]
+    else:
+        return []
+
+    desde = reserva["created_at"].date()
+    hasta = max(min(reserva["fecha_dia"], hoy), desde)
+    filas = []
+    for monto in montos:
+        fecha = desde + timedelta(days=rnd.randint(0, (hasta - desde).days))
+        filas.append(
+            {
+                "reservation_id": reserva["id"],
+                "codigo_reserva_str": reserva["codigo_reserva"],
+                "user_id": user_id,
+                "created_at": datetime.combine(fecha, datetime.min.time()),
+                "updated_at": datetime.combine(fecha, datetime.min.time()),
+                "fecha_abono": fecha,
+                "metodo_pago": rnd.choices(METODOS_PAGO, PESO_METODO)[0],
+                "monto": monto,
+                "referencia": f"OP{rnd.randint(100000, 999999)}",
+                "modalidad": reserva["modalidad"],
+            }
+        )
+    abonado = sum(f["monto"] for f in filas)
+    reserva["total_abonado"] = abonado
+    reserva["saldo"] = reserva["total"] - abonado
+    reserva["estado"] = "Abonado"
+    return filas
+
+
+def generar(
+    sedes=3,
+    usuarios=10,
+    reservas=10000,
+    anios=2,
+    semilla=42,
+    lote=5000,
+    informar=print,
+):
+    """
+    Crea los datos y devuelve {"sedes", "usuarios", "reservas", "abonos",
+    "segundos"}. Las celebraciones van desde `anios` años atrás hasta seis
+    meses adelante.
+    """
+    rnd = random.Random(semilla)
+    inicio = time.perf_counter()
+
+    sedes_creadas = crear_sedes(sedes)
+    sede_filas = db.session.execute(db.select(Sede.id, Sede.prefijo)).all()
+    if not sede_filas:
+        raise ValueError("No hay sedes donde crear las reservas.")
+    sede_ids = [s.id for s in sede_filas]
+    usuarios_creados = crear_usuarios(usuarios, sede_ids)
+    user_ids = list(db.session.scalars(db.select(User.id))) or [None]
+
+    modalidades = [
+        (nombre, Decimal(precio), fijo, opciones)
+        for nombre, precio, fijo, _, _, opciones in CATALOGO_INICIAL["modalidades"]
+    ]
+    turnos = [
+        (salon, horario)
+        for salon, _, _, horarios in CATALOGO_INICIAL["salones"]
+        for horario in horarios
+    ]
+    # Las sedes más antiguas (primeras) tienen algo más de movimiento
+    peso_sede = [1 + 1 / (i + 1) for i in range(len(sede_filas))]
+
+    hoy = date.today()
+    dias, acumulado = _dias_ponderados(
+        hoy.replace(year=hoy.year - anios, day=1), hoy + timedelta(days=180)
+    )
+    ocupados = set()
+    dias_ocupados = set()  # (sede_id, dia) con alguna reserva: no admite Exclusivo
+    meses = set()
+    siguiente_id = (db.session.scalar(db.select(db.func.max(Reservation.id))) or 0) + 1
+    total_abonos = 0
+
+    hechas = 0
+    while hechas < reservas:
+        cantidad = min(lote, reservas - hechas)
+        elegidas = rnd.choices(range(len(sede_filas)), peso_sede, k=cantidad)
+
+        # Códigos: un bloque de la secuencia por sede
+        codigos = {}
+        for indice, n in Counter(elegidas).items():
+            sede_id, prefijo = sede_filas[indice]
+            primero = reserve_code_block(sede_id, prefijo, n)
+            codigos[indice] = iter(range(primero, primero + n))
+
+        filas_reserva, filas_abono = [], []
+        fechas = rnd.choices(dias, cum_weights=acumulado, k=cantidad)
+        for indice, dia in zip(elegidas, fechas):
+            sede_id, prefijo = sede_filas[indice]
+            modalidad = rnd.choices(modalidades, PESO_MODALIDAD)[0]
+            # Turno libre: hasta 3 horarios del día elegido y, si está lleno,
+            # otros días de la temporada; si no hay, la reserva se cancela
+            turno = None
+            for intento in range(INTENTOS_TURNO):
+                if intento:
+                    dia = rnd.choices(dias, cum_weights=acumulado)[0]
+                if modalidad[2]:  # Exclusivo: todo el local, sin salón
+                    opciones_turno = [(None, None)]
+                else:
+                    opciones_turno = rnd.sample(turnos, 3)
+                turno = next(
+                    (
+                        t
+                        for t in opciones_turno
+                        if (
+                            (sede_id, dia) not in dias_ocupados
+                            if t[0] is None
+                            else (sede_id, dia, t[0], t[1]) not in ocupados
+                            and (sede_id, dia, "", "") not in ocupados
+                        )
+                    ),
+                    None,
+                )
+                if turno:
+                    break
+            cancelada = turno is None or rnd.random() < PROB_CANCELADA
+            turno = turno or opciones_turno[0]
+
+            user_id = rnd.choice(user_ids)
+            reserva = _reserva(
+                rnd,
+                siguiente_id,
+                _format_reservation_code(prefijo, next(codigos[indice])),
+                sede_id,
+                user_id,
+                dia,
+                {"modalidad": modalidad, "salon": turno[0], "horario": turno[1]},
+                hoy,
+            )
+            siguiente_id += 1
+            if cancelada:
+                reserva["estado"] = "Cancelado"
+            else:
+                ocupados.add((sede_id, dia, turno[0] or "", turno[1] or ""))
+                dias_ocupados.add((sede_id, dia))
+                filas_abono.extend(_abonos(rnd, reserva, user_id, hoy))
+            filas_reserva.append(reserva)
+            meses.add((sede_id, dia.replace(day=1)))
+
+        db.session.execute(db.insert(Reservation), filas_reserva)
+        if filas_abono:
+            db.session.execute(db.insert(Payment), filas_abono)
+        db.session.commit()
+
+        hechas += cantidad
+        total_abonos += len(filas_abono)
+        segundos = max(time.perf_counter() - inicio, 1e-9)
+        informar(f"reservas: {hechas} ({hechas / segundos:,.0f} filas/s)")
+
+    informar("Reconstruyendo resúmenes diarios y ocupación de horarios...")
+    reconstruir_resumenes()
+    reconstruir_slots()
+    for sede_id, mes in meses:
+        invalidar_mes(sede_id, mes)
+    db.session.commit()
+
+    return {
+        "sedes": sedes_creadas,
+        "usuarios": len(usuarios_creados),
+        "reservas": hechas,
+        "abonos": total_abonos,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
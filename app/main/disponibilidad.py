@@ -0,0 +1,244 @@
+"""
+Ocupación de horarios (tabla reserva_slot).
+
+Cada reserva activa ocupa una fila (sede, día, salón, horario). La clave
+primaria hace que dos reservas no puedan tomar el mismo turno aunque lleguen
+al mismo tiempo; `buscar_ocupante` permite avisar antes con una sola lectura
+por clave primaria, y `horarios_libres` arma la disponibilidad de un rango de
+fechas con una sola consulta (los salones y horarios salen del catálogo en
+memoria).
+
+Las reservas canceladas no ocupan turno. Las que no tienen salón (Exclusivo)
+toman todo el local ese día: ocupan el turno con salón "" y horario "", y
+chocan con cualquier reserva de salón del mismo día (y al revés). Del mismo
+modo, una reserva de salón sin horario (datos viejos; el formulario ya no lo
+permite) toma el salón todo el día: horario "", y choca con cualquier turno
+de ese salón. Ese cruce
+no lo cubre la clave primaria, así que antes de insertar se bloquea la fila
+de la sede (SELECT ... FOR UPDATE) para que las altas de una sede no se
+crucen entre sí.
+
+Si la tabla se desincroniza se reconstruye con: flask slots reconstruir
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.main.catalogo import opciones_reserva
+from app.models import ReservaSlot, Reservation, Sede
+
+ESTADO_CANCELADO = "Cancelado"
+
+
+class SlotOcupado(Exception):
+    """El turno ya está tomado por otra reserva (codigo, si se conoce)."""
+
+    def __init__(self, codigo=None):
+        self.codigo = codigo
+        super().__init__(
+            f"El horario ya está reservado ({codigo})."
+            if codigo
+            else "El horario ya está reservado."
+        )
+
+
+def clave_slot(sede_id, fecha, salon, horario, estado):
+    """Clave (sede_id, dia, salon, horario) que ocuparía la reserva, o None."""
+    if estado == ESTADO_CANCELADO:
+        return None
+    dia = fecha.date() if isinstance(fecha, datetime) else fecha
+    return (sede_id, dia, salon or "", horario or "")
+
+
+def _condicion(clave):
+    """
+    Turnos que chocan con la clave: el mismo turno, el salón tomado todo el
+    día y el Exclusivo del día (si es un salón); cualquier turno del salón (si
+    es un salón sin horario); cualquier turno del día (si es Exclusivo).
+    """
+    sede_id, dia, salon, horario = clave
+    del_dia = db.and_(ReservaSlot.sede_id == sede_id, ReservaSlot.dia == dia)
+    if not salon:
+        return del_dia
+    mismo_salon = ReservaSlot.salon == salon
+    if horario:
+        mismo_salon = db.and_(mismo_salon, ReservaSlot.horario.in_([horario, ""]))
+    return db.and_(del_dia, db.or_(mismo_salon, ReservaSlot.salon == ""))
+
+
+def buscar_ocupante(clave, excluir_id=None):
+    """Código de una reserva que ocupa (o pisa) el turno, o None."""
+    if clave is None:
+        return None
+    query = (
+        db.select(Reservation.codigo_reserva)
+        .join(ReservaSlot, ReservaSlot.reservation_id == Reservation.id)
+        .where(_condicion(clave))
+        .limit(1)
+    )
+    if excluir_id:
+        query = query.where(ReservaSlot.reservation_id != excluir_id)
+    return db.session.scalar(query)
+
+
+def sincronizar_slot(reserva):
+    """
+    Deja en reserva_slot el turno que ocupa la reserva (o ninguno, si está
+    cancelada). Va dentro de la transacción del alta/edición; lanza
+    SlotOcupado si otra reserva lo tomó entre la verificación y el INSERT.
+    """
+    db.session.flush()  # id de las reservas nuevas
+    db.session.execute(
+        db.delete(ReservaSlot).where(ReservaSlot.reservation_id == reserva.id)
+    )
+    clave = clave_slot(
+        reserva.sede_id,
+        reserva.fecha_celebracion,
+        reserva.salon,
+        reserva.horario,
+        reserva.estado,
+    )
+    if clave is None:
+        return
+
+    sede_id, dia, salon, horario = clave
+    # Serializa las altas de la sede: el cruce salón/Exclusivo no lo ve la PK
+    db.session.execute(db.select(Sede.id).where(Sede.id == sede_id).with_for_update())
+    ocupante = buscar_ocupante(clave, excluir_id=reserva.id)
+    if ocupante:
+        raise SlotOcupado(ocupante)
+    try:
+        db.session.execute(
+            db.insert(ReservaSlot).values(
+                sede_id=sede_id,
+                dia=dia,
+                salon=salon,
+                horario=horario,
+                reservation_id=reserva.id,
+            )
+        )
+    except IntegrityError as e:
+        raise SlotOcupado() from e
+
+
+def reconstruir_slots():
+    """
+    Vuelve a llenar reserva_slot desde las reservas activas. Si hay turnos con
+    más de una reserva, ocupa el turno la más antigua y devuelve las demás
+    como [(codigo, codigo_que_ocupa), ...].
+    """
+    db.session.execute(db.delete(ReservaSlot))
+    ocupados = {}
+    # (sede_id, dia) -> código del Exclusivo o de una reserva de salón del día
+    exclusivos, con_salon = {}, {}
+    # (sede_id, dia, salon) -> código de la reserva sin horario o de un turno
+    salon_completo, con_turno = {}, {}
+    conflictos = []
+    filas = db.session.execute(
+        db.select(
+            Reservation.id,
+            Reservation.codigo_reserva,
+            Reservation.sede_id,
+            Reservation.fecha_dia,
+            Reservation.salon,
+            Reservation.horario,
+            Reservation.estado,
+        ).order_by(Reservation.id)
+    )
+    lote = []
+    for id_, codigo, sede_id, dia, salon, horario, estado in filas:
+        clave = clave_slot(sede_id, dia, salon, horario, estado)
+        if clave is None:
+            continue
+        dia_sede, salon_dia = clave[:2], clave[:3]
+        if not clave[2]:
+            ocupante = ocupados.get(clave) or con_salon.get(dia_sede)
+        elif clave[3]:
+            ocupante = (
+                ocupados.get(clave)
+                or exclusivos.get(dia_sede)
+                or salon_completo.get(salon_dia)
+            )
+        else:
+            ocupante = (
+                exclusivos.get(dia_sede)
+                or salon_completo.get(salon_dia)
+                or con_turno.get(salon_dia)
+            )
+        if ocupante:
+            conflictos.append((codigo, ocupante))
+            continue
+        ocupados[clave] = codigo
+        if not clave[2]:
+            exclusivos[dia_sede] = codigo
+        else:
+            con_salon.setdefault(dia_sede, codigo)
+            if clave[3]:
+                con_turno.setdefault(salon_dia, codigo)
+            else:
+                salon_completo[salon_dia] = codigo
+        lote.append(
+            {
+                "sede_id": clave[0],
+                "dia": clave[1],
+                "salon": clave[2],
+                "horario": clave[3],
+                "reservation_id": id_,
+            }
+        )
+    if lote:
+        db.session.execute(db.insert(ReservaSlot), lote)
+    db.session.commit()
+    return conflictos
+
+
+def horarios_libres(sede_id, desde, hasta):
+    """
+    [{"fecha": "YYYY-MM-DD", "libres": {salon: [horario, ...]},
+    "exclusivo_libre": bool}, ...] para cada día entre `desde` y `hasta`
+    (incluidos), según el catálogo de la sede. Un día con Exclusivo no tiene
+    horarios libres, ni un salón tomado todo el día; uno con alguna reserva
+    de salón no admite Exclusivo.
+    """
+    _, catalogo, _ = opciones_reserva(sede_id)
+    turnos = {
+        salon: [h["id"] for h in horarios]
+        for salon, horarios in catalogo["horarios"].items()
+    }
+
+    ocupados = set(
+        db.session.execute(
+            db.select(ReservaSlot.dia, ReservaSlot.salon, ReservaSlot.horario).where(
+                ReservaSlot.sede_id == sede_id, ReservaSlot.dia.between(desde, hasta)
+            )
+        ).tuples()
+    )
+
+    con_exclusivo = {d for d, salon, _ in ocupados if not salon}
+    completos = {(d, salon) for d, salon, horario in ocupados if not horario}
+    con_reservas = {d for d, _, _ in ocupados}
+
+    dias = []
+    dia = desde
+    while dia <= hasta:
+        exclusivo = dia in con_exclusivo
+        dias.append(
+            {
+                "fecha": dia.isoformat(),
+                "libres": {
+                    salon: [
+                        h
+                        for h in horarios
+                        if not exclusivo
+                        and (dia, salon) not in completos
+                        and (dia, salon, h) not in ocupados
+                    ]
+                    for salon, horarios in turnos.items()
+                },
+                "exclusivo_libre": dia not in con_reservas,
+            }
+        )
+        dia += timedelta(days=1)
+    return dias
@@ -0,0 +1,295 @@
+"""
+Motor de exportación (CSV / JSON Lines / XLSX) para reservas, abonos y deudores.
+
+Cada formato es un generador que recibe bloques de filas y devuelve bytes a
+medida que los produce, así la memoria usada no depende de la cantidad de
+filas. El XLSX se escribe directamente como XML dentro del zip (sin armar el
+documento en memoria ni usar librerías externas).
+"""
+
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from app.main.services import (
+    iter_debtors_export,
+    iter_payments_export,
+    iter_reservations_export,
+)
+
+# --- Definición de Entidades ---
+# Cada columna: (cabecera, atributo de la fila, tipo). Tipos: texto, fecha, dinero.
+
+ENTIDADES = {
+    "reservas": {
+        "titulo": "Reservas",
+        "filas": iter_reservations_export,
+        "columnas": [
+            ("Codigo", "codigo_reserva", "texto"),
+            ("Fecha", "fecha_celebracion", "fecha"),
+            ("Cliente", "nombre_padres", "texto"),
+            ("DNI", "dni_padres", "texto"),
+            ("Telefono", "telefono", "texto"),
+            ("Modalidad", "modalidad", "texto"),
+            ("Salon", "salon", "texto"),
+            ("Total", "total", "dinero"),
+            ("Pagado", "total_abonado", "dinero"),
+            ("Deuda", "saldo", "dinero"),
+            ("Estado", "estado", "texto"),
+        ],
+    },
+    "abonos": {
+        "titulo": "Abonos",
+        "filas": iter_payments_export,
+        "columnas": [
+            ("Codigo", "codigo_reserva_str", "texto"),
+            ("Fecha Abono", "fecha_abono", "fecha"),
+            ("Metodo de Pago", "metodo_pago", "texto"),
+            ("Monto", "monto", "dinero"),
+            ("Referencia", "referencia", "texto"),
+            ("Modalidad", "modalidad", "texto"),
+            ("Registrado Por", "username", "texto"),
+        ],
+    },
+    "deudores": {
+        "titulo": "Deudores",
+        "filas": iter_debtors_export,
+        "columnas": [
+            ("Codigo", "codigo_reserva", "texto"),
+            ("Fecha", "fecha_celebracion", "fecha"),
+            ("Cliente", "nombre_padres", "texto"),
+            ("Telefono", "telefono", "texto"),
+            ("Correo", "correo", "texto"),
+            ("Total", "total", "dinero"),
+            ("Pagado", "total_abonado", "dinero"),
+            ("Deuda", "saldo", "dinero"),
+            ("Estado", "estado", "texto"),
+        ],
+    },
+}
+
+FORMATOS = {
+    # Werkzeug agrega "; charset=utf-8" a los text/*
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx",
+    ),
+}
+
+
+# --- CSV ---
+
+
+def escribir_csv(columnas, bloques):
+    si = io.StringIO()
+    cw = csv.writer(si)
+    cw.writerow([cabecera for cabecera, _, _ in columnas])
+    yield si.getvalue().encode("utf-8")
+    si.seek(0)
+    si.truncate(0)
+
+    campos = [(atributo, tipo) for _, atributo, tipo in columnas]
+    for bloque in bloques:
+        for fila in bloque:
+            cw.writerow([_valor_csv(getattr(fila, a), t) for a, t in campos])
+        yield si.getvalue().encode("utf-8")
+        si.seek(0)
+        si.truncate(0)
+
+
+def _valor_csv(valor, tipo):
+    if valor is None:
+        return ""
+    if tipo == "fecha":
+        return valor.strftime("%d/%m/%Y")
+    if tipo == "dinero":
+        return f"{valor:.2f}"
+    return valor
+
+
+# --- JSON Lines ---
+
+
+def escribir_jsonl(columnas, bloques):
+    campos = [(cabecera, atributo, tipo) for cabecera, atributo, tipo in columnas]
+    for bloque in bloques:
+        lineas = []
+        for fila in bloque:
+            registro = {
+                cabecera: _valor_json(getattr(fila, atributo), tipo)
+                for cabecera, atributo, tipo in campos
+            }
+            lineas.append(json.dumps(registro, ensure_ascii=False))
+        if lineas:
+            yield ("\n".join(lineas) + "\n").encode("utf-8")
+
+
+def _valor_json(valor, tipo):
+    if valor is None:
+        return None
+    if tipo == "fecha":
+        return valor.strftime("%Y-%m-%d")
+    if tipo == "dinero":
+        return float(valor)
+    return valor
+
+
+# --- XLSX (Office Open XML en streaming) ---
+
+_XML_INVALIDO = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_EPOCA_EXCEL = date(1899, 12, 30)
+
+# Índices de estilo definidos en _STYLES: 1 = cabecera, 2 = fecha, 3 = dinero
+_ESTILO = {"texto": "", "fecha": ' s="2"', "dinero": ' s="3"'}
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nombre}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+_SHEET_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_SHEET_FIN = "</sheetData></worksheet>"
+
+
+class _SalidaZip(io.RawIOBase):
+    """Destino no 'seekable' para ZipFile: acumula lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _celda_xlsx(valor, tipo):
+    if valor is None:
+        return "<c/>"
+    if tipo == "fecha":
+        if isinstance(valor, datetime):
+            valor = valor.date()
+        return f'<c{_ESTILO[tipo]}><v>{(valor - _EPOCA_EXCEL).days}</v></c>'
+    if tipo == "dinero":
+        return f"<c{_ESTILO[tipo]}><v>{valor}</v></c>"
+    texto = escape(_XML_INVALIDO.sub("", str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def escribir_xlsx(columnas, bloques, nombre_hoja="Datos"):
+    salida = _SalidaZip()
+    zf = zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED)
+
+    zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+    zf.writestr("_rels/.rels", _RELS)
+    zf.writestr("xl/workbook.xml", _WORKBOOK.format(nombre=escape(nombre_hoja)))
+    zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+    zf.writestr("xl/styles.xml", _STYLES)
+    yield salida.vaciar()
+
+    campos = [(atributo, tipo) for _, atributo, tipo in columnas]
+    with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja:
+        cabecera = "".join(
+            f'<c t="inlineStr" s="1"><is><t>{escape(c)}</t></is></c>'
+            for c, _, _ in columnas
+        )
+        hoja.write(f'{_SHEET_INICIO}<row r="1">{cabecera}</row>'.encode("utf-8"))
+
+        numero_fila = 1
+        for bloque in bloques:
+            partes = []
+            for fila in bloque:
+                numero_fila += 1
+                celdas = "".join(_celda_xlsx(getattr(fila, a), t) for a, t in campos)
+                partes.append(f'<row r="{numero_fila}">{celdas}</row>')
+            hoja.write("".join(partes).encode("utf-8"))
+            yield salida.vaciar()
+
+        hoja.write(_SHEET_FIN.encode("utf-8"))
+
+    zf.close()
+    yield salida.vaciar()
+
+
+# --- Punto de Entrada ---
+
+_ESCRITORES = {"csv": escribir_csv, "jsonl": escribir_jsonl, "xlsx": escribir_xlsx}
+
+
+def exportar(entidad, formato, fecha_inicio=None, fecha_fin=None, sede_id=None):
+    """
+    Devuelve un generador de bytes con la exportación de `entidad` en `formato`.
+    Lanza KeyError si la entidad o el formato no existen.
+    """
+    definicion = ENTIDADES[entidad]
+    escritor = _ESCRITORES[formato]
+    bloques = definicion["filas"](fecha_inicio, fecha_fin, sede_id)
+
+    if formato == "xlsx":
+        return escritor(definicion["columnas"], bloques, definicion["titulo"])
+    return escritor(definicion["columnas"], bloques)
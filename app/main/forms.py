@@ -127,6 +127,11 @@ class ReservationForm(FlaskForm):
     # Botón de envío del modal
     submit = SubmitField("Reservar")
 
+    def validate_salon(self, field):
+        # Un salón sin horario no ocuparía un turno concreto (ver disponibilidad.py)
+        if field.data and not self.horario.data and self.estado.data != "Cancelado":
+            raise ValidationError("Debe elegir un horario para el salón.")
+
 
 # Validador personalizado para el SelectField de Abonos
 def must_be_valid_reservation(form, field):
@@ -227,3 +232,52 @@ class UserForm(FlaskForm):
     is_admin = BooleanField("¿Es Administrador General?")
 
     submit = SubmitField("Guardar Usuario")
+
+
+class SalonForm(FlaskForm):
+    """Formulario para crear y editar Salones del catálogo de reservas."""
+
+    sede_id = SelectField("Sede", coerce=int)  # 0 = Todas las sedes
+    nombre = StringField(
+        "Nombre del Salón", validators=[DataRequired(), Length(min=2, max=50)]
+    )
+    min_ninos = IntegerField(
+        "Mínimo de Niños", validators=[NumberRange(min=0)], default=0
+    )
+    min_adultos = IntegerField(
+        "Mínimo de Adultos", validators=[NumberRange(min=0)], default=0
+    )
+    orden = IntegerField("Orden", validators=[Optional()], default=0)
+    # Un horario por línea, en el orden en que se muestran
+    horarios = TextAreaField("Horarios (uno por línea)", validators=[Optional()])
+    submit = SubmitField("Guardar Salón")
+
+
+class ModalidadForm(FlaskForm):
+    """Formulario para crear y editar Modalidades (paquetes) del catálogo."""
+
+    sede_id = SelectField("Sede", coerce=int)  # 0 = Todas las sedes
+    nombre = StringField(
+        "Nombre de la Modalidad", validators=[DataRequired(), Length(min=3, max=100)]
+    )
+    precio = DecimalField(
+        "Precio (S/.)",
+        validators=[
+            DataRequired(message="El precio es requerido."),
+            NumberRange(min=0),
+        ],
+        places=2,
+    )
+    precio_fijo = BooleanField("Precio total fijo (sin salón, ej: Exclusivo)")
+    min_ninos = IntegerField(
+        "Mínimo de Niños", validators=[NumberRange(min=0)], default=0
+    )
+    min_adultos = IntegerField(
+        "Mínimo de Adultos", validators=[NumberRange(min=0)], default=0
+    )
+    orden = IntegerField("Orden", validators=[Optional()], default=0)
+    # Opciones de comida, una por línea
+    opciones = TextAreaField(
+        "Opciones de Paquete (una por línea)", validators=[Optional()]
+    )
+    submit = SubmitField("Guardar Modalidad")
@@ -0,0 +1,482 @@
+"""
+Importación de las exportaciones de Wix (ReservasBD.csv y AbonosBD.csv).
+
+Los archivos se leen fila a fila (no se cargan en memoria) y se insertan en
+lotes de `lote` filas con un solo INSERT de varias filas por lote; cada
+`commit_cada` filas se confirma la transacción y se guarda el avance en el
+archivo de checkpoint, así una importación interrumpida continúa donde quedó.
+
+- La sede de cada reserva sale del prefijo de su código (TR00001 -> TR).
+- Los abonos se enlazan con su reserva por 'Código de Reserva' usando un
+  índice en memoria {codigo: (id, sede_id)} cargado con una sola consulta.
+- Las reservas cuyo código ya existe en la base se omiten (la importación se
+  puede repetir sin duplicarlas). Los abonos no tienen un código propio: para
+  no duplicarlos se depende del checkpoint.
+- total_abonado/saldo se actualizan en el mismo commit que cada lote de
+  abonos. Al final se ajustan las secuencias de códigos y se reconstruyen los
+  resúmenes diarios y la ocupación de horarios.
+"""
+
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from app import db
+from app.main.calendario import invalidar_mes
+from app.models import Payment, Reservation, ReservationSequence, Sede
+
+# Campo del modelo -> encabezados de Wix aceptados (ya normalizados, ver _normalizar)
+COLUMNAS_RESERVAS = {
+    "codigo_reserva": ("codigo de reserva", "codigo reserva", "codigo"),
+    "created_at": ("fecha de creacion", "created date"),
+    "updated_at": ("actualizacion", "updated date"),
+    "nombre_padres": (
+        "nombre y apellidos padres",
+        "nombre y apellidos",
+        "nombre padres",
+        "nombre de los padres",
+    ),
+    "telefono": ("telefono", "celular"),
+    "nombre_cumpleanero": ("nombre del cumpleanero", "nombre cumpleanero", "cumpleanero"),
+    "dni_padres": ("dni padres", "dni"),
+    "correo": ("correo", "correo electronico", "email"),
+    "fecha_celebracion": ("fecha de reserva", "fecha de celebracion", "fecha celebracion"),
+    "modalidad": ("modalidad",),
+    "paquete": ("paquete",),
+    "horario": ("horario",),
+    "salon": ("salon",),
+    "ninos": ("ninos", "cantidad de ninos"),
+    "adultos": ("adultos", "cantidad de adultos"),
+    "accesorios": ("accesorios",),
+    "adicionales": ("adicionales",),
+    "comentarios": ("comentarios",),
+    "estado": ("estado",),
+    "total": ("total", "total a pagar", "monto total"),
+}
+
+COLUMNAS_ABONOS = {
+    "codigo_reserva_str": ("codigo de reserva", "codigo reserva", "codigo"),
+    "created_at": ("fecha de creacion", "created date"),
+    "updated_at": ("actualizacion", "updated date"),
+    "fecha_abono": ("fecha de abono", "fecha abono", "fecha"),
+    "metodo_pago": ("metodo de pago", "metodo pago", "metodo"),
+    "monto": ("monto", "importe"),
+    "referencia": (
+        "referencia",
+        "nro de operacion",
+        "boleta factura y o nro de operacion",
+    ),
+    "modalidad": ("modalidad",),
+    "comentarios": ("comentarios",),
+}
+
+_FORMATOS_FECHA = (
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+)
+
+
+class ErrorImportacion(Exception):
+    """El archivo no se puede importar (faltan columnas obligatorias, etc.)."""
+
+
+# --- Conversión de Valores ---
+
+
+def _normalizar(encabezado):
+    """'Código de Reserva' -> 'codigo de reserva' (sin tildes ni signos)."""
+    sin_tildes = unicodedata.normalize("NFKD", encabezado).encode("ascii", "ignore")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sin_tildes.decode().lower()).split())
+
+
+def _texto(valor, largo=None):
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    return valor[:largo] if largo else valor
+
+
+def _fecha(valor):
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    for formato in _FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+    raise ValueError(f"fecha inválida: {valor!r}")
+
+
+def _decimal(valor):
+    """'S/ 1,250.50' -> Decimal('1250.50'); '1250,50' -> Decimal('1250.50')."""
+    valor = re.sub(r"[^0-9,.\-]", "", valor or "")
+    if not valor:
+        return None
+    if "," in valor and "." in valor:
+        valor = valor.replace(",", "")
+    else:
+        valor = valor.replace(",", ".")
+    try:
+        return Decimal(valor).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"monto inválido: {valor!r}") from None
+
+
+def _entero(valor):
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    try:
+        return int(Decimal(valor))
+    except (InvalidOperation, OverflowError):
+        raise ValueError(f"número inválido: {valor!r}") from None
+
+
+# --- Lectura y Checkpoints ---
+
+
+def _filas(ruta, columnas, obligatorias, delimitador):
+    """Genera (numero_fila, {campo: texto}) leyendo el CSV en streaming."""
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        lector = csv.reader(archivo, delimiter=delimitador)
+        encabezados = [_normalizar(e) for e in next(lector, [])]
+
+        posiciones = {}
+        for campo, alias in columnas.items():
+            for nombre in alias:
+                if nombre in encabezados:
+                    posiciones[campo] = encabezados.index(nombre)
+                    break
+        faltan = [c for c in obligatorias if c not in posiciones]
+        if faltan:
+            raise ErrorImportacion(
+                f"{os.path.basename(ruta)}: faltan las columnas {', '.join(faltan)}"
+            )
+
+        for numero, fila in enumerate(lector, start=1):
+            yield numero, {
+                campo: fila[i] if i < len(fila) else ""
+                for campo, i in posiciones.items()
+            }
+
+
+def leer_checkpoint(ruta):
+    if not ruta or not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _guardar_checkpoint(ruta, estado):
+    if not ruta:
+        return
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(estado, archivo, indent=2)
+    os.replace(temporal, ruta)  # atómico: nunca queda un checkpoint a medias
+
+
+# --- Importación ---
+
+
+class ImportadorWix:
+    """
+    Importa ReservasBD.csv y/o AbonosBD.csv. `informar(texto)` recibe el avance
+    (filas/s) después de cada commit.
+    """
+
+    def __init__(
+        self,
+        checkpoint=None,
+        lote=1000,
+        commit_cada=10000,
+        delimitador=",",
+        sede_por_defecto=None,
+        informar=print,
+    ):
+        self.checkpoint = checkpoint
+        self.estado = leer_checkpoint(checkpoint)
+        self.lote = lote
+        self.commit_cada = max(commit_cada, lote)
+        self.delimitador = delimitador
+        self.sede_por_defecto = sede_por_defecto
+        self.informar = informar
+        self.rechazadas = []  # (archivo, fila, motivo)
+        self.meses = set()  # (sede_id, día) de las reservas importadas
+        self.numeros = {}  # sede_id -> mayor número de código importado
+
+    # --- Utilidades ---
+
+    def _rechazar(self, archivo, numero, motivo):
+        self.rechazadas.append((archivo, numero, motivo))
+
+    def _avance(self, fase, ruta):
+        guardado = self.estado.get(fase) or {}
+        if guardado.get("archivo") != os.path.abspath(ruta):
+            return {"archivo": os.path.abspath(ruta), "filas": 0, "completo": False}
+        return guardado
+
+    def _confirmar(self, fase, avance, inicio, procesadas):
+        db.session.commit()
+        self.estado[fase] = avance
+        _guardar_checkpoint(self.checkpoint, self.estado)
+        segundos = max(time.perf_counter() - inicio, 1e-9)
+        self.informar(
+            f"{fase}: {avance['filas']} filas ({procesadas / segundos:,.0f} filas/s)"
+        )
+
+    def _indice_reservas(self):
+        """{codigo_reserva: (id, sede_id)} de todas las reservas, en una consulta."""
+        filas = db.session.execute(
+            db.select(
+                Reservation.codigo_reserva, Reservation.id, Reservation.sede_id
+            ).execution_options(yield_per=10000)
+        )
+        return {codigo: (id_, sede_id) for codigo, id_, sede_id in filas}
+
+    # --- Reservas ---
+
+    def importar_reservas(self, ruta):
+        avance = self._avance("reservas", ruta)
+        if avance["completo"]:
+            self.informar("reservas: ya importadas según el checkpoint.")
+            return 0
+
+        sedes = {
+            prefijo.upper(): sede_id
+            for sede_id, prefijo in db.session.execute(db.select(Sede.id, Sede.prefijo))
+        }
+        existentes = set(
+            db.session.scalars(
+                db.select(Reservation.codigo_reserva).execution_options(yield_per=10000)
+            )
+        )
+
+        # Incluye lo importado en una corrida anterior interrumpida
+        for codigo in existentes:
+            self._anotar_numero(codigo, sedes)
+
+        archivo = os.path.basename(ruta)
+        ya_hechas = avance["filas"]
+        inicio, procesadas, insertadas = time.perf_counter(), 0, 0
+        lote = []
+
+        def insertar():
+            nonlocal lote, insertadas
+            if lote:
+                db.session.execute(db.insert(Reservation), lote)
+                insertadas += len(lote)
+                lote = []
+
+        filas = _filas(
+            ruta,
+            COLUMNAS_RESERVAS,
+            ("codigo_reserva", "fecha_celebracion"),
+            self.delimitador,
+        )
+        for numero, fila in filas:
+            if numero <= ya_hechas:
+                continue
+
+            try:
+                valores = self._reserva(fila, sedes)
+            except ValueError as e:
+                self._rechazar(archivo, numero, str(e))
+                valores = None
+
+            if valores and valores["codigo_reserva"] not in existentes:
+                existentes.add(valores["codigo_reserva"])
+                self.meses.add((valores["sede_id"], valores["fecha_dia"]))
+                lote.append(valores)
+
+            procesadas += 1
+            avance["filas"] = numero
+            if len(lote) >= self.lote:
+                insertar()
+            if procesadas % self.commit_cada == 0:
+                insertar()
+                self._confirmar("reservas", avance, inicio, procesadas)
+
+        insertar()
+        avance["completo"] = True
+        self._confirmar("reservas", avance, inicio, procesadas)
+        return insertadas
+
+    def _anotar_numero(self, codigo, sedes):
+        prefijo = re.match(r"[A-Za-z]*", codigo).group().upper()
+        numero = codigo[len(prefijo) :]
+        if prefijo in sedes and numero.isdigit():
+            sede_id = sedes[prefijo]
+            self.numeros[sede_id] = max(self.numeros.get(sede_id, 0), int(numero))
+
+    def _reserva(self, fila, sedes):
+        codigo = _texto(fila["codigo_reserva"], 20)
+        if not codigo:
+            raise ValueError("sin código de reserva")
+        prefijo = re.match(r"[A-Za-z]*", codigo).group().upper()
+        sede_id = sedes.get(prefijo) or sedes.get(self.sede_por_defecto or "")
+        if not sede_id:
+            raise ValueError(f"{codigo}: no hay una sede con prefijo {prefijo!r}")
+
+        fecha = _fecha(fila["fecha_celebracion"])
+        if fecha is None:
+            raise ValueError(f"{codigo}: sin fecha de celebración")
+
+        self._anotar_numero(codigo, sedes)
+
+        total = _decimal(fila.get("total")) or Decimal("0.00")
+        creada = _fecha(fila.get("created_at")) or datetime.utcnow()
+        return {
+            "codigo_reserva": codigo,
+            "sede_id": sede_id,
+            "created_at": creada,
+            "updated_at": _fecha(fila.get("updated_at")) or creada,
+            "nombre_padres": _texto(fila.get("nombre_padres"), 200) or "",
+            "telefono": _texto(fila.get("telefono"), 20) or "",
+            "nombre_cumpleanero": _texto(fila.get("nombre_cumpleanero"), 200),
+            "dni_padres": _texto(fila.get("dni_padres"), 15),
+            "correo": _texto(fila.get("correo"), 120),
+            "fecha_celebracion": fecha,
+            "fecha_dia": fecha.date(),
+            "modalidad": _texto(fila.get("modalidad"), 100) or "",
+            "paquete": _texto(fila.get("paquete"), 100),
+            "horario": _texto(fila.get("horario"), 50),
+            "salon": _texto(fila.get("salon"), 50),
+            "ninos": _entero(fila.get("ninos")),
+            "adultos": _entero(fila.get("adultos")),
+            "accesorios": _texto(fila.get("accesorios")),
+            "adicionales": _texto(fila.get("adicionales")),
+            "comentarios": _texto(fila.get("comentarios")),
+            "estado": _texto(fila.get("estado"), 50) or "Reservado",
+            "total": total,
+            # Los abonos importados los suman después
+            "total_abonado": Decimal("0.00"),
+            "saldo": total,
+        }
+
+    # --- Abonos ---
+
+    def importar_abonos(self, ruta):
+        avance = self._avance("abonos", ruta)
+        if avance["completo"]:
+            self.informar("abonos: ya importados según el checkpoint.")
+            return 0
+
+        indice = self._indice_reservas()
+        archivo = os.path.basename(ruta)
+        ya_hechas = avance["filas"]
+        inicio, procesadas, insertadas = time.perf_counter(), 0, 0
+        lote, abonado = [], {}
+
+        def insertar():
+            nonlocal lote, insertadas
+            if lote:
+                db.session.execute(db.insert(Payment), lote)
+                insertadas += len(lote)
+                lote = []
+
+        filas = _filas(
+            ruta,
+            COLUMNAS_ABONOS,
+            ("codigo_reserva_str", "fecha_abono", "monto"),
+            self.delimitador,
+        )
+        for numero, fila in filas:
+            if numero <= ya_hechas:
+                continue
+
+            try:
+                valores = self._abono(fila, indice)
+                lote.append(valores)
+                rid = valores["reservation_id"]
+                abonado[rid] = abonado.get(rid, 0) + valores["monto"]
+            except ValueError as e:
+                self._rechazar(archivo, numero, str(e))
+
+            procesadas += 1
+            avance["filas"] = numero
+            if len(lote) >= self.lote:
+                insertar()
+            if procesadas % self.commit_cada == 0:
+                insertar()
+                self._sumar_abonado(abonado)
+                abonado = {}
+                self._confirmar("abonos", avance, inicio, procesadas)
+
+        insertar()
+        self._sumar_abonado(abonado)
+        avance["completo"] = True
+        self._confirmar("abonos", avance, inicio, procesadas)
+        return insertadas
+
+    def _abono(self, fila, indice):
+        codigo = _texto(fila["codigo_reserva_str"], 20)
+        reserva = indice.get(codigo)
+        if reserva is None:
+            raise ValueError(f"{codigo}: no existe la reserva")
+        fecha = _fecha(fila["fecha_abono"])
+        monto = _decimal(fila["monto"])
+        if fecha is None or monto is None:
+            raise ValueError(f"{codigo}: abono sin fecha o sin monto")
+
+        creada = _fecha(fila.get("created_at")) or datetime.utcnow()
+        return {
+            "reservation_id": reserva[0],
+            "codigo_reserva_str": codigo,
+            "created_at": creada,
+            "updated_at": _fecha(fila.get("updated_at")) or creada,
+            "fecha_abono": fecha.date(),
+            "metodo_pago": _texto(fila.get("metodo_pago"), 50) or "",
+            "monto": monto,
+            "referencia": _texto(fila.get("referencia"), 100),
+            "modalidad": _texto(fila.get("modalidad"), 100),
+            "comentarios": _texto(fila.get("comentarios")),
+        }
+
+    def _sumar_abonado(self, abonado):
+        """Suma lo abonado a cada reserva (executemany de un UPDATE por id)."""
+        if not abonado:
+            return
+        tabla = Reservation.__table__
+        monto = db.bindparam("monto")
+        db.session.execute(
+            db.update(tabla)
+            .where(tabla.c.id == db.bindparam("rid"))
+            .values(
+                total_abonado=tabla.c.total_abonado + monto,
+                saldo=tabla.c.saldo - monto,
+            ),
+            [{"rid": rid, "monto": m} for rid, m in abonado.items()],
+        )
+
+    # --- Cierre ---
+
+    def ajustar_secuencias(self):
+        """Deja la secuencia de cada sede después del mayor código importado."""
+        for sede_id, numero in self.numeros.items():
+            actual = db.session.get(ReservationSequence, sede_id)
+            if actual is None:
+                db.session.add(ReservationSequence(sede_id=sede_id, siguiente=numero + 1))
+            elif actual.siguiente <= numero:
+                actual.siguiente = numero + 1
+        db.session.commit()
+
+    def invalidar_calendarios(self):
+        """Vence el calendario de los meses con reservas importadas."""
+        meses = {(sede_id, dia.replace(day=1)) for sede_id, dia in self.meses}
+        for sede_id, mes in meses:
+            invalidar_mes(sede_id, mes)
+        db.session.commit()
+        return len(meses)
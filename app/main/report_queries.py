@@ -0,0 +1,72 @@
+"""
+Consultas del Reporte General en un solo viaje a la base.
+
+Los KPIs (ventas, cobrado, cantidad de reservas) y la serie de 12 meses se
+calculan en una única sentencia sobre los resúmenes diarios: agregación
+condicional por mes en una sola pasada por resumen_ventas_diario, y lo
+cobrado como subconsulta escalar en la misma fila.
+"""
+
+from datetime import date
+
+from app import db
+from app.models import ResumenCobrosDiario, ResumenVentasDiario
+
+
+def _rango_mes(anio, mes):
+    inicio = date(anio, mes, 1)
+    fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def consulta_kpis_generales(anio, sede_id=None):
+    """Sentencia SELECT (una fila) con todos los KPIs y las ventas por mes del año."""
+    rv = ResumenVentasDiario
+    rc = ResumenCobrosDiario
+
+    cobrado = db.select(db.func.coalesce(db.func.sum(rc.total_cobrado), 0))
+    if sede_id:
+        cobrado = cobrado.where(rc.sede_id == sede_id)
+
+    meses = []
+    for mes in range(1, 13):
+        inicio, fin = _rango_mes(anio, mes)
+        meses.append(
+            db.func.coalesce(
+                db.func.sum(
+                    db.case(
+                        (db.and_(rv.dia >= inicio, rv.dia < fin), rv.total_ventas),
+                        else_=0,
+                    )
+                ),
+                0,
+            ).label(f"mes_{mes}")
+        )
+
+    query = db.select(
+        db.func.coalesce(db.func.sum(rv.total_ventas), 0).label("total_ventas"),
+        db.func.coalesce(db.func.sum(rv.cantidad), 0).label("total_reservas"),
+        cobrado.scalar_subquery().label("total_cobrado"),
+        *meses,
+    )
+    if sede_id:
+        query = query.where(rv.sede_id == sede_id)
+    return query
+
+
+def kpis_generales(anio, sede_id=None):
+    """
+    Devuelve un dict con total_ventas, total_cobrado, por_cobrar,
+    total_reservas y ventas_por_mes (lista de 12 montos) en un solo viaje.
+    """
+    fila = db.session.execute(consulta_kpis_generales(anio, sede_id)).one()
+    total_ventas = fila.total_ventas
+    total_cobrado = fila.total_cobrado
+
+    return {
+        "total_ventas": total_ventas,
+        "total_cobrado": total_cobrado,
+        "por_cobrar": total_ventas - total_cobrado,
+        "total_reservas": int(fila.total_reservas),
+        "ventas_por_mes": [float(getattr(fila, f"mes_{m}")) for m in range(1, 13)],
+    }
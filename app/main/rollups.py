@@ -0,0 +1,153 @@
+"""
+Resúmenes diarios para los reportes.
+
+Cada alta o edición de una reserva o abono suma/resta su aporte en
+ResumenVentasDiario / ResumenCobrosDiario dentro de la misma transacción, y los
+reportes leen de ahí. Así el costo de un reporte depende de la cantidad de
+días (y combinaciones de modalidad/paquete/método), no de la de reservas.
+
+Si los resúmenes se desincronizan (cargas masivas, ediciones a mano en la
+base) se reconstruyen con: flask resumenes reconstruir
+"""
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import Payment, Reservation, ResumenCobrosDiario, ResumenVentasDiario
+
+# --- Mantenimiento Incremental ---
+
+
+def _incrementar(modelo, claves, incrementos):
+    """
+    INSERT de la fila del resumen o, si ya existe, suma los incrementos
+    (upsert atómico, sin leer antes la fila).
+    """
+    dialecto = db.session.get_bind().dialect.name
+    valores = {**claves, **incrementos}
+
+    if dialecto == "mysql":
+        stmt = mysql_insert(modelo).values(**valores)
+        stmt = stmt.on_duplicate_key_update(
+            {c: getattr(modelo, c) + getattr(stmt.inserted, c) for c in incrementos}
+        )
+    elif dialecto == "sqlite":
+        stmt = sqlite_insert(modelo).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(claves),
+            set_={c: getattr(modelo, c) + getattr(stmt.excluded, c) for c in incrementos},
+        )
+    else:
+        condicion = [getattr(modelo, c) == v for c, v in claves.items()]
+        actualizado = db.session.execute(
+            db.update(modelo)
+            .where(*condicion)
+            .values({c: getattr(modelo, c) + v for c, v in incrementos.items()})
+        )
+        if actualizado.rowcount:
+            return
+        stmt = db.insert(modelo).values(**valores)
+
+    db.session.execute(stmt)
+
+
+def registrar_reserva(reserva, signo=1):
+    """Suma (signo=1) o descuenta (signo=-1) la reserva del resumen de ventas."""
+    _incrementar(
+        ResumenVentasDiario,
+        {
+            "sede_id": reserva.sede_id,
+            "dia": reserva.fecha_dia,
+            "modalidad": reserva.modalidad or "",
+            "paquete": reserva.paquete or "",
+        },
+        {"total_ventas": signo * (reserva.total or 0), "cantidad": signo},
+    )
+
+
+def registrar_abono(abono, sede_id, signo=1):
+    """Suma (signo=1) o descuenta (signo=-1) el abono del resumen de cobros."""
+    _incrementar(
+        ResumenCobrosDiario,
+        {
+            "sede_id": sede_id,
+            "dia": abono.fecha_abono,
+            "metodo_pago": abono.metodo_pago or "",
+            "modalidad": abono.modalidad or "",
+        },
+        {"total_cobrado": signo * abono.monto, "cantidad": signo},
+    )
+
+
+def reconstruir_resumenes():
+    """Vuelve a calcular ambos resúmenes desde cero (en una sola transacción)."""
+    db.session.execute(db.delete(ResumenVentasDiario))
+    db.session.execute(db.delete(ResumenCobrosDiario))
+
+    modalidad = db.func.coalesce(Reservation.modalidad, "")
+    paquete = db.func.coalesce(Reservation.paquete, "")
+    db.session.execute(
+        db.insert(ResumenVentasDiario).from_select(
+            ["sede_id", "dia", "modalidad", "paquete", "total_ventas", "cantidad"],
+            db.select(
+                Reservation.sede_id,
+                Reservation.fecha_dia,
+                modalidad,
+                paquete,
+                db.func.coalesce(db.func.sum(Reservation.total), 0),
+                db.func.count(Reservation.id),
+            ).group_by(Reservation.sede_id, Reservation.fecha_dia, modalidad, paquete),
+        )
+    )
+
+    metodo = db.func.coalesce(Payment.metodo_pago, "")
+    modalidad_abono = db.func.coalesce(Payment.modalidad, "")
+    db.session.execute(
+        db.insert(ResumenCobrosDiario).from_select(
+            ["sede_id", "dia", "metodo_pago", "modalidad", "total_cobrado", "cantidad"],
+            db.select(
+                Reservation.sede_id,
+                Payment.fecha_abono,
+                metodo,
+                modalidad_abono,
+                db.func.sum(Payment.monto),
+                db.func.count(Payment.id),
+            )
+            .join(Reservation, Payment.reservation_id == Reservation.id)
+            .group_by(Reservation.sede_id, Payment.fecha_abono, metodo, modalidad_abono),
+        )
+    )
+    db.session.commit()
+
+
+# --- Consultas para Reportes ---
+
+
+def _por_sede(query, modelo, sede_id):
+    return query.where(modelo.sede_id == sede_id) if sede_id else query
+
+
+def total_ventas_periodo(desde, hasta, sede_id=None):
+    """Suma de ventas con celebración entre `desde` y `hasta` (fechas incluidas)."""
+    query = _por_sede(
+        db.select(
+            db.func.coalesce(db.func.sum(ResumenVentasDiario.total_ventas), 0)
+        ).where(ResumenVentasDiario.dia.between(desde, hasta)),
+        ResumenVentasDiario,
+        sede_id,
+    )
+    return db.session.scalar(query)
+
+
+def reservas_por_paquete(sede_id=None):
+    """[(paquete, cantidad), ...] sin contar las reservas sin paquete."""
+    query = _por_sede(
+        db.select(ResumenVentasDiario.paquete, db.func.sum(ResumenVentasDiario.cantidad))
+        .where(ResumenVentasDiario.paquete != "")
+        .group_by(ResumenVentasDiario.paquete)
+        .having(db.func.sum(ResumenVentasDiario.cantidad) > 0),
+        ResumenVentasDiario,
+        sede_id,
+    )
+    return [(paquete, int(cantidad)) for paquete, cantidad in db.session.execute(query)]
@@ -1,28 +1,63 @@
-import csv
 from datetime import datetime
 from functools import wraps
-from io import StringIO
 
-from flask import flash, make_response, redirect, render_template, request, url_for
+from flask import (
+    Response,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required
-from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 from app import db
+from app.auth.principal import invalidar_usuario
 from app.main import bp
+from app.main.catalogo import (
+    aplicar_catalogo,
+    invalidar_adicionales,
+    invalidar_opciones,
+    invalidar_sedes,
+    listar_adicionales,
+    listar_sedes,
+    obtener_sede,
+)
+from app.main.exports import ENTIDADES, FORMATOS, exportar
 from app.main.forms import (
     AdicionalForm,
+    ModalidadForm,
     PaymentForm,
     ReservationForm,
+    SalonForm,
     SedeForm,
     UserForm,
 )
+from app.main.report_queries import kpis_generales
+from app.main.rollups import reservas_por_paquete, total_ventas_periodo
 from app.main.services import (
     get_all_reservations,
+    get_deudores,
     get_next_reservation_code,
-    get_payments_by_date_range,
-    get_reservations_by_date_range,
+    load_options,
+    paginate_payments_by_date_range,
+    paginate_reservations_by_date_range,
+)
+from app.models import (
+    Adicional,
+    Horario,
+    Modalidad,
+    OpcionPaquete,
+    Reservation,
+    Salon,
+    Sede,
+    User,
 )
-from app.models import Adicional, Payment, Reservation, Sede, User
+from app.replica import usar_replica
 
 
 def admin_required(f):
@@ -38,6 +73,30 @@ def admin_required(f):
     return decorated_function
 
 
+def _parse_fecha(texto):
+    """'YYYY-MM-DD' -> date (None si viene vacío o con otro formato)."""
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _tamano_pagina():
+    """Filas por página: ?por_pagina= (acotado) o PAGE_SIZE de la config."""
+    por_pagina = request.args.get("por_pagina", type=int)
+    if not por_pagina or por_pagina < 1:
+        return current_app.config["PAGE_SIZE"]
+    return min(por_pagina, current_app.config["PAGE_SIZE_MAX"])
+
+
+def _contar_total():
+    """Si la página debe incluir el total de filas (?contar=1 o PAGE_COUNT_TOTAL)."""
+    contar = request.args.get("contar", type=int)
+    if contar is not None:
+        return contar == 1
+    return current_app.config["PAGE_COUNT_TOTAL"]
+
+
 @bp.route("/")
 @bp.route("/index")
 @login_required  # Proteger esta ruta
@@ -63,22 +122,30 @@ def reservas():
         # ADMIN: Puede elegir sede. Si eligió una, esa es la activa.
         # Si no eligió (o es la primera carga), usa su propia sede por defecto.
         if sede_filtro_id:
-            sede_activa = db.session.get(Sede, sede_filtro_id)
+            sede_activa = obtener_sede(sede_filtro_id)
         else:
-            sede_activa = current_user.sede
+            sede_activa = obtener_sede(current_user.sede_id)
     else:
         # NO ADMIN: Siempre está atado a su sede asignada.
-        sede_activa = current_user.sede
+        sede_activa = obtener_sede(current_user.sede_id)
 
     # 3. Preparar el Formulario y Datos para el Modal
     reserva_form = ReservationForm()
-    lista_de_adicionales = Adicional.query.order_by(Adicional.nombre).all()
+    lista_de_adicionales = listar_adicionales()
 
     # Si hay una sede activa, la pre-seleccionamos en el formulario (campo oculto)
     # Esto es vital para que la API sepa a qué sede guardar si es admin.
     if sede_activa:
         reserva_form.sede_seleccionada.data = sede_activa.id
 
+    # Modalidades y salones del catálogo; reservas.js pide el resto con esta URL
+    # versionada, que el navegador guarda hasta que el catálogo cambie.
+    sede_catalogo_id = sede_activa.id if sede_activa else None
+    version_catalogo = aplicar_catalogo(reserva_form, sede_catalogo_id)
+    url_opciones_reserva = url_for(
+        "api.get_opciones_reserva", sede_id=sede_catalogo_id, v=version_catalogo
+    )
+
     # 4. Generar el Código de Reserva (Visual)
     next_code_display = "S/Sede"  # Valor por defecto
     if sede_activa:
@@ -86,8 +153,9 @@ def reservas():
             sede_activa.id, sede_activa.prefijo
         )
 
-    # 5. Buscar Reservas (Filtradas por la Sede Activa)
+    # 5. Buscar Reservas (Filtradas por la Sede Activa, paginadas)
     reservations_list = []
+    pagina = None
     if str_desde and str_hasta:
         try:
             fecha_desde = datetime.strptime(str_desde, "%Y-%m-%d").date()
@@ -98,9 +166,15 @@ def reservas():
             # Aquí asumimos que si es None, no filtra (o filtra por None).
             filtro_sede_id = sede_activa.id if sede_activa else None
 
-            reservations_list = get_reservations_by_date_range(
-                fecha_desde, fecha_hasta, sede_id=filtro_sede_id
+            pagina = paginate_reservations_by_date_range(
+                fecha_desde,
+                fecha_hasta,
+                sede_id=filtro_sede_id,
+                limite=_tamano_pagina(),
+                cursor=request.args.get("cursor"),
+                contar=_contar_total(),
             )
+            reservations_list = pagina.items
 
             if not reservations_list:
                 flash("No se encontraron reservas para ese rango de fechas.", "info")
@@ -110,17 +184,19 @@ def reservas():
     # 6. Preparar lista de sedes para el dropdown del Admin
     all_sedes = []
     if current_user.is_admin:
-        all_sedes = Sede.query.order_by(Sede.nombre).all()
+        all_sedes = listar_sedes()
 
     # Renderizar la plantilla
     return render_template(
         "reservas.html",
         title="Reservas",
         reservations=reservations_list,
+        pagina=pagina,
         reserva_form=reserva_form,
         # Datos Extra
         next_reservation_code=next_code_display,
         lista_adicionales=lista_de_adicionales,
+        url_opciones_reserva=url_opciones_reserva,
         # Filtros
         search_desde=str_desde,
         search_hasta=str_hasta,
@@ -142,10 +218,10 @@ def abonos():
     sede_activa = None
     if current_user.is_admin:
         if sede_filtro_id:
-            sede_activa = db.session.get(Sede, sede_filtro_id)
+            sede_activa = obtener_sede(sede_filtro_id)
         # Si es admin y no elige filtro, ve todo (sede_activa = None)
     else:
-        sede_activa = current_user.sede
+        sede_activa = obtener_sede(current_user.sede_id)
 
     # 2. Preparar Formulario de Nuevo Abono
     payment_form = PaymentForm()
@@ -155,7 +231,7 @@ def abonos():
     id_filtro_reservas = sede_activa.id if sede_activa else None
 
     reservas_pendientes = get_all_reservations(
-        estado="Reservado", sede_id=id_filtro_reservas
+        estado="Reservado", sede_id=id_filtro_reservas, carga="list"
     )
 
     payment_form.reservation_id.choices = [
@@ -163,17 +239,24 @@ def abonos():
     ]
     payment_form.reservation_id.choices.insert(0, (0, "-- Seleccionar Reserva --"))
 
-    # 3. Buscar Abonos
+    # 3. Buscar Abonos (paginados)
     payments_list = []
+    pagina = None
     if str_desde and str_hasta:
         try:
             fecha_desde = datetime.strptime(str_desde, "%Y-%m-%d").date()
             fecha_hasta = datetime.strptime(str_hasta, "%Y-%m-%d").date()
 
             # Usamos el ID de la sede activa para filtrar los pagos
-            payments_list = get_payments_by_date_range(
-                fecha_desde, fecha_hasta, sede_id=id_filtro_reservas
+            pagina = paginate_payments_by_date_range(
+                fecha_desde,
+                fecha_hasta,
+                sede_id=id_filtro_reservas,
+                limite=_tamano_pagina(),
+                cursor=request.args.get("cursor"),
+                contar=_contar_total(),
             )
+            payments_list = pagina.items
 
             if not payments_list:
                 flash("No se encontraron abonos para ese rango de fechas.", "info")
@@ -183,12 +266,13 @@ def abonos():
     # 4. Preparar lista de sedes para el filtro (Solo Admin)
     all_sedes = []
     if current_user.is_admin:
-        all_sedes = Sede.query.order_by(Sede.nombre).all()
+        all_sedes = listar_sedes()
 
     return render_template(
         "abonos.html",
         title="Abonos",
         payments=payments_list,
+        pagina=pagina,
         payment_form=payment_form,
         search_desde=str_desde,
         search_hasta=str_hasta,
@@ -224,6 +308,7 @@ def nuevo_adicional():
         try:
             nuevo = Adicional(nombre=form.nombre.data, precio=form.precio.data)
             db.session.add(nuevo)
+            invalidar_adicionales()
             db.session.commit()
             flash(f"Adicional '{nuevo.nombre}' creado exitosamente.", "success")
             return redirect(url_for("main.admin_adicionales"))
@@ -248,6 +333,7 @@ def editar_adicional(id):
         try:
             adicional.nombre = form.nombre.data
             adicional.precio = form.precio.data
+            invalidar_adicionales()
             db.session.commit()
             flash(f"Adicional '{adicional.nombre}' actualizado.", "info")
             return redirect(url_for("main.admin_adicionales"))
@@ -269,6 +355,7 @@ def eliminar_adicional(id):
     try:
         nombre = adicional.nombre
         db.session.delete(adicional)
+        invalidar_adicionales()
         db.session.commit()
         flash(f"Adicional '{nombre}' ha sido eliminado.", "danger")
     except Exception as e:
@@ -301,6 +388,7 @@ def nueva_sede():
             # Convertimos prefijo a mayúsculas automáticamente
             nueva = Sede(nombre=form.nombre.data, prefijo=form.prefijo.data.upper())
             db.session.add(nueva)
+            invalidar_sedes()
             db.session.commit()
             flash(
                 f"Sede '{nueva.nombre}' creada con prefijo '{nueva.prefijo}'.",
@@ -323,6 +411,7 @@ def editar_sede(id):
         try:
             sede.nombre = form.nombre.data
             sede.prefijo = form.prefijo.data.upper()
+            invalidar_sedes()
             db.session.commit()
             flash(f"Sede '{sede.nombre}' actualizada.", "info")
             return redirect(url_for("main.admin_sedes"))
@@ -346,6 +435,7 @@ def eliminar_sede(id):
         #     return redirect(url_for("main.admin_sedes"))
 
         db.session.delete(sede)
+        invalidar_sedes()
         db.session.commit()
         flash(f"Sede '{nombre}' ha sido eliminada.", "danger")
     except Exception as e:
@@ -355,6 +445,203 @@ def eliminar_sede(id):
     return redirect(url_for("main.admin_sedes"))
 
 
+# ==========================================================
+# === RUTAS DEL PANEL DE ADMIN (CATÁLOGO DE RESERVAS) ===
+# ==========================================================
+# Cada cambio incrementa la versión del catálogo en la misma transacción, así
+# los workers y navegadores dejan de usar el /api/opciones-reserva anterior.
+
+
+def _choices_sede_catalogo(form):
+    form.sede_id.choices = [(0, "Todas las sedes")] + [
+        (s.id, s.nombre) for s in listar_sedes()
+    ]
+
+
+def _lineas(texto):
+    """Líneas no vacías de un textarea, sin espacios sobrantes."""
+    return [linea.strip() for linea in (texto or "").splitlines() if linea.strip()]
+
+
+@bp.route("/admin/catalogo")
+@login_required
+@admin_required
+def admin_catalogo():
+    """Muestra los salones (con horarios) y las modalidades (con opciones)."""
+    salones = Salon.query.options(selectinload(Salon.horarios)).order_by(
+        Salon.orden, Salon.nombre
+    )
+    modalidades = Modalidad.query.options(selectinload(Modalidad.opciones)).order_by(
+        Modalidad.orden, Modalidad.nombre
+    )
+    return render_template(
+        "admin/catalogo.html",
+        title="Admin Catálogo",
+        salones=salones.all(),
+        modalidades=modalidades.all(),
+    )
+
+
+def _guardar_salon(salon, form):
+    salon.sede_id = form.sede_id.data or None
+    salon.nombre = form.nombre.data
+    salon.min_ninos = form.min_ninos.data
+    salon.min_adultos = form.min_adultos.data
+    salon.orden = form.orden.data or 0
+    salon.horarios = [
+        Horario(texto=texto, orden=i)
+        for i, texto in enumerate(_lineas(form.horarios.data))
+    ]
+    invalidar_opciones()
+
+
+@bp.route("/admin/catalogo/salones/nuevo", methods=["GET", "POST"])
+@login_required
+@admin_required
+def nuevo_salon():
+    form = SalonForm()
+    _choices_sede_catalogo(form)
+    if form.validate_on_submit():
+        try:
+            salon = Salon()
+            _guardar_salon(salon, form)
+            db.session.add(salon)
+            db.session.commit()
+            flash(f"Salón '{salon.nombre}' creado.", "success")
+            return redirect(url_for("main.admin_catalogo"))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error: El salón ya existe en esa sede. {e}", "danger")
+    return render_template(
+        "admin/gestionar_salon.html", title="Nuevo Salón", form=form
+    )
+
+
+@bp.route("/admin/catalogo/salones/editar/<int:id>", methods=["GET", "POST"])
+@login_required
+@admin_required
+def editar_salon(id):
+    salon = Salon.query.get_or_404(id)
+    form = SalonForm(obj=salon)
+    _choices_sede_catalogo(form)
+    if request.method == "GET":
+        form.sede_id.data = salon.sede_id or 0
+        form.horarios.data = "\n".join(h.texto for h in salon.horarios)
+
+    if form.validate_on_submit():
+        try:
+            _guardar_salon(salon, form)
+            db.session.commit()
+            flash(f"Salón '{salon.nombre}' actualizado.", "info")
+            return redirect(url_for("main.admin_catalogo"))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error al actualizar el salón. {e}", "danger")
+    return render_template(
+        "admin/gestionar_salon.html", title="Editar Salón", form=form
+    )
+
+
+@bp.route("/admin/catalogo/salones/eliminar/<int:id>", methods=["POST"])
+@login_required
+@admin_required
+def eliminar_salon(id):
+    """Elimina un salón y sus horarios (solo por POST)."""
+    salon = Salon.query.get_or_404(id)
+    try:
+        nombre = salon.nombre
+        db.session.delete(salon)
+        invalidar_opciones()
+        db.session.commit()
+        flash(f"Salón '{nombre}' ha sido eliminado.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error al eliminar el salón: {e}", "danger")
+
+    return redirect(url_for("main.admin_catalogo"))
+
+
+def _guardar_modalidad(modalidad, form):
+    modalidad.sede_id = form.sede_id.data or None
+    modalidad.nombre = form.nombre.data
+    modalidad.precio = form.precio.data
+    modalidad.precio_fijo = form.precio_fijo.data
+    modalidad.min_ninos = form.min_ninos.data
+    modalidad.min_adultos = form.min_adultos.data
+    modalidad.orden = form.orden.data or 0
+    modalidad.opciones = [
+        OpcionPaquete(texto=texto, orden=i)
+        for i, texto in enumerate(_lineas(form.opciones.data))
+    ]
+    invalidar_opciones()
+
+
+@bp.route("/admin/catalogo/modalidades/nuevo", methods=["GET", "POST"])
+@login_required
+@admin_required
+def nueva_modalidad():
+    form = ModalidadForm()
+    _choices_sede_catalogo(form)
+    if form.validate_on_submit():
+        try:
+            modalidad = Modalidad()
+            _guardar_modalidad(modalidad, form)
+            db.session.add(modalidad)
+            db.session.commit()
+            flash(f"Modalidad '{modalidad.nombre}' creada.", "success")
+            return redirect(url_for("main.admin_catalogo"))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error: La modalidad ya existe en esa sede. {e}", "danger")
+    return render_template(
+        "admin/gestionar_modalidad.html", title="Nueva Modalidad", form=form
+    )
+
+
+@bp.route("/admin/catalogo/modalidades/editar/<int:id>", methods=["GET", "POST"])
+@login_required
+@admin_required
+def editar_modalidad(id):
+    modalidad = Modalidad.query.get_or_404(id)
+    form = ModalidadForm(obj=modalidad)
+    _choices_sede_catalogo(form)
+    if request.method == "GET":
+        form.sede_id.data = modalidad.sede_id or 0
+        form.opciones.data = "\n".join(o.texto for o in modalidad.opciones)
+
+    if form.validate_on_submit():
+        try:
+            _guardar_modalidad(modalidad, form)
+            db.session.commit()
+            flash(f"Modalidad '{modalidad.nombre}' actualizada.", "info")
+            return redirect(url_for("main.admin_catalogo"))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error al actualizar la modalidad. {e}", "danger")
+    return render_template(
+        "admin/gestionar_modalidad.html", title="Editar Modalidad", form=form
+    )
+
+
+@bp.route("/admin/catalogo/modalidades/eliminar/<int:id>", methods=["POST"])
+@login_required
+@admin_required
+def eliminar_modalidad(id):
+    """Elimina una modalidad y sus opciones (solo por POST)."""
+    modalidad = Modalidad.query.get_or_404(id)
+    try:
+        nombre = modalidad.nombre
+        db.session.delete(modalidad)
+        invalidar_opciones()
+        db.session.commit()
+        flash(f"Modalidad '{nombre}' ha sido eliminada.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error al eliminar la modalidad: {e}", "danger")
+
+    return redirect(url_for("main.admin_catalogo"))
+
+
 # ==========================================================
 # === RUTAS DEL PANEL DE ADMIN (USUARIOS) ===
 # ==========================================================
@@ -383,7 +670,7 @@ def nuevo_usuario():
     form = UserForm()
     # Llenar el select de Sedes
     form.sede_id.choices = [
-        (s.id, f"{s.nombre} ({s.prefijo})") for s in Sede.query.all()
+        (s.id, f"{s.nombre} ({s.prefijo})") for s in listar_sedes()
     ]
 
     if form.validate_on_submit():
@@ -427,7 +714,7 @@ def editar_usuario(id):
     user = User.query.get_or_404(id)
     form = UserForm(obj=user)
     form.sede_id.choices = [
-        (s.id, f"{s.nombre} ({s.prefijo})") for s in Sede.query.all()
+        (s.id, f"{s.nombre} ({s.prefijo})") for s in listar_sedes()
     ]
 
     if form.validate_on_submit():
@@ -440,6 +727,8 @@ def editar_usuario(id):
             if form.password.data:
                 user.set_password(form.password.data)
 
+            # Vence las sesiones abiertas del usuario (se recargan de la base)
+            invalidar_usuario(user)
             db.session.commit()
             flash(f"Usuario {user.username} actualizado.", "info")
             return redirect(url_for("main.admin_usuarios"))
@@ -463,6 +752,7 @@ def eliminar_usuario(id):
         return redirect(url_for("main.admin_usuarios"))
 
     user = User.query.get_or_404(id)
+    invalidar_usuario(user)
     db.session.delete(user)
     db.session.commit()
     flash(f"Usuario {user.username} eliminado.", "danger")
@@ -479,6 +769,7 @@ def reportes():
 @bp.route("/reportes/general")
 @login_required
 @admin_required
+@usar_replica
 def reportes_general():
     """Reporte General (KPIs, Gráficos Mensuales y Deudores)."""
 
@@ -497,78 +788,37 @@ def reportes_general():
             return redirect(url_for("main.index"))
         filtro_sede_id = current_user.sede.id
 
-    # 2. KPIs (Total Ventas, Ingresos, Cantidad)
-    query_reservas = db.select(func.sum(Reservation.total))
-    query_pagos = db.select(func.sum(Payment.monto))
-    query_count = db.select(func.count(Reservation.id))
-
-    if filtro_sede_id:
-        query_reservas = query_reservas.where(Reservation.sede_id == filtro_sede_id)
-        query_pagos = query_pagos.join(Reservation).where(
-            Reservation.sede_id == filtro_sede_id
-        )
-        query_count = query_count.where(Reservation.sede_id == filtro_sede_id)
-
-    total_ventas = db.session.scalar(query_reservas) or 0
-    total_ingresos = db.session.scalar(query_pagos) or 0
-    total_reservas = db.session.scalar(query_count) or 0
-    por_cobrar = total_ventas - total_ingresos
-
-    # 3. GRÁFICO BARRAS (Ventas x Mes)
+    # 2. KPIs (Total Ventas, Ingresos, Cantidad) y 3. GRÁFICO BARRAS (Ventas x Mes)
+    #    en una sola consulta sobre los resúmenes diarios
     anio_actual = datetime.now().year
-    query_chart = db.select(
-        func.extract("month", Reservation.fecha_celebracion).label("mes"),
-        func.sum(Reservation.total).label("total"),
-    ).where(func.extract("year", Reservation.fecha_celebracion) == anio_actual)
-
-    if filtro_sede_id:
-        query_chart = query_chart.where(Reservation.sede_id == filtro_sede_id)
-
-    resultados_chart = db.session.execute(query_chart.group_by("mes")).all()
-    datos_grafico_meses = [0] * 12
-    for mes, total in resultados_chart:
-        datos_grafico_meses[int(mes) - 1] = float(total)
-
-    # 4. LISTA DE DEUDORES
-    query_deudores = (
-        db.select(Reservation).order_by(Reservation.fecha_celebracion.desc()).limit(50)
+    kpis = kpis_generales(anio_actual, filtro_sede_id)
+
+    # 4. LISTA DE DEUDORES (paginada, toda la historia)
+    orden_deudores = request.args.get("orden_deudores", "fecha")
+    pagina_deudores = get_deudores(
+        sede_id=filtro_sede_id,
+        orden=orden_deudores,
+        limite=10,
+        cursor=request.args.get("cursor_deudores"),
     )
-    if filtro_sede_id:
-        query_deudores = query_deudores.where(Reservation.sede_id == filtro_sede_id)
-
-    posibles_deudores = db.session.scalars(query_deudores).all()
-    lista_deudores = []
-
-    for r in posibles_deudores:
-        pagado = sum(p.monto for p in r.payments)
-        deuda = r.total - pagado
-        if deuda > 0:
-            lista_deudores.append(
-                {
-                    "codigo": r.codigo_reserva,
-                    "cliente": r.nombre_padres,
-                    "fecha": r.fecha_celebracion,
-                    "deuda": deuda,
-                }
-            )
-
-    lista_deudores = lista_deudores[:10]
 
     # 5. PREPARAR LISTA DE SEDES (PARA EL DROPDOWN DE ADMIN)
     all_sedes = []
     if current_user.is_admin:
-        all_sedes = Sede.query.order_by(Sede.nombre).all()
+        all_sedes = listar_sedes()
 
     return render_template(
         "reportes/general.html",
         title="Reportes - General",
-        total_ventas=total_ventas,
-        total_ingresos=total_ingresos,
-        por_cobrar=por_cobrar,
-        total_reservas=total_reservas,
-        datos_grafico=datos_grafico_meses,
+        total_ventas=kpis["total_ventas"],
+        total_ingresos=kpis["total_cobrado"],
+        por_cobrar=kpis["por_cobrar"],
+        total_reservas=kpis["total_reservas"],
+        datos_grafico=kpis["ventas_por_mes"],
         anio_actual=anio_actual,
-        deudores=lista_deudores,
+        deudores=pagina_deudores.items,
+        deudores_siguiente=pagina_deudores.next_cursor,
+        orden_deudores=orden_deudores,
         # Nuevas variables para el filtro
         sedes=all_sedes,
         sede_actual_id=filtro_sede_id,
@@ -578,6 +828,7 @@ def reportes_general():
 @bp.route("/reportes/ventas")
 @login_required
 @admin_required
+@usar_replica
 def reportes_ventas():
     """Reporte Detallado de Ventas (Tabla)."""
 
@@ -594,10 +845,12 @@ def reportes_ventas():
     else:
         filtro_sede_id = current_user.sede.id if current_user.sede else None
 
-    # 2. Consulta
+    # 2. Consulta (días completos, igual que el total del resumen diario)
+    desde, hasta = _parse_fecha(fecha_inicio), _parse_fecha(fecha_fin)
     query = (
         db.select(Reservation)
-        .filter(Reservation.fecha_celebracion.between(fecha_inicio, fecha_fin))
+        .options(*load_options(Reservation, "list"))
+        .filter(Reservation.fecha_dia.between(desde, hasta))
         .order_by(Reservation.fecha_celebracion.desc())
     )
 
@@ -605,11 +858,11 @@ def reportes_ventas():
         query = query.filter(Reservation.sede_id == filtro_sede_id)
 
     ventas = db.session.scalars(query).all()
-    total_periodo = sum(r.total for r in ventas)
+    total_periodo = total_ventas_periodo(desde, hasta, filtro_sede_id)
 
     all_sedes = []
     if current_user.is_admin:
-        all_sedes = Sede.query.order_by(Sede.nombre).all()
+        all_sedes = listar_sedes()
 
     return render_template(
         "reportes/ventas.html",
@@ -626,6 +879,7 @@ def reportes_ventas():
 @bp.route("/reportes/productos")
 @login_required
 @admin_required
+@usar_replica
 def reportes_productos():
     """Reporte de Productos (Gráfico Pastel)."""
 
@@ -637,25 +891,16 @@ def reportes_productos():
     else:
         filtro_sede_id = current_user.sede.id if current_user.sede else None
 
-    # Consulta agrupada por Paquete
-    query = db.select(Reservation.paquete, func.count(Reservation.id)).group_by(
-        Reservation.paquete
-    )
-    if filtro_sede_id:
-        query = query.where(Reservation.sede_id == filtro_sede_id)
-
-    resultados = db.session.execute(query).all()
-
+    # Cantidad de reservas por Paquete (desde los resúmenes diarios)
     labels = []
     data = []
-    for nombre, cantidad in resultados:
-        if nombre:
-            labels.append(nombre)
-            data.append(cantidad)
+    for nombre, cantidad in reservas_por_paquete(filtro_sede_id):
+        labels.append(nombre)
+        data.append(cantidad)
 
     all_sedes = []
     if current_user.is_admin:
-        all_sedes = Sede.query.order_by(Sede.nombre).all()
+        all_sedes = listar_sedes()
 
     return render_template(
         "reportes/productos.html",
@@ -668,15 +913,16 @@ def reportes_productos():
     )
 
 
-@bp.route("/reportes/exportar_excel")
-@login_required
-@admin_required
-def exportar_excel():
-    """Exportar a Excel (Respetando filtros)."""
-
-    # Leemos los mismos filtros que en "Ventas Detalladas"
+def _filtros_exportacion():
+    """
+    Lee los mismos filtros que en "Ventas Detalladas" (fechas y sede). Las
+    fechas vuelven como date; lanza ValueError si alguna no es YYYY-MM-DD.
+    """
     fecha_inicio = request.args.get("inicio")
     fecha_fin = request.args.get("fin")
+    desde, hasta = _parse_fecha(fecha_inicio), _parse_fecha(fecha_fin)
+    if (fecha_inicio and not desde) or (fecha_fin and not hasta):
+        raise ValueError("Formato de fecha inválido. Usar YYYY-MM-DD.")
     sede_filtro_id = request.args.get("sede_filtro", type=int)
 
     filtro_sede_id = None
@@ -685,58 +931,44 @@ def exportar_excel():
     else:
         filtro_sede_id = current_user.sede.id if current_user.sede else None
 
-    query = db.select(Reservation).order_by(Reservation.fecha_celebracion.desc())
+    return desde, hasta, filtro_sede_id
 
-    if fecha_inicio and fecha_fin:
-        query = query.filter(
-            Reservation.fecha_celebracion.between(fecha_inicio, fecha_fin)
-        )
 
-    if filtro_sede_id:
-        query = query.where(Reservation.sede_id == filtro_sede_id)
-
-    reservas = db.session.scalars(query).all()
-
-    si = StringIO()
-    cw = csv.writer(si)
-    cw.writerow(
-        [
-            "Codigo",
-            "Fecha",
-            "Cliente",
-            "DNI",
-            "Telefono",
-            "Modalidad",
-            "Salon",
-            "Total",
-            "Pagado",
-            "Deuda",
-            "Estado",
-        ]
-    )
-
-    for r in reservas:
-        pagado = sum(p.monto for p in r.payments)
-        deuda = r.total - pagado
-        cw.writerow(
-            [
-                r.codigo_reserva,
-                r.fecha_celebracion.strftime("%d/%m/%Y"),
-                r.nombre_padres,
-                r.dni_padres,
-                r.telefono,
-                r.modalidad,
-                r.salon,
-                f"{r.total:.2f}",
-                f"{pagado:.2f}",
-                f"{deuda:.2f}",
-                r.estado,
-            ]
-        )
-
-    output = make_response(si.getvalue())
+def _respuesta_exportacion(entidad, formato, nombre=None):
+    try:
+        fecha_inicio, fecha_fin, filtro_sede_id = _filtros_exportacion()
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("main.reportes_ventas", **request.args))
+    contenido = exportar(entidad, formato, fecha_inicio, fecha_fin, filtro_sede_id)
+    mimetype, extension = FORMATOS[formato]
+
+    output = Response(stream_with_context(contenido), mimetype=mimetype)
+    nombre = nombre or entidad
     output.headers["Content-Disposition"] = (
-        f"attachment; filename=reporte_{datetime.now().strftime('%Y%m%d')}.csv"
+        f"attachment; filename={nombre}_{datetime.now().strftime('%Y%m%d')}"
+        f".{extension}"
     )
-    output.headers["Content-type"] = "text/csv"
+    # Evitar que un proxy (ej: nginx) acumule la respuesta antes de enviarla
+    output.headers["X-Accel-Buffering"] = "no"
     return output
+
+
+@bp.route("/reportes/exportar_excel")
+@login_required
+@admin_required
+@usar_replica
+def exportar_excel():
+    """Exportar reservas a CSV (Respetando filtros)."""
+    return _respuesta_exportacion("reservas", "csv", nombre="reporte")
+
+
+@bp.route("/reportes/exportar/<entidad>.<formato>")
+@login_required
+@admin_required
+@usar_replica
+def exportar_reporte(entidad, formato):
+    """Exportar reservas, abonos o deudores en CSV, XLSX o JSON Lines."""
+    if entidad not in ENTIDADES or formato not in FORMATOS:
+        abort(404)
+    return _respuesta_exportacion(entidad, formato)
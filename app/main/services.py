@@ -1,7 +1,106 @@
-from datetime import datetime
+import base64
+import binascii
+import json
+import threading
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only, raiseload
 
 from app import db
-from app.models import Payment, Reservation
+from app.main.calendario import invalidar_mes
+from app.main.rollups import registrar_abono
+from app.models import Payment, Reservation, ReservationSequence, User
+
+# --- Paginación (keyset) ---
+
+# Resultado paginado: items de la página, cursor de la siguiente (o None) y
+# total de filas (solo si se pidió contarlas).
+Page = namedtuple("Page", ["items", "next_cursor", "total"])
+
+
+def encode_cursor(*valores):
+    """Cursor opaco para la paginación keyset (valores de orden de la última fila)."""
+    crudo = json.dumps(
+        [v.isoformat() if hasattr(v, "isoformat") else str(v) for v in valores]
+    )
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Devuelve la lista de valores del cursor, o None si no hay o es inválido."""
+    if not cursor:
+        return None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, binascii.Error):
+        return None
+    return valores if isinstance(valores, list) else None
+
+
+# --- Perfiles de Carga (evitar N+1) ---
+# Cada vista pide un perfil con nombre y el servicio aplica las opciones de
+# carga que esa vista necesita, así la cantidad de consultas no depende de
+# cuántas filas se muestren.
+#   "list":   solo las columnas que muestran las tablas + relaciones usadas.
+#   "detail": la fila completa con sus relaciones en la misma consulta.
+#   "export": columnas del reporte; cualquier relación no prevista falla.
+
+_COLUMNAS_LISTA_RESERVA = (
+    Reservation.id,
+    Reservation.codigo_reserva,
+    Reservation.fecha_celebracion,
+    Reservation.nombre_padres,
+    Reservation.nombre_cumpleanero,
+    Reservation.modalidad,
+    Reservation.salon,
+    Reservation.horario,
+    Reservation.estado,
+    Reservation.total,
+    Reservation.saldo,
+)
+
+_PERFILES_CARGA = {
+    Reservation: {
+        "list": [load_only(*_COLUMNAS_LISTA_RESERVA)],
+        "detail": [joinedload(Reservation.sede), joinedload(Reservation.propietario)],
+        "export": [
+            load_only(
+                *_COLUMNAS_LISTA_RESERVA,
+                Reservation.dni_padres,
+                Reservation.telefono,
+                Reservation.total_abonado,
+            ),
+            raiseload("*"),
+        ],
+    },
+    Payment: {
+        "list": [joinedload(Payment.propietario).load_only(User.username)],
+        "detail": [
+            joinedload(Payment.propietario),
+            joinedload(Payment.reservation),
+        ],
+        "export": [
+            joinedload(Payment.propietario).load_only(User.username),
+            raiseload("*"),
+        ],
+    },
+}
+
+
+def load_options(modelo, carga):
+    """Opciones de carga del perfil `carga` para `modelo` (None = sin cambios)."""
+    if carga is None:
+        return []
+    try:
+        return _PERFILES_CARGA[modelo][carga]
+    except KeyError:
+        raise ValueError(f"Perfil de carga desconocido: {carga}")
+
 
 # --- Servicios de Reservas ---
 
@@ -14,12 +113,13 @@ def generate_reservation_code():
     return f"L{new_id:06d}"
 
 
-def get_all_reservations(estado=None, sede_id=None):
+def get_all_reservations(estado=None, sede_id=None, carga=None):
     """
     Obtiene todas las reservas.
     Si sede_id es None, ignora el filtro de sede (trae todas).
+    `carga` es el perfil de carga a aplicar ("list", "detail", "export").
     """
-    query = db.select(Reservation)
+    query = db.select(Reservation).options(*load_options(Reservation, carga))
 
     if estado:
         query = query.where(Reservation.estado == estado)
@@ -33,12 +133,12 @@ def get_all_reservations(estado=None, sede_id=None):
     return db.session.scalars(query).all()
 
 
-def get_reservations_by_date_range(fecha_desde, fecha_hasta, sede_id=None):
+def get_reservations_by_date_range(fecha_desde, fecha_hasta, sede_id=None, carga=None):
     """
     Obtiene reservas en un rango de fechas.
     Si sede_id es None, ignora el filtro de sede.
     """
-    query = db.select(Reservation)
+    query = db.select(Reservation).options(*load_options(Reservation, carga))
 
     # 1. Filtros de Fecha (Siempre se aplican)
     query = query.where(
@@ -56,6 +156,218 @@ def get_reservations_by_date_range(fecha_desde, fecha_hasta, sede_id=None):
     return db.session.scalars(query).all()
 
 
+def _filtro_keyset(columnas, cursor, convertir):
+    """
+    Condición "después de la última fila" para la paginación keyset en orden
+    ascendente: (col1, col2) > (valor1, valor2), escrita de forma portable.
+    """
+    valores = decode_cursor(cursor)
+    if not valores or len(valores) != len(columnas):
+        return None
+    try:
+        valores = [conv(v) for conv, v in zip(convertir, valores)]
+    except (ValueError, ArithmeticError):
+        return None
+
+    (col1, col2), (val1, val2) = columnas, valores
+    return db.or_(col1 > val1, db.and_(col1 == val1, col2 > val2))
+
+
+def _paginar(query, columnas_orden, limite, cursor, convertir, contar, filas=False):
+    """
+    Aplica cursor, orden y límite a `query` y arma la Page resultante. Con
+    filas=True los items son las filas (Row) de un select de columnas.
+    """
+    total = None
+    if contar:
+        total = db.session.scalar(
+            db.select(db.func.count()).select_from(query.order_by(None).subquery())
+        )
+
+    condicion = _filtro_keyset(columnas_orden, cursor, convertir)
+    if condicion is not None:
+        query = query.where(condicion)
+
+    query = query.order_by(*[c.asc() for c in columnas_orden]).limit(limite + 1)
+    if filas:
+        items = db.session.execute(query).all()
+    else:
+        items = db.session.scalars(query).all()
+
+    siguiente = None
+    if len(items) > limite:
+        items = items[:limite]
+        ultimo = items[-1]
+        siguiente = encode_cursor(*[getattr(ultimo, c.key) for c in columnas_orden])
+
+    return Page(items, siguiente, total)
+
+
+def paginate_reservations_by_date_range(
+    fecha_desde,
+    fecha_hasta,
+    sede_id=None,
+    limite=50,
+    cursor=None,
+    contar=False,
+    carga="list",
+):
+    """
+    Como get_reservations_by_date_range, pero devuelve una página (Page) de
+    `limite` reservas ordenadas por (fecha_celebracion, id). Para la página
+    siguiente se pasa el `next_cursor` de la anterior.
+    """
+    query = db.select(Reservation).options(*load_options(Reservation, carga))
+    query = query.where(
+        Reservation.fecha_celebracion >= fecha_desde,
+        Reservation.fecha_celebracion <= fecha_hasta,
+    )
+    if sede_id:
+        query = query.where(Reservation.sede_id == sede_id)
+
+    return _paginar(
+        query,
+        [Reservation.fecha_celebracion, Reservation.id],
+        limite,
+        cursor,
+        [datetime.fromisoformat, int],
+        contar,
+    )
+
+
+def get_deudores(sede_id=None, orden="fecha", limite=10, cursor=None, contar=False):
+    """
+    Reservas con saldo pendiente, en una sola consulta paginada por keyset.
+    orden="deuda" ordena por monto adeudado; orden="fecha" por fecha del evento
+    (más reciente primero). Si sede_id es None, trae todas las sedes.
+    """
+    if orden == "deuda":
+        columna_orden = Reservation.saldo
+    else:
+        orden = "fecha"
+        columna_orden = Reservation.fecha_celebracion
+
+    filtros = [Reservation.saldo > 0]
+    if sede_id:
+        filtros.append(Reservation.sede_id == sede_id)
+
+    query = db.select(
+        Reservation.id,
+        Reservation.codigo_reserva,
+        Reservation.nombre_padres,
+        Reservation.fecha_celebracion,
+        Reservation.saldo,
+    ).where(*filtros)
+
+    # Continuar después de la última fila de la página anterior
+    valores = decode_cursor(cursor)
+    if valores and len(valores) == 2:
+        try:
+            ultimo_orden = (
+                Decimal(valores[0])
+                if orden == "deuda"
+                else datetime.fromisoformat(valores[0])
+            )
+            ultimo_id = int(valores[1])
+        except (ValueError, ArithmeticError):
+            pass
+        else:
+            query = query.where(
+                db.or_(
+                    columna_orden < ultimo_orden,
+                    db.and_(columna_orden == ultimo_orden, Reservation.id < ultimo_id),
+                )
+            )
+
+    query = query.order_by(columna_orden.desc(), Reservation.id.desc()).limit(
+        limite + 1
+    )
+    filas = db.session.execute(query).all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = encode_cursor(
+            ultima.saldo if orden == "deuda" else ultima.fecha_celebracion, ultima.id
+        )
+
+    items = [
+        {
+            "id": f.id,
+            "codigo": f.codigo_reserva,
+            "cliente": f.nombre_padres,
+            "fecha": f.fecha_celebracion,
+            "deuda": f.saldo,
+        }
+        for f in filas
+    ]
+
+    total = None
+    if contar:
+        total = db.session.scalar(db.select(db.func.count(Reservation.id)).where(*filtros))
+
+    return Page(items, siguiente, total)
+
+
+def iter_reservations_export(fecha_inicio=None, fecha_fin=None, sede_id=None, chunk=1000):
+    """
+    Recorre las reservas a exportar en bloques de `chunk` filas usando un
+    cursor del lado del servidor (no carga todo en memoria). Cada fila trae
+    solo las columnas del reporte, con lo abonado ya calculado en la base.
+    """
+    query = db.select(
+        Reservation.codigo_reserva,
+        Reservation.fecha_celebracion,
+        Reservation.nombre_padres,
+        Reservation.dni_padres,
+        Reservation.telefono,
+        Reservation.modalidad,
+        Reservation.salon,
+        Reservation.total,
+        Reservation.total_abonado,
+        Reservation.saldo,
+        Reservation.estado,
+    ).order_by(Reservation.fecha_celebracion.desc(), Reservation.id.desc())
+
+    if fecha_inicio and fecha_fin:
+        # Días completos (fechas), igual que el reporte de ventas
+        query = query.where(Reservation.fecha_dia.between(fecha_inicio, fecha_fin))
+
+    if sede_id:
+        query = query.where(Reservation.sede_id == sede_id)
+
+    resultado = db.session.execute(query.execution_options(yield_per=chunk))
+    for particion in resultado.partitions():
+        yield particion
+
+
+def iter_debtors_export(fecha_inicio=None, fecha_fin=None, sede_id=None, chunk=1000):
+    """Igual que iter_reservations_export, pero solo reservas con saldo pendiente."""
+    query = db.select(
+        Reservation.codigo_reserva,
+        Reservation.fecha_celebracion,
+        Reservation.nombre_padres,
+        Reservation.telefono,
+        Reservation.correo,
+        Reservation.total,
+        Reservation.total_abonado,
+        Reservation.saldo,
+        Reservation.estado,
+    ).where(Reservation.saldo > 0)
+
+    if fecha_inicio and fecha_fin:
+        query = query.where(Reservation.fecha_dia.between(fecha_inicio, fecha_fin))
+
+    if sede_id:
+        query = query.where(Reservation.sede_id == sede_id)
+
+    query = query.order_by(Reservation.fecha_celebracion.desc(), Reservation.id.desc())
+    resultado = db.session.execute(query.execution_options(yield_per=chunk))
+    for particion in resultado.partitions():
+        yield particion
+
+
 def create_reservation(form_data, user_id):
     # Nota: Parece que ahora usas la lógica directa en routes.py
     # Mantengo esto por compatibilidad, pero asegúrate de que use la sede
@@ -65,12 +377,16 @@ def create_reservation(form_data, user_id):
 # --- Servicios de Abonos ---
 
 
-def get_payments_by_date_range(fecha_desde, fecha_hasta, sede_id=None):
+def get_payments_by_date_range(fecha_desde, fecha_hasta, sede_id=None, carga=None):
     """
     Obtiene abonos en un rango de fechas.
     Si sede_id es None, ignora el filtro de sede.
     """
-    query = db.select(Payment).join(Reservation)
+    query = (
+        db.select(Payment)
+        .join(Reservation)
+        .options(*load_options(Payment, carga))
+    )
 
     # 1. Filtros de Fecha
     query = query.where(
@@ -88,15 +404,272 @@ def get_payments_by_date_range(fecha_desde, fecha_hasta, sede_id=None):
     return db.session.scalars(query).all()
 
 
+def iter_payments_export(fecha_inicio=None, fecha_fin=None, sede_id=None, chunk=1000):
+    """
+    Recorre los abonos a exportar en bloques de `chunk` filas (cursor del lado
+    del servidor), con el usuario que lo registró resuelto en la misma consulta.
+    """
+    query = (
+        db.select(
+            Payment.codigo_reserva_str,
+            Payment.fecha_abono,
+            Payment.metodo_pago,
+            Payment.monto,
+            Payment.referencia,
+            Payment.modalidad,
+            User.username,
+        )
+        .join(Reservation, Payment.reservation_id == Reservation.id)
+        .outerjoin(User, Payment.user_id == User.id)
+    )
+
+    if fecha_inicio and fecha_fin:
+        query = query.where(Payment.fecha_abono.between(fecha_inicio, fecha_fin))
+
+    if sede_id:
+        query = query.where(Reservation.sede_id == sede_id)
+
+    query = query.order_by(Payment.fecha_abono.desc(), Payment.id.desc())
+    resultado = db.session.execute(query.execution_options(yield_per=chunk))
+    for particion in resultado.partitions():
+        yield particion
+
+
+def paginate_payments_by_date_range(
+    fecha_desde,
+    fecha_hasta,
+    sede_id=None,
+    limite=50,
+    cursor=None,
+    contar=False,
+    carga="list",
+):
+    """
+    Como get_payments_by_date_range, pero devuelve una página (Page) de
+    `limite` abonos ordenados por (fecha_abono, id).
+    """
+    query = db.select(Payment).options(*load_options(Payment, carga))
+    query = query.where(
+        Payment.fecha_abono >= fecha_desde,
+        Payment.fecha_abono <= fecha_hasta,
+    )
+    if sede_id:
+        query = query.join(Reservation).where(Reservation.sede_id == sede_id)
+
+    return _paginar(
+        query,
+        [Payment.fecha_abono, Payment.id],
+        limite,
+        cursor,
+        [date.fromisoformat, int],
+        contar,
+    )
+
+
+def get_reservation_detail(reservation_id):
+    """
+    Reserva con el resumen de sus abonos (suma, cantidad, último id y última
+    modificación) calculado en la misma consulta. None si no existe.
+    """
+    abonos = (
+        db.select(
+            db.func.coalesce(db.func.sum(Payment.monto), 0).label("abonado"),
+            db.func.count(Payment.id).label("abonos"),
+            db.func.max(Payment.id).label("ultimo_abono"),
+            db.func.max(Payment.updated_at).label("abonos_actualizados"),
+        )
+        .where(Payment.reservation_id == reservation_id)
+        .subquery()
+    )
+    query = (
+        db.select(Reservation.__table__, abonos)
+        .select_from(Reservation)
+        .join(abonos, db.true())
+        .where(Reservation.id == reservation_id)
+    )
+    return db.session.execute(query).one_or_none()
+
+
+# --- Listados de la API (solo las columnas pedidas) ---
+# Campos que se pueden pedir con ?fields= en /api/reservas y /api/abonos. Las
+# columnas Text (adicionales, accesorios, comentarios) quedan fuera: para eso
+# está el detalle de cada reserva.
+
+CAMPOS_API_RESERVA = {
+    "id": Reservation.id,
+    "codigo": Reservation.codigo_reserva,
+    "sede_id": Reservation.sede_id,
+    "estado": Reservation.estado,
+    "fecha": Reservation.fecha_celebracion,
+    "nombre_padres": Reservation.nombre_padres,
+    "dni": Reservation.dni_padres,
+    "telefono": Reservation.telefono,
+    "correo": Reservation.correo,
+    "nombre_cumpleanero": Reservation.nombre_cumpleanero,
+    "modalidad": Reservation.modalidad,
+    "paquete": Reservation.paquete,
+    "salon": Reservation.salon,
+    "horario": Reservation.horario,
+    "ninos": Reservation.ninos,
+    "adultos": Reservation.adultos,
+    "total": Reservation.total,
+    "a_cuenta": Reservation.total_abonado,
+    "saldo": Reservation.saldo,
+    "created_at": Reservation.created_at,
+    "updated_at": Reservation.updated_at,
+}
+CAMPOS_API_RESERVA_DEFECTO = (
+    "id",
+    "codigo",
+    "fecha",
+    "nombre_padres",
+    "estado",
+    "total",
+    "saldo",
+)
+
+CAMPOS_API_ABONO = {
+    "id": Payment.id,
+    "reservation_id": Payment.reservation_id,
+    "codigo": Payment.codigo_reserva_str,
+    "sede_id": Reservation.sede_id,
+    "fecha": Payment.fecha_abono,
+    "metodo_pago": Payment.metodo_pago,
+    "monto": Payment.monto,
+    "referencia": Payment.referencia,
+    "modalidad": Payment.modalidad,
+    "created_at": Payment.created_at,
+    "updated_at": Payment.updated_at,
+}
+CAMPOS_API_ABONO_DEFECTO = ("id", "codigo", "fecha", "metodo_pago", "monto")
+
+
+def _a_float(valor):
+    return None if valor is None else float(valor)
+
+
+def _a_iso(valor):
+    return None if valor is None else valor.isoformat()
+
+
+def _conversor(columna):
+    """Cómo pasar el valor de la columna a JSON (None = tal cual)."""
+    if isinstance(columna.type, db.Numeric):
+        return _a_float
+    if isinstance(columna.type, (db.Date, db.DateTime)):
+        return _a_iso
+    return None
+
+
+def _seleccion(catalogo, campos, columnas_orden):
+    """
+    Columnas a consultar (las pedidas + las del orden, que necesita el cursor)
+    y, por cada campo, su posición en la fila y su conversor.
+    """
+    desconocidos = [c for c in campos if c not in catalogo]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}")
+
+    columnas = [catalogo[c] for c in campos]
+    claves = {c.key for c in columnas}
+    columnas += [c for c in columnas_orden if c.key not in claves]
+    plan = [(campo, i, _conversor(catalogo[campo])) for i, campo in enumerate(campos)]
+    return columnas, plan
+
+
+def _serializar(filas, plan):
+    """Filas -> dicts listos para json.dumps, en una sola pasada."""
+    return [
+        {campo: (conv(fila[i]) if conv else fila[i]) for campo, i, conv in plan}
+        for fila in filas
+    ]
+
+
+def listar_reservas_api(
+    campos=CAMPOS_API_RESERVA_DEFECTO,
+    sede_id=None,
+    desde=None,
+    hasta=None,
+    estado=None,
+    limite=50,
+    cursor=None,
+    contar=False,
+):
+    """
+    Página de reservas (orden fecha_celebracion, id) con solo los `campos`
+    pedidos, sin armar objetos del ORM. desde/hasta son fechas inclusivas.
+    Lanza ValueError si se pide un campo desconocido.
+    """
+    orden = [Reservation.fecha_celebracion, Reservation.id]
+    columnas, plan = _seleccion(CAMPOS_API_RESERVA, campos, orden)
+
+    query = db.select(*columnas)
+    if sede_id:
+        query = query.where(Reservation.sede_id == sede_id)
+    if desde:
+        query = query.where(Reservation.fecha_celebracion >= desde)
+    if hasta:
+        siguiente_dia = datetime.combine(hasta + timedelta(days=1), time.min)
+        query = query.where(Reservation.fecha_celebracion < siguiente_dia)
+    if estado:
+        query = query.where(Reservation.estado == estado)
+
+    pagina = _paginar(
+        query, orden, limite, cursor, [datetime.fromisoformat, int], contar, filas=True
+    )
+    return pagina._replace(items=_serializar(pagina.items, plan))
+
+
+def listar_abonos_api(
+    campos=CAMPOS_API_ABONO_DEFECTO,
+    sede_id=None,
+    desde=None,
+    hasta=None,
+    estado=None,
+    limite=50,
+    cursor=None,
+    contar=False,
+):
+    """
+    Página de abonos (orden fecha_abono, id) con solo los `campos` pedidos.
+    `estado` filtra por el estado de la reserva del abono.
+    """
+    orden = [Payment.fecha_abono, Payment.id]
+    columnas, plan = _seleccion(CAMPOS_API_ABONO, campos, orden)
+
+    query = db.select(*columnas).select_from(Payment)
+    if sede_id or estado or "sede_id" in campos:
+        query = query.join(Reservation, Payment.reservation_id == Reservation.id)
+    if sede_id:
+        query = query.where(Reservation.sede_id == sede_id)
+    if estado:
+        query = query.where(Reservation.estado == estado)
+    if desde:
+        query = query.where(Payment.fecha_abono >= desde)
+    if hasta:
+        query = query.where(Payment.fecha_abono <= hasta)
+
+    pagina = _paginar(
+        query, orden, limite, cursor, [date.fromisoformat, int], contar, filas=True
+    )
+    return pagina._replace(items=_serializar(pagina.items, plan))
+
+
 def create_payment(form_data, user_id):
     reservation_id = form_data["reservation_id"]
-    reservation = db.session.get(Reservation, reservation_id)
+    # Bloqueamos la reserva para que dos abonos simultáneos no pisen el saldo
+    reservation = db.session.get(Reservation, reservation_id, with_for_update=True)
 
     if not reservation:
         raise Exception(f"No se encontró la reserva con ID {reservation_id}")
 
-    # Opcional: Validar estado si es necesario
-    # if reservation.estado != "Reservado": ...
+    # Abonar pasaría la reserva a "Abonado" sin volver a tomar su turno, que se
+    # liberó al cancelarla: primero hay que reactivarla desde la edición
+    if reservation.estado == "Cancelado":
+        raise Exception(
+            f"La reserva {reservation.codigo_reserva} está cancelada; "
+            "reactívela antes de registrar abonos."
+        )
 
     new_payment = Payment(
         reservation_id=reservation_id,
@@ -110,39 +683,168 @@ def create_payment(form_data, user_id):
         user_id=user_id,
     )
 
-    # Actualizar estado de reserva
+    # Actualizar estado y saldo de la reserva
     reservation.estado = "Abonado"
     reservation.updated_at = datetime.utcnow()
+    reservation.aplicar_abono(new_payment.monto)
 
     db.session.add(new_payment)
     db.session.add(reservation)
+    registrar_abono(new_payment, reservation.sede_id)
+    invalidar_mes(reservation.sede_id, reservation.fecha_dia)
     db.session.commit()
     return new_payment
 
 
-def get_next_reservation_code(sede_id, prefijo):
+def update_payment(payment_id, form_data):
     """
-    Calcula el siguiente código de reserva para una SEDE específica.
-    Formato: [PREFIJO]00001 (ej: TR00001, CH00002)
+    Edita un abono existente. Si cambia el monto, ajusta el saldo de la
+    reserva con la diferencia en la misma transacción.
     """
+    payment = db.session.get(Payment, payment_id)
+    if not payment:
+        raise Exception(f"No se encontró el abono con ID {payment_id}")
+
+    reservation = db.session.get(
+        Reservation, payment.reservation_id, with_for_update=True
+    )
+
+    monto_anterior = payment.monto
+    registrar_abono(payment, reservation.sede_id, -1)
 
-    # 1. Buscar la última reserva (por ID) DE ESA SEDE
-    last_reservation = db.session.scalar(
-        db.select(Reservation)
-        .where(Reservation.sede_id == sede_id)  # <-- FILTRO POR SEDE
+    payment.metodo_pago = form_data.get("metodo_pago", payment.metodo_pago)
+    payment.monto = form_data.get("monto", payment.monto)
+    payment.referencia = form_data.get("referencia", payment.referencia)
+    payment.comentarios = form_data.get("comentarios", payment.comentarios)
+
+    reservation.aplicar_abono(payment.monto - monto_anterior)
+    reservation.updated_at = datetime.utcnow()
+    registrar_abono(payment, reservation.sede_id)
+
+    db.session.commit()
+    return payment
+
+
+def delete_payment(payment_id):
+    """Elimina un abono y descuenta su monto del saldo de la reserva."""
+    payment = db.session.get(Payment, payment_id)
+    if not payment:
+        raise Exception(f"No se encontró el abono con ID {payment_id}")
+
+    reservation = db.session.get(
+        Reservation, payment.reservation_id, with_for_update=True
+    )
+    reservation.aplicar_abono(-payment.monto)
+    reservation.updated_at = datetime.utcnow()
+    registrar_abono(payment, reservation.sede_id, -1)
+
+    db.session.delete(payment)
+    db.session.commit()
+
+
+# --- Secuencia de Códigos de Reserva ---
+
+# Bloques de números ya reservados por este worker: sede_id -> [siguiente, limite)
+_bloques_codigo = {}
+_bloques_lock = threading.Lock()
+
+
+def _format_reservation_code(prefijo, numero):
+    """Formato: [PREFIJO]00001 (ej: TR00001, CH00002)."""
+    return f"{prefijo.upper()}{str(numero).zfill(5)}"
+
+
+def _ultimo_numero_usado(conn, sede_id, prefijo):
+    """
+    Número del último código emitido en la sede, leído de las reservas.
+    Solo se usa para inicializar la secuencia de una sede que aún no la tiene.
+    """
+    ultimo_codigo = conn.scalar(
+        db.select(Reservation.codigo_reserva)
+        .where(Reservation.sede_id == sede_id)
         .order_by(Reservation.id.desc())
+        .limit(1)
     )
+    if not ultimo_codigo:
+        return 0
+    try:
+        return int(ultimo_codigo[len(prefijo) :])
+    except (ValueError, TypeError):
+        return 0
 
-    if not last_reservation:
-        next_number = 1
-    else:
-        try:
-            # 2. Extraer el número del código (ej: "TR00001" -> "00001")
-            prefix_length = len(prefijo)
-            number_part = last_reservation.codigo_reserva[prefix_length:]
-            next_number = int(number_part) + 1
-        except (ValueError, TypeError):
-            next_number = 1
-
-    # 3. Rellenar con 5 ceros
-    return f"{prefijo.upper()}{str(next_number).zfill(5)}"
+
+def reserve_code_block(sede_id, prefijo, cantidad=1):
+    """
+    Reserva `cantidad` números consecutivos en la secuencia de la sede y
+    devuelve el primero. El UPDATE atómico bloquea la fila de la sede, así que
+    dos workers nunca reciben el mismo número.
+
+    Corre en su propia transacción (ya confirmada al volver) para no retener
+    el bloqueo mientras se termina de guardar la reserva.
+    """
+    try:
+        with db.engine.begin() as conn:
+            resultado = conn.execute(
+                db.update(ReservationSequence)
+                .where(ReservationSequence.sede_id == sede_id)
+                .values(siguiente=ReservationSequence.siguiente + cantidad)
+            )
+            if resultado.rowcount:
+                siguiente = conn.scalar(
+                    db.select(ReservationSequence.siguiente).where(
+                        ReservationSequence.sede_id == sede_id
+                    )
+                )
+                return siguiente - cantidad
+
+            # Primera vez para esta sede: continuar desde el último código usado
+            inicio = _ultimo_numero_usado(conn, sede_id, prefijo) + 1
+            conn.execute(
+                db.insert(ReservationSequence).values(
+                    sede_id=sede_id, siguiente=inicio + cantidad
+                )
+            )
+            return inicio
+    except IntegrityError:
+        # Otro worker creó la secuencia al mismo tiempo: ahora ya existe
+        return reserve_code_block(sede_id, prefijo, cantidad)
+
+
+def allocate_reservation_code(sede_id, prefijo):
+    """
+    Asigna (consume) el siguiente código de reserva de la sede.
+    Usar solo al guardar una reserva; para mostrar usar get_next_reservation_code.
+    """
+    tamano_bloque = current_app.config.get("RESERVATION_CODE_BLOCK_SIZE", 1)
+
+    with _bloques_lock:
+        bloque = _bloques_codigo.get(sede_id)
+        if not bloque or bloque[0] >= bloque[1]:
+            inicio = reserve_code_block(sede_id, prefijo, tamano_bloque)
+            bloque = [inicio, inicio + tamano_bloque]
+            _bloques_codigo[sede_id] = bloque
+        numero = bloque[0]
+        bloque[0] += 1
+
+    return _format_reservation_code(prefijo, numero)
+
+
+def get_next_reservation_code(sede_id, prefijo):
+    """
+    Calcula el siguiente código de reserva para una SEDE específica, solo para
+    mostrarlo (no lo reserva). Es una lectura por clave primaria.
+    """
+    with _bloques_lock:
+        bloque = _bloques_codigo.get(sede_id)
+        if bloque and bloque[0] < bloque[1]:
+            return _format_reservation_code(prefijo, bloque[0])
+
+    siguiente = db.session.scalar(
+        db.select(ReservationSequence.siguiente).where(
+            ReservationSequence.sede_id == sede_id
+        )
+    )
+    if siguiente is None:
+        siguiente = _ultimo_numero_usado(db.session, sede_id, prefijo) + 1
+
+    return _format_reservation_code(prefijo, siguiente)
@@ -0,0 +1,183 @@
+"""
+Pico de memoria por request con tracemalloc (opcional).
+
+Para los endpoints de MEMORY_TRACE_ENDPOINTS (ej:
+"main.exportar_excel,main.exportar_reporte,main.reportes_general") se mide la
+memoria que el request llega a tener asignada por encima de la que había al
+empezar, y las líneas de código con más memoria asignada al final. En las
+exportaciones, que se envían en streaming, la medición sigue hasta que se
+termina de mandar el archivo.
+
+Cada request medido se registra en el log (pico en MB y líneas principales);
+si el pico supera MEMORY_BUDGET_MB, como warning.
+
+tracemalloc es global al proceso y su pico solo se puede reiniciar para
+todos, así que se mide un request a la vez: si llega otro request configurado
+mientras hay una medición en curso, ese no se mide (queda en el log como
+DEBUG). Con un worker de varios hilos, el pico medido incluye además lo que
+los otros requests asignaron al mismo tiempo, o sea que puede ser mayor que
+el del request, nunca menor. tracemalloc solo está encendido mientras dura
+una medición, así que el resto de los requests no paga su costo.
+
+`pico_de_memoria` y `afirmar_techo` sirven también fuera de los requests, por
+ejemplo para comprobar el consumo de un reporte con un volumen de datos dado
+(ver benchmarks/bench_memoria.py).
+"""
+
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+
+MB = 1024 * 1024
+
+# Una medición a la vez (reset_peak afecta a todo el proceso)
+_medicion = threading.Lock()
+
+
+def _iniciar_traza(esperar=True):
+    """
+    Enciende tracemalloc y devuelve la base de la medición. Sin `esperar`,
+    devuelve None si ya hay otra medición en curso.
+    """
+    if not _medicion.acquire(blocking=esperar):
+        return None
+    propia = not tracemalloc.is_tracing()
+    if propia:
+        tracemalloc.start()
+        inicio = None
+    else:
+        # Encendido desde afuera (ej: PYTHONTRACEMALLOC): comparar contra ahora
+        inicio = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    actual, _ = tracemalloc.get_traced_memory()
+    return {
+        "base": actual,
+        "inicio": inicio,
+        "propia": propia,
+        "reloj": time.perf_counter(),
+    }
+
+
+def _terminar_traza(medicion, lineas):
+    """Pico (bytes) y líneas que más memoria retienen desde el inicio."""
+    try:
+        _, pico = tracemalloc.get_traced_memory()
+        top = []
+        if lineas:
+            final = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            if medicion["inicio"] is not None:
+                estadisticas = final.compare_to(medicion["inicio"], "lineno")
+            else:
+                estadisticas = final.statistics("lineno")
+            for estadistica in estadisticas[:lineas]:
+                marco = estadistica.traceback[0]
+                tamano = getattr(estadistica, "size_diff", estadistica.size)
+                top.append(f"{marco.filename}:{marco.lineno} {tamano // 1024} KB")
+        if medicion["propia"]:
+            tracemalloc.stop()
+    finally:
+        _medicion.release()
+    return max(pico - medicion["base"], 0), top
+
+
+@contextmanager
+def pico_de_memoria(lineas=0):
+    """
+    Mide el bloque: al salir, el dict tiene "pico_mb" y (con lineas > 0) "top",
+    las líneas que más memoria retienen.
+    """
+    resultado = {}
+    medicion = _iniciar_traza()
+    try:
+        yield resultado
+    finally:
+        pico, top = _terminar_traza(medicion, lineas)
+        resultado["pico_mb"] = round(pico / MB, 2)
+        resultado["top"] = top
+
+
+def afirmar_techo(funcion, techo_mb, lineas=5):
+    """
+    Ejecuta `funcion()` y lanza AssertionError si su pico de memoria supera
+    `techo_mb`. Devuelve la medición.
+    """
+    with pico_de_memoria(lineas) as medicion:
+        funcion()
+    # Explícito: un assert desaparece con python -O
+    if medicion["pico_mb"] > techo_mb:
+        raise AssertionError(
+            f"Pico de memoria {medicion['pico_mb']} MB > techo {techo_mb} MB; "
+            f"líneas principales: {medicion['top']}"
+        )
+    return medicion
+
+
+# --- Requests ---
+
+
+def _iniciar():
+    if request.endpoint not in current_app.config["MEMORY_TRACE_ENDPOINTS"]:
+        return
+    medicion = _iniciar_traza(esperar=False)
+    if medicion is None:
+        current_app.logger.debug(
+            "Memoria del request no medida: hay otra medición en curso",
+            extra={"endpoint": request.endpoint, "ruta": request.path},
+        )
+        return
+    g._memoria = medicion
+
+
+def _registrar(app, endpoint, ruta, medicion):
+    pico, top = _terminar_traza(medicion, app.config["MEMORY_TOP_LINES"])
+    pico_mb = round(pico / MB, 2)
+    datos = {
+        "endpoint": endpoint,
+        "ruta": ruta,
+        "pico_mb": pico_mb,
+        "segundos": round(time.perf_counter() - medicion["reloj"], 3),
+        "top": top,
+    }
+    if pico_mb > app.config["MEMORY_BUDGET_MB"]:
+        app.logger.warning("Request sobre el presupuesto de memoria", extra=datos)
+    else:
+        app.logger.info("Memoria del request", extra=datos)
+
+
+def _terminar(response):
+    medicion = g.pop("_memoria", None)
+    if medicion is None:
+        return response
+    app = current_app._get_current_object()
+    endpoint, ruta = request.endpoint, request.path
+    if response.is_streamed:
+        # La exportación se arma mientras se envía: medir hasta el final
+        response.call_on_close(lambda: _registrar(app, endpoint, ruta, medicion))
+    else:
+        _registrar(app, endpoint, ruta, medicion)
+    return response
+
+
+def _descartar(error):
+    medicion = g.pop("_memoria", None)
+    if medicion is not None:
+        _terminar_traza(medicion, 0)
+
+
+def init_app(app):
+    """Registra la medición si hay endpoints configurados."""
+    endpoints = app.config.get("MEMORY_TRACE_ENDPOINTS") or ""
+    if isinstance(endpoints, str):
+        endpoints = {e.strip() for e in endpoints.split(",") if e.strip()}
+    app.config["MEMORY_TRACE_ENDPOINTS"] = frozenset(endpoints)
+    if not endpoints:
+        return
+
+    app.before_request(_iniciar)
+    app.after_request(_terminar)
+    app.teardown_request(_descartar)
@@ -0,0 +1,275 @@
+"""
+Métricas por request: consultas SQL, tiempo de SQL, de plantillas y total.
+
+- Los eventos before/after_cursor_execute de cada engine cuentan las
+  consultas del request y suman su tiempo; las señales de Flask
+  (request_started, before_render_template/template_rendered,
+  request_finished) miden la latencia y el render de plantillas.
+- Cada request agrega sus valores a histogramas por endpoint; las respuestas
+  en streaming (exportaciones), al terminar de enviarse. Con
+  METRICS_SERVER_TIMING, además responde con un header Server-Timing (db,
+  tpl, total) que se ve en las DevTools.
+- N+1: si la misma sentencia se ejecuta más de METRICS_N1_THRESHOLD veces en
+  un request, se registra un warning con el endpoint y la sentencia.
+- GET /metrics devuelve los histogramas y el estado del pool de conexiones de
+  cada bind en formato de texto de Prometheus. Solo responde con
+  "Authorization: Bearer <METRICS_TOKEN>" o a un admin logueado, salvo que
+  METRICS_PUBLIC lo abra a todos.
+
+Los valores viven en memoria del proceso: con varios workers, cada uno
+reporta los suyos (Prometheus los junta si se scrapea cada worker).
+"""
+
+import hmac
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import (
+    Response,
+    abort,
+    before_render_template,
+    current_app,
+    g,
+    has_request_context,
+    request,
+    request_finished,
+    request_started,
+    template_rendered,
+)
+from flask_login import current_user
+from sqlalchemy import event
+
+PREFIJO = "ludicus"
+
+# Límites superiores de los buckets (segundos / cantidad de consultas)
+BUCKETS_TIEMPO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMAS = {
+    "request_duration_seconds": ("Latencia total del request", BUCKETS_TIEMPO),
+    "request_sql_seconds": ("Tiempo en consultas SQL por request", BUCKETS_TIEMPO),
+    "request_template_seconds": ("Tiempo de render de plantillas", BUCKETS_TIEMPO),
+    "request_queries": ("Consultas SQL por request", BUCKETS_CONSULTAS),
+}
+
+_lock = threading.Lock()
+# {metrica: {endpoint: [conteo por bucket..., +Inf]}} y sumas por endpoint
+_buckets = {nombre: {} for nombre in HISTOGRAMAS}
+_sumas = {nombre: defaultdict(float) for nombre in HISTOGRAMAS}
+_requests = Counter()  # (endpoint, status) -> cantidad
+_n_mas_uno = Counter()  # endpoint -> requests con N+1
+
+
+def _observar(nombre, endpoint, valor):
+    limites = HISTOGRAMAS[nombre][1]
+    conteos = _buckets[nombre].get(endpoint)
+    if conteos is None:
+        conteos = _buckets[nombre][endpoint] = [0] * (len(limites) + 1)
+    for i, limite in enumerate(limites):
+        if valor <= limite:
+            conteos[i] += 1
+            break
+    else:
+        conteos[-1] += 1
+    _sumas[nombre][endpoint] += valor
+
+
+# --- Eventos de SQLAlchemy ---
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "_sql" in g:
+        conn.info.setdefault("_inicio_consulta", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and "_sql" in g):
+        return
+    inicios = conn.info.get("_inicio_consulta")
+    if not inicios:
+        return
+    sql = g._sql
+    sql["consultas"] += 1
+    sql["segundos"] += time.perf_counter() - inicios.pop()
+    sql["sentencias"][statement] += 1
+
+
+# --- Señales de Flask ---
+
+
+def _inicio_request(sender, **extra):
+    g._inicio_request = time.perf_counter()
+    g._sql = {"consultas": 0, "segundos": 0.0, "sentencias": Counter()}
+    g._plantillas = 0.0
+
+
+def _antes_de_plantilla(sender, template, context, **extra):
+    if has_request_context():
+        g._inicio_plantilla = time.perf_counter()
+
+
+def _plantilla_renderizada(sender, template, context, **extra):
+    if has_request_context() and "_inicio_plantilla" in g:
+        g._plantillas += time.perf_counter() - g.pop("_inicio_plantilla")
+
+
+def _registrar(app, endpoint, status, inicio, sql, plantillas):
+    """Agrega el request a los histogramas y avisa los N+1; devuelve la latencia."""
+    total = time.perf_counter() - inicio
+
+    umbral = app.config["METRICS_N1_THRESHOLD"]
+    repetidas = [(s, n) for s, n in sql["sentencias"].items() if n > umbral]
+    for sentencia, veces in repetidas:
+        app.logger.warning(
+            "Posible N+1: sentencia repetida en un request",
+            extra={"endpoint": endpoint, "veces": veces, "sentencia": sentencia},
+        )
+
+    with _lock:
+        _observar("request_duration_seconds", endpoint, total)
+        _observar("request_sql_seconds", endpoint, sql["segundos"])
+        _observar("request_template_seconds", endpoint, plantillas)
+        _observar("request_queries", endpoint, sql["consultas"])
+        _requests[(endpoint, status)] += 1
+        if repetidas:
+            _n_mas_uno[endpoint] += 1
+    return total
+
+
+def _fin_request(sender, response, **extra):
+    if "_inicio_request" not in g or request.endpoint == "metricas":
+        return
+    app = current_app._get_current_object()
+    sql = g._sql
+    datos = (
+        app,
+        request.endpoint or "sin_endpoint",
+        response.status_code,
+        g._inicio_request,
+        sql,
+        g._plantillas,
+    )
+    if response.is_streamed:
+        # Las exportaciones consultan la base mientras se envían: se registran
+        # al cerrar la respuesta (los headers ya salieron, sin Server-Timing)
+        response.call_on_close(lambda: _registrar(*datos))
+        return
+
+    total = _registrar(*datos)
+    if app.config["METRICS_SERVER_TIMING"]:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={sql["segundos"] * 1000:.1f};desc="{sql["consultas"]} consultas"'
+            f", tpl;dur={g._plantillas * 1000:.1f}, total;dur={total * 1000:.1f}",
+        )
+
+
+# --- Exportación ---
+
+
+def _etiquetas(**valores):
+    partes = []
+    for clave, valor in valores.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _estado_pools():
+    """[(bind, métrica, valor)] del pool de cada engine (si es un QueuePool)."""
+    from app import db
+
+    filas = []
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        nombre = bind or "principal"
+        filas += [
+            (nombre, "db_pool_size", pool.size()),
+            (nombre, "db_pool_checked_out", pool.checkedout()),
+            (nombre, "db_pool_checked_in", pool.checkedin()),
+            (nombre, "db_pool_overflow", pool.overflow()),
+        ]
+    return filas
+
+
+def exportar():
+    """Texto en formato de exposición de Prometheus."""
+    from app import logs
+
+    lineas = []
+    with _lock:
+        for nombre, (ayuda, limites) in HISTOGRAMAS.items():
+            metrica = f"{PREFIJO}_{nombre}"
+            lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} histogram"]
+            for endpoint, conteos in sorted(_buckets[nombre].items()):
+                acumulado = 0
+                for limite, conteo in zip(limites + ("+Inf",), conteos):
+                    acumulado += conteo
+                    etiquetas = _etiquetas(endpoint=endpoint, le=limite)
+                    lineas.append(f"{metrica}_bucket{etiquetas} {acumulado}")
+                etiquetas = _etiquetas(endpoint=endpoint)
+                lineas.append(f"{metrica}_sum{etiquetas} {_sumas[nombre][endpoint]}")
+                lineas.append(f"{metrica}_count{etiquetas} {acumulado}")
+
+        metrica = f"{PREFIJO}_requests_total"
+        lineas += [f"# HELP {metrica} Requests atendidos", f"# TYPE {metrica} counter"]
+        for (endpoint, status), cantidad in sorted(_requests.items()):
+            etiquetas = _etiquetas(endpoint=endpoint, status=status)
+            lineas.append(f"{metrica}{etiquetas} {cantidad}")
+
+        metrica = f"{PREFIJO}_n_plus_one_total"
+        lineas += [
+            f"# HELP {metrica} Requests con una sentencia repetida (posible N+1)",
+            f"# TYPE {metrica} counter",
+        ]
+        for endpoint, cantidad in sorted(_n_mas_uno.items()):
+            lineas.append(f"{metrica}{_etiquetas(endpoint=endpoint)} {cantidad}")
+
+    vistas = set()
+    for bind, nombre, valor in _estado_pools():
+        metrica = f"{PREFIJO}_{nombre}"
+        if metrica not in vistas:
+            vistas.add(metrica)
+            lineas.append(f"# TYPE {metrica} gauge")
+        lineas.append(f"{metrica}{_etiquetas(bind=bind)} {valor}")
+
+    metrica = f"{PREFIJO}_log_records_dropped_total"
+    lineas += [f"# TYPE {metrica} counter", f"{metrica} {logs.descartados()}"]
+    return "\n".join(lineas) + "\n"
+
+
+def _autorizado():
+    if current_app.config["METRICS_PUBLIC"]:
+        return True
+    token = current_app.config.get("METRICS_TOKEN")
+    recibido = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(recibido.encode(), f"Bearer {token}".encode()):
+        return True
+    return current_user.is_authenticated and current_user.is_admin
+
+
+def metricas():
+    if not _autorizado():
+        abort(401)
+    return Response(exportar(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app, db):
+    """Engancha eventos y señales y registra /metrics (después de db.init_app)."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+            event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+    request_started.connect(_inicio_request, app)
+    before_render_template.connect(_antes_de_plantilla, app)
+    template_rendered.connect(_plantilla_renderizada, app)
+    request_finished.connect(_fin_request, app)
+
+    app.add_url_rule("/metrics", "metricas", metricas)
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy.orm import validates
 
 from app import db
 
@@ -37,6 +37,9 @@ class User(UserMixin, db.Model):
     sede = db.relationship("Sede", back_populates="users")
 
     is_admin = db.Column(db.Boolean, default=False)
+    # Se incrementa al editar/eliminar el usuario para vencer la foto de su
+    # sesión (ver app/auth/principal.py)
+    auth_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     reservations = db.relationship(
         "Reservation", back_populates="propietario", lazy="dynamic"
@@ -44,10 +47,14 @@ class User(UserMixin, db.Model):
     payments = db.relationship("Payment", back_populates="propietario", lazy="dynamic")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from app.auth.passwords import hashear
+
+        self.password_hash = hashear(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        from app.auth.passwords import verificar
+
+        return verificar(self.password_hash, password)
 
 
 def load_user(user_id):
@@ -61,6 +68,15 @@ class Reservation(db.Model):
     """Modelo para la tabla de Reservas (ReservasBD.csv)."""
 
     __tablename__ = "reservation"
+    __table_args__ = (
+        # Listados y reportes por sede + rango de fechas (keyset por id)
+        db.Index("ix_reservation_sede_fecha", "sede_id", "fecha_celebracion", "id"),
+        db.Index("ix_reservation_sede_fecha_dia", "sede_id", "fecha_dia"),
+        # Dropdown de reservas pendientes (estado) ordenado por creación
+        db.Index("ix_reservation_sede_estado_created", "sede_id", "estado", "created_at"),
+        # Lista de deudores ordenada por saldo
+        db.Index("ix_reservation_sede_saldo", "sede_id", "saldo", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)  # Reemplaza 'ID' de Wix
     created_at = db.Column(
@@ -87,6 +103,9 @@ class Reservation(db.Model):
     fecha_celebracion = db.Column(
         db.DateTime, nullable=False, index=True
     )  # Mapeado de 'Fecha de Reserva'
+    # Solo la fecha (sin hora) de la celebración, para agrupar por día con índice.
+    # Se mantiene sola al asignar fecha_celebracion (ver _sincronizar_fecha_dia).
+    fecha_dia = db.Column(db.Date, nullable=False)
     modalidad = db.Column(db.String(100), nullable=False)
     paquete = db.Column(db.String(100))
     horario = db.Column(db.String(50))
@@ -99,6 +118,11 @@ class Reservation(db.Model):
     estado = db.Column(db.String(50), nullable=False, default="Reservado", index=True)
     total = db.Column(db.Numeric(10, 2), default=0.00)
 
+    # Saldos desnormalizados: se mantienen en la misma transacción que cada
+    # abono (ver services.create_payment) para no sumar Payment al leer.
+    total_abonado = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    saldo = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+
     payments = db.relationship(
         "Payment",
         back_populates="reservation",
@@ -106,11 +130,58 @@ class Reservation(db.Model):
         cascade="all, delete-orphan",
     )
 
+    @validates("fecha_celebracion")
+    def _sincronizar_fecha_dia(self, key, valor):
+        self.fecha_dia = valor.date() if isinstance(valor, datetime) else valor
+        return valor
+
+    def aplicar_abono(self, monto):
+        """Suma (o resta, si es negativo) un abono al acumulado y recalcula el saldo."""
+        self.total_abonado = (self.total_abonado or 0) + monto
+        self.recalcular_saldo()
+
+    def recalcular_saldo(self):
+        """Saldo = Total del contrato - Total abonado."""
+        self.saldo = (self.total or 0) - (self.total_abonado or 0)
+
+
+class ReservaSlot(db.Model):
+    """
+    Horario ocupado por una reserva activa: una fila por (sede, día, salón,
+    horario), así la clave primaria impide reservar dos veces el mismo turno.
+    Se mantiene en app/main/disponibilidad.py al crear, editar o cancelar.
+    """
+
+    __tablename__ = "reserva_slot"
+
+    sede_id = db.Column(db.Integer, db.ForeignKey("sede.id"), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    salon = db.Column(db.String(50), primary_key=True)  # "" = sin salón (Exclusivo)
+    horario = db.Column(db.String(50), primary_key=True)
+    reservation_id = db.Column(
+        db.Integer,
+        db.ForeignKey("reservation.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+
+
+class ReservationSequence(db.Model):
+    """Secuencia por sede para los códigos de reserva (ej: TR00001)."""
+
+    __tablename__ = "reservation_sequence"
+
+    sede_id = db.Column(db.Integer, db.ForeignKey("sede.id"), primary_key=True)
+    siguiente = db.Column(db.Integer, nullable=False, default=1)  # Próximo número libre
+
 
 class Payment(db.Model):
     """Modelo para la tabla de Abonos (AbonosBD.csv)."""
 
     __tablename__ = "payment"
+    __table_args__ = (
+        db.Index("ix_payment_reservation_fecha", "reservation_id", "fecha_abono"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)  # Reemplaza 'ID' de Wix
     created_at = db.Column(
@@ -139,6 +210,37 @@ class Payment(db.Model):
     comentarios = db.Column(db.Text)
 
 
+# --- Resúmenes Diarios (para Reportes) ---
+# Se actualizan en cada alta/edición de reservas y abonos (ver main/rollups.py).
+# Los textos opcionales se guardan como "" porque forman parte de la clave.
+
+
+class ResumenVentasDiario(db.Model):
+    """Ventas por sede, día de celebración, modalidad y paquete."""
+
+    __tablename__ = "resumen_ventas_diario"
+
+    sede_id = db.Column(db.Integer, db.ForeignKey("sede.id"), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    modalidad = db.Column(db.String(100), primary_key=True)
+    paquete = db.Column(db.String(100), primary_key=True)
+    total_ventas = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ResumenCobrosDiario(db.Model):
+    """Abonos cobrados por sede, día de abono, método de pago y modalidad."""
+
+    __tablename__ = "resumen_cobros_diario"
+
+    sede_id = db.Column(db.Integer, db.ForeignKey("sede.id"), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    metodo_pago = db.Column(db.String(50), primary_key=True)
+    modalidad = db.Column(db.String(100), primary_key=True)
+    total_cobrado = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+
 class Adicional(db.Model):
     """Modelo para los Adicionales (extras) de las reservas."""
 
@@ -152,3 +254,120 @@ class Adicional(db.Model):
 
     def __repr__(self):
         return f"<Adicional {self.nombre} | S/ {self.precio}>"
+
+
+# --- Catálogo de Reservas (antes OPCIONES_RESERVA en api/routes.py) ---
+class VersionCatalogo(db.Model):
+    """Contador de versión por catálogo; cada cambio desde el admin lo incrementa."""
+
+    __tablename__ = "version_catalogo"
+
+    nombre = db.Column(db.String(50), primary_key=True)  # ej: "reservas"
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<VersionCatalogo {self.nombre} v{self.version}>"
+
+
+class LatidoReplica(db.Model):
+    """Hora (epoch) escrita en la principal para medir el atraso de la réplica."""
+
+    __tablename__ = "latido_replica"
+
+    id = db.Column(db.Integer, primary_key=True)  # una sola fila (id = 1)
+    marca = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<LatidoReplica {self.marca}>"
+
+
+class Salon(db.Model):
+    """Salón con sus mínimos de niños/adultos. sede_id NULL = todas las sedes."""
+
+    __tablename__ = "salon"
+    __table_args__ = (
+        db.UniqueConstraint("sede_id", "nombre", name="uq_salon_sede_nombre"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sede_id = db.Column(db.Integer, db.ForeignKey("sede.id"), nullable=True)
+    nombre = db.Column(db.String(50), nullable=False)  # ej: "Salón 1"
+    min_ninos = db.Column(db.Integer, nullable=False, default=0)
+    min_adultos = db.Column(db.Integer, nullable=False, default=0)
+    orden = db.Column(db.Integer, nullable=False, default=0)
+
+    sede = db.relationship("Sede")
+    horarios = db.relationship(
+        "Horario",
+        back_populates="salon",
+        order_by="Horario.orden",
+        cascade="all, delete-orphan",
+    )
+
+    def __repr__(self):
+        return f"<Salon {self.nombre}>"
+
+
+class Horario(db.Model):
+    """Horario disponible en un salón."""
+
+    __tablename__ = "horario"
+
+    id = db.Column(db.Integer, primary_key=True)
+    salon_id = db.Column(db.Integer, db.ForeignKey("salon.id"), nullable=False)
+    texto = db.Column(db.String(50), nullable=False)  # ej: "3:00 PM - 5:30 PM"
+    orden = db.Column(db.Integer, nullable=False, default=0)
+
+    salon = db.relationship("Salon", back_populates="horarios")
+
+    def __repr__(self):
+        return f"<Horario {self.texto}>"
+
+
+class Modalidad(db.Model):
+    """
+    Modalidad de reserva (Exclusivo, Paquete LUDI, ...). sede_id NULL = todas.
+    Si precio_fijo, `precio` es el total de la reserva y no se elige salón
+    (usa min_ninos/min_adultos); si no, `precio` es por niño.
+    """
+
+    __tablename__ = "modalidad"
+    __table_args__ = (
+        db.UniqueConstraint("sede_id", "nombre", name="uq_modalidad_sede_nombre"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sede_id = db.Column(db.Integer, db.ForeignKey("sede.id"), nullable=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    precio = db.Column(db.Numeric(10, 2), nullable=False)
+    precio_fijo = db.Column(db.Boolean, nullable=False, default=False)
+    min_ninos = db.Column(db.Integer, nullable=False, default=0)
+    min_adultos = db.Column(db.Integer, nullable=False, default=0)
+    orden = db.Column(db.Integer, nullable=False, default=0)
+
+    sede = db.relationship("Sede")
+    opciones = db.relationship(
+        "OpcionPaquete",
+        back_populates="modalidad",
+        order_by="OpcionPaquete.orden",
+        cascade="all, delete-orphan",
+    )
+
+    def __repr__(self):
+        return f"<Modalidad {self.nombre} | S/ {self.precio}>"
+
+
+class OpcionPaquete(db.Model):
+    """Opción de comida de una modalidad (lo que se guarda en Reservation.paquete)."""
+
+    __tablename__ = "opcion_paquete"
+
+    id = db.Column(db.Integer, primary_key=True)
+    modalidad_id = db.Column(db.Integer, db.ForeignKey("modalidad.id"), nullable=False)
+    texto = db.Column(db.String(100), nullable=False)  # ej: "Hot Dog"
+    orden = db.Column(db.Integer, nullable=False, default=0)
+
+    modalidad = db.relationship("Modalidad", back_populates="opciones")
+
+    def __repr__(self):
+        return f"<OpcionPaquete {self.texto}>"
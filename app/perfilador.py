@@ -0,0 +1,175 @@
+"""
+Perfilado por muestreo de un request puntual (solo admins, a pedido).
+
+Se activa en un request con:
+
+- `?perfilar=1` en la URL, si el usuario logueado es admin, o
+- el header `X-Perfilar: <token>`, con un token firmado con SECRET_KEY que
+  genera `flask perfil firmar` (vale PROFILER_TOKEN_MAX_AGE segundos). Sirve
+  para curl o para perfilar un POST sin tocar el formulario.
+
+Mientras dura el request, un hilo toma cada PROFILER_INTERVAL segundos la pila
+del hilo que lo atiende. Al terminar se guarda en PROFILER_DIR un archivo
+.folded (una línea "marco;marco;... muestras" por pila, el formato de entrada
+de flamegraph.pl y de speedscope) y la respuesta lleva:
+
+- X-Perfil-Archivo: nombre del archivo generado
+- X-Perfil-Muestras: cantidad de muestras tomadas
+- X-Perfil-Top: los PROFILER_TOP marcos donde más muestras cayeron (tiempo
+  propio, con archivo y línea) y su porcentaje
+
+Sin el parámetro ni el header, el costo es mirar si están en el request.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import current_app, g, request
+from flask_login import current_user
+from itsdangerous import BadSignature, TimestampSigner
+
+HEADER = "X-Perfilar"
+PARAMETRO = "perfilar"
+MAX_PROFUNDIDAD = 200
+
+_raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def firmador(app):
+    return TimestampSigner(app.config["SECRET_KEY"], salt="perfilador")
+
+
+def _archivo(ruta):
+    """Ruta corta: relativa al proyecto o, fuera de él, carpeta/archivo."""
+    if ruta.startswith(_raiz):
+        return os.path.relpath(ruta, _raiz)
+    return "/".join(ruta.replace("\\", "/").split("/")[-2:])
+
+
+class Muestreador(threading.Thread):
+    """Toma muestras de la pila de otro hilo hasta que se lo detiene."""
+
+    def __init__(self, hilo_id, intervalo, max_segundos):
+        super().__init__(name="perfilador", daemon=True)
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.limite = time.monotonic() + max_segundos
+        self.pilas = Counter()
+        self.propios = Counter()
+        self.muestras = 0
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(self.intervalo) and time.monotonic() < self.limite:
+            marco = sys._current_frames().get(self.hilo_id)
+            if marco is None or self._fin.is_set():
+                break
+            hoja = f"{_archivo(marco.f_code.co_filename)}:{marco.f_code.co_name}"
+            self.propios[f"{hoja}:{marco.f_lineno}"] += 1
+            pila = []
+            while marco is not None and len(pila) < MAX_PROFUNDIDAD:
+                codigo = marco.f_code
+                pila.append(f"{_archivo(codigo.co_filename)}:{codigo.co_name}")
+                marco = marco.f_back
+            self.pilas[";".join(reversed(pila))] += 1
+            self.muestras += 1
+
+    def detener(self):
+        self._fin.set()
+        self.join()
+
+
+def _autorizado():
+    if request.args.get(PARAMETRO) == "1" and current_user.is_authenticated:
+        if current_user.is_admin:
+            return True
+    token = request.headers.get(HEADER)
+    if not token:
+        return False
+    try:
+        firmador(current_app).unsign(
+            token, max_age=current_app.config["PROFILER_TOKEN_MAX_AGE"]
+        )
+    except BadSignature:
+        return False
+    return True
+
+
+def _iniciar():
+    if PARAMETRO not in request.args and HEADER not in request.headers:
+        return
+    if not _autorizado():
+        current_app.logger.warning(
+            "Pedido de perfilado rechazado", extra={"ruta": request.path}
+        )
+        return
+    g._perfil = Muestreador(
+        threading.get_ident(),
+        current_app.config["PROFILER_INTERVAL"],
+        current_app.config["PROFILER_MAX_SECONDS"],
+    )
+    g._perfil.start()
+
+
+def _guardar(muestreador):
+    """Escribe el .folded y devuelve su nombre."""
+    directorio = current_app.config["PROFILER_DIR"]
+    os.makedirs(directorio, exist_ok=True)
+    endpoint = (request.endpoint or "sin_endpoint").replace(".", "-")
+    nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}"
+    nombre += ".folded"
+    with open(os.path.join(directorio, nombre), "w", encoding="utf-8") as archivo:
+        for pila, cantidad in muestreador.pilas.most_common():
+            archivo.write(f"{pila} {cantidad}\n")
+    return nombre
+
+
+def _terminar(response):
+    muestreador = g.pop("_perfil", None)
+    if muestreador is None:
+        return response
+    muestreador.detener()
+
+    nombre = _guardar(muestreador)
+    total = muestreador.muestras or 1
+    top = ", ".join(
+        f"{marco}={cantidad * 100 // total}%"
+        for marco, cantidad in muestreador.propios.most_common(
+            current_app.config["PROFILER_TOP"]
+        )
+    )
+    response.headers["X-Perfil-Archivo"] = nombre
+    response.headers["X-Perfil-Muestras"] = str(muestreador.muestras)
+    response.headers["X-Perfil-Top"] = top.encode("ascii", "replace").decode()
+    current_app.logger.info(
+        "Request perfilado",
+        extra={
+            "ruta": request.path,
+            "archivo": nombre,
+            "muestras": muestreador.muestras,
+        },
+    )
+    return response
+
+
+def _descartar(error):
+    # El request falló antes de after_request: solo se detiene el hilo
+    muestreador = g.pop("_perfil", None)
+    if muestreador is not None:
+        muestreador.detener()
+
+
+def init_app(app):
+    """Registra los hooks del perfilador si PROFILER_ENABLED está activo."""
+    if not app.config["PROFILER_ENABLED"]:
+        return
+    if not app.config.get("PROFILER_DIR"):
+        app.config["PROFILER_DIR"] = os.path.join(app.instance_path, "perfiles")
+
+    app.before_request(_iniciar)
+    app.after_request(_terminar)
+    app.teardown_request(_descartar)
@@ -0,0 +1,190 @@
+"""
+Lecturas desde una réplica de la base (opcional).
+
+Con SQLALCHEMY_REPLICA_URI configurada se registra el bind "replica" y
+db.session pasa a ser una SesionRuteada: en las vistas marcadas con
+@usar_replica (reportes, exportaciones y endpoints de solo lectura) los
+SELECT van a la réplica. Todo lo demás queda en la base principal:
+
+- INSERT/UPDATE/DELETE, los flush del ORM y los SELECT ... FOR UPDATE;
+- cualquier consulta de una sesión con cambios pendientes;
+- los requests de un usuario que escribió hace menos de
+  REPLICA_READ_YOUR_WRITES segundos (se anota en su sesión de Flask), para
+  que vea lo que acaba de guardar.
+
+Las versiones de los catálogos en memoria y las cargas que se guardan con
+ellas (app/main/cache.py, app/main/calendario.py) se leen siempre de la
+principal con `en_principal()`: si no, un worker podría guardar datos viejos
+de la réplica bajo una versión nueva y servirlos hasta el próximo cambio.
+
+Salud de la réplica: cada REPLICA_CHECK_INTERVAL segundos un worker escribe
+la hora actual en la principal (tabla latido_replica) y lee la que tiene la
+réplica. Si la diferencia supera REPLICA_MAX_LAG o la
+réplica no responde, las lecturas vuelven a la principal hasta la próxima
+revisión. Un error de conexión con la réplica la marca caída de inmediato.
+
+Para probar en local alcanzan dos archivos SQLite: copiar el archivo de la
+principal sobre el de la réplica equivale a replicar, y si la copia queda más
+de REPLICA_MAX_LAG segundos sin actualizarse, se deja de usar. Así lo
+prueba tests/test_replica.py (python -m pytest tests).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+BIND_REPLICA = "replica"
+CLAVE_ESCRITURA = "_ultima_escritura"
+
+_lock = threading.Lock()
+_estado = {"disponible": False, "revisar_en": 0.0, "lag": None}
+
+
+def _motor_replica(db):
+    return db.engines.get(BIND_REPLICA)
+
+
+def _es_escritura(clause):
+    if clause is None:
+        return False
+    return bool(getattr(clause, "is_dml", False)) or (
+        getattr(clause, "_for_update_arg", None) is not None
+    )
+
+
+class SesionRuteada(Session):
+    """Session de Flask-SQLAlchemy que manda las lecturas a la réplica si corresponde."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or _es_escritura(clause):
+                g._escribio = True
+            elif (
+                g.get("_usar_replica")
+                and not (self.new or self.dirty or self.deleted)
+                and replica_disponible()
+            ):
+                return _motor_replica(self._db)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# --- Salud de la Réplica ---
+
+
+def _revisar(db):
+    """Escribe el latido en la principal y mide cuánto atrasa el de la réplica."""
+    from app.models import LatidoReplica
+
+    tabla = LatidoReplica.__table__
+    ahora = int(time.time())
+    try:
+        with db.engines[None].begin() as conn:
+            actualizado = conn.execute(
+                tabla.update().where(tabla.c.id == 1).values(marca=ahora)
+            )
+            if not actualizado.rowcount:
+                conn.execute(tabla.insert().values(id=1, marca=ahora))
+
+        with _motor_replica(db).connect() as conn:
+            latido = conn.scalar(db.select(tabla.c.marca).where(tabla.c.id == 1))
+    except SQLAlchemyError as e:
+        current_app.logger.warning("Réplica no disponible", extra={"error": str(e)})
+        return False, None
+
+    lag = time.time() - (latido or 0)
+    maximo = current_app.config["REPLICA_MAX_LAG"]
+    if lag > maximo:
+        current_app.logger.warning(
+            "Réplica atrasada: se usa la principal",
+            extra={"lag_s": round(lag), "max_lag_s": maximo},
+        )
+        return False, lag
+    return True, lag
+
+
+def replica_disponible():
+    """True si hay réplica configurada, responde y no está atrasada."""
+    from app import db
+
+    if _motor_replica(db) is None:
+        return False
+    ahora = time.monotonic()
+    if ahora >= _estado["revisar_en"]:
+        with _lock:
+            if ahora >= _estado["revisar_en"]:
+                _estado["disponible"], _estado["lag"] = _revisar(db)
+                _estado["revisar_en"] = (
+                    time.monotonic() + current_app.config["REPLICA_CHECK_INTERVAL"]
+                )
+    return _estado["disponible"]
+
+
+def marcar_caida():
+    """La réplica falló: usar la principal hasta la próxima revisión."""
+    _estado["disponible"] = False
+    if has_app_context():
+        _estado["revisar_en"] = (
+            time.monotonic() + current_app.config["REPLICA_CHECK_INTERVAL"]
+        )
+
+
+# --- Vistas ---
+
+
+@contextmanager
+def en_principal():
+    """Las consultas del bloque van a la principal aunque la vista use la réplica."""
+    anterior = g.pop("_usar_replica", None) if has_request_context() else None
+    try:
+        yield
+    finally:
+        if anterior is not None:
+            g._usar_replica = anterior
+
+
+def usar_replica(f):
+    """Las consultas de la vista leen de la réplica (si está sana)."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        ventana = current_app.config["REPLICA_READ_YOUR_WRITES"]
+        if time.time() - session.get(CLAVE_ESCRITURA, 0) >= ventana:
+            g._usar_replica = True
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def configurar_bind(app):
+    """Agrega el bind "replica" (llamar antes de db.init_app)."""
+    uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if uri:
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds[BIND_REPLICA] = {"url": uri, "pool_pre_ping": True}
+        app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def init_app(app, db):
+    """Seguimiento de escrituras y de errores de la réplica (después de db.init_app)."""
+    if not app.config.get("SQLALCHEMY_REPLICA_URI"):
+        return
+
+    @app.after_request
+    def anotar_escritura(response):
+        if g.get("_escribio"):
+            session[CLAVE_ESCRITURA] = time.time()
+        return response
+
+    with app.app_context():
+        motor = _motor_replica(db)
+
+    @event.listens_for(motor, "handle_error")
+    def _error(contexto):
+        if contexto.is_disconnect or contexto.connection is None:
+            marcar_caida()
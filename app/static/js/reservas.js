@@ -94,6 +94,11 @@ document.addEventListener('DOMContentLoaded', function () {
     const inputAdultos = document.getElementById('input_adultos');
     const campoTotal = document.getElementById('campo_total_reserva');
     
+    // URL del catálogo de opciones. Viene versionada desde el servidor (?v=),
+    // así el navegador la reutiliza de su caché hasta que el catálogo cambie.
+    const formOpciones = document.getElementById('form-nueva-reserva');
+    const urlOpciones = (formOpciones && formOpciones.dataset.opcionesUrl) || '/api/opciones-reserva';
+
     // Lógica Admin (Sedes)
     const selectSedeAdmin = document.getElementById('select_sede_admin');
     const displayCodigo = document.getElementById('display_codigo_reserva');
@@ -110,6 +115,17 @@ document.addEventListener('DOMContentLoaded', function () {
                     displayCodigo.style.opacity = "1";
                 })
                 .catch(err => console.error(err));
+
+            // Catálogo de la sede elegida (puede tener salones o precios propios)
+            const url = new URL(urlOpciones, window.location.origin);
+            url.searchParams.set('sede_id', sedeId);
+            fetch(url)
+                .then(response => response.json())
+                .then(data => {
+                    opcionesReserva = data;
+                    calcularTotalReserva();
+                })
+                .catch(err => console.error(err));
         });
     }
     
@@ -177,7 +193,7 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // --- 5. Cargamos los datos y adjuntamos listeners ---
-    fetch('/api/opciones-reserva')
+    fetch(urlOpciones)
         .then(response => response.json())
         .then(data => {
             opcionesReserva = data; 
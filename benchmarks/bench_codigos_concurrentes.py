@@ -0,0 +1,202 @@
+"""
+Benchmark de asignación de códigos de reserva.
+
+1. Concurrencia: varios hilos (cada uno con su propio cliente logueado) envían
+   reservas a /api/reservas/nueva al mismo tiempo. Al final se verifica que
+   todas se guardaron y que no hay códigos repetidos.
+2. Escala: se hace crecer la tabla de reservas y se mide el tiempo por
+   asignación, que debe mantenerse constante.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_codigos_concurrentes.py --hilos 16 --por-hilo 25
+    python benchmarks/bench_codigos_concurrentes.py --db mysql+pymysql://root:@localhost/ludicus_bench
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import Config  # noqa: E402
+
+
+def crear_app(uri, tamano_bloque):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {"connect_args": {"timeout": 30}} if uri.startswith("sqlite") else {}
+        )
+        WTF_CSRF_ENABLED = False
+        RESERVATION_CODE_BLOCK_SIZE = tamano_bloque
+
+    from app import create_app
+
+    return create_app(BenchConfig)
+
+
+def preparar_datos(app):
+    from app import db
+    from app.models import Sede, User
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        sede = Sede(nombre="Bench", prefijo="BN")
+        relleno = Sede(nombre="Relleno", prefijo="RL")
+        admin = User(username="bench", sede=sede, is_admin=True)
+        admin.set_password("bench123")
+        db.session.add_all([sede, relleno, admin])
+        db.session.commit()
+        return sede.id, relleno.id
+
+
+def datos_reserva(sede_id, i):
+    return {
+        "sede_seleccionada": str(sede_id),
+        "nombre_padres": f"Cliente {i}",
+        "telefono": "999999999",
+        "nombre_cumpleanero": "Bench 5",
+        "fecha_celebracion": (datetime(2026, 1, 1) + timedelta(days=i % 365)).strftime(
+            "%Y-%m-%d"
+        ),
+        "modalidad": "Paquete LUDI",
+        "salon": "Salón 1",
+        "horario": "3:00 PM - 5:30 PM",
+        "ninos": "20",
+        "adultos": "20",
+        "estado": "Reservado",
+        "total": "898.00",
+        "adicionales": "[]",
+    }
+
+
+def prueba_concurrencia(app, sede_id, hilos, por_hilo):
+    from app import db
+    from app.models import Reservation
+
+    barrera = threading.Barrier(hilos)
+    errores = []
+
+    def trabajador(n):
+        cliente = app.test_client()
+        cliente.post("/auth/login", data={"username": "bench", "password": "bench123"})
+        barrera.wait()
+        for j in range(por_hilo):
+            try:
+                cliente.post(
+                    "/api/reservas/nueva", data=datos_reserva(sede_id, n * por_hilo + j)
+                )
+            except Exception as e:  # pragma: no cover - solo informativo
+                errores.append(repr(e))
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracion = time.perf_counter() - inicio
+
+    with app.app_context():
+        codigos = db.session.scalars(
+            db.select(Reservation.codigo_reserva).where(Reservation.sede_id == sede_id)
+        ).all()
+
+    intentos = hilos * por_hilo
+    print("== Concurrencia ==")
+    print(f"Hilos: {hilos} | Intentos: {intentos} | Tiempo: {duracion:.2f}s")
+    print(f"Reservas guardadas: {len(codigos)}")
+    print(f"Códigos distintos:  {len(set(codigos))}")
+    print(f"Colisiones / fallos: {intentos - len(set(codigos))}")
+    if errores:
+        print(f"Excepciones en clientes: {len(errores)} (ej: {errores[0]})")
+    return intentos - len(set(codigos))
+
+
+def prueba_escala(app, sede_id, relleno_id, tamanos, muestras):
+    from app import db
+    from app.main.services import allocate_reservation_code, get_next_reservation_code
+    from app.models import Reservation, Sede
+
+    print("\n== Tiempo por asignación vs. tamaño de la tabla ==")
+    print(f"{'reservas':>10} {'asignar (µs)':>14} {'peek (µs)':>12}")
+
+    with app.app_context():
+        prefijo = db.session.get(Sede, sede_id).prefijo
+        actuales = db.session.scalar(db.select(db.func.count(Reservation.id)))
+        siguiente_relleno = 1
+
+        for tamano in tamanos:
+            faltan = max(0, tamano - actuales)
+            while faltan:
+                lote = min(faltan, 5000)
+                db.session.execute(
+                    db.insert(Reservation),
+                    [
+                        {
+                            "sede_id": relleno_id,
+                            "codigo_reserva": f"RL{siguiente_relleno + k:08d}",
+                            "nombre_padres": "Relleno",
+                            "telefono": "000000000",
+                            "fecha_celebracion": datetime(2025, 1, 1),
+                            "fecha_dia": datetime(2025, 1, 1).date(),
+                            "modalidad": "Paquete LUDI",
+                            "estado": "Reservado",
+                            "total": 0,
+                        }
+                        for k in range(lote)
+                    ],
+                )
+                db.session.commit()
+                siguiente_relleno += lote
+                faltan -= lote
+                actuales += lote
+
+            inicio = time.perf_counter()
+            for _ in range(muestras):
+                allocate_reservation_code(sede_id, prefijo)
+            t_asignar = (time.perf_counter() - inicio) / muestras * 1e6
+
+            inicio = time.perf_counter()
+            for _ in range(muestras):
+                get_next_reservation_code(sede_id, prefijo)
+            t_peek = (time.perf_counter() - inicio) / muestras * 1e6
+
+            print(f"{actuales:>10} {t_asignar:>14.1f} {t_peek:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", help="URI de la base (por defecto, SQLite temporal)")
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--por-hilo", type=int, default=25)
+    parser.add_argument("--bloque", type=int, default=1, help="Tamaño de bloque")
+    parser.add_argument("--tamanos", default="1000,10000,100000")
+    parser.add_argument("--muestras", type=int, default=200)
+    args = parser.parse_args()
+
+    uri = args.db
+    if not uri:
+        uri = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_codigos.db")
+
+    app = crear_app(uri, args.bloque)
+    sede_id, relleno_id = preparar_datos(app)
+
+    colisiones = prueba_concurrencia(app, sede_id, args.hilos, args.por_hilo)
+    prueba_escala(
+        app,
+        sede_id,
+        relleno_id,
+        [int(t) for t in args.tamanos.split(",")],
+        args.muestras,
+    )
+    sys.exit(1 if colisiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark del motor de exportación (CSV / JSON Lines / XLSX).
+
+Genera filas sintéticas con la misma forma que las de la base (sin tocar la
+base de datos) y mide, por formato: tiempo total, filas/s, tamaño del archivo
+y pico de memoria (tracemalloc). El pico debe mantenerse plano al subir --filas.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_exportacion.py --filas 1000000
+    python benchmarks/bench_exportacion.py --filas 1000000 --formatos xlsx --entidad abonos
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.main.exports import ENTIDADES, escribir_csv, escribir_jsonl, escribir_xlsx  # noqa: E402
+
+ESCRITORES = {"csv": escribir_csv, "jsonl": escribir_jsonl, "xlsx": escribir_xlsx}
+
+
+def _valor(tipo, atributo, i):
+    if tipo == "fecha":
+        base = datetime(2020, 1, 1) if atributo == "fecha_celebracion" else date(2020, 1, 1)
+        return base + timedelta(days=i % 2000)
+    if tipo == "dinero":
+        return Decimal(i % 5000) + Decimal("0.90")
+    return f"{atributo}-{i}"
+
+
+def bloques_sinteticos(columnas, filas, chunk):
+    Fila = namedtuple("Fila", [atributo for _, atributo, _ in columnas])
+    for inicio in range(0, filas, chunk):
+        yield [
+            Fila(*[_valor(tipo, atributo, i) for _, atributo, tipo in columnas])
+            for i in range(inicio, min(inicio + chunk, filas))
+        ]
+
+
+def medir(formato, columnas, filas, chunk):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    tamano = 0
+    primer_byte = None
+    for parte in ESCRITORES[formato](columnas, bloques_sinteticos(columnas, filas, chunk)):
+        if primer_byte is None:
+            primer_byte = time.perf_counter() - inicio
+        tamano += len(parte)  # Se descarta, como si se enviara al cliente
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracion, primer_byte, tamano, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--entidad", default="reservas", choices=sorted(ENTIDADES))
+    parser.add_argument("--formatos", default="csv,jsonl,xlsx")
+    args = parser.parse_args()
+
+    columnas = ENTIDADES[args.entidad]["columnas"]
+    print(f"Entidad: {args.entidad} | Filas: {args.filas:,} | Bloque: {args.chunk}")
+    print(
+        f"{'formato':>8} {'tiempo (s)':>11} {'filas/s':>10} {'1er byte (ms)':>14} "
+        f"{'tamaño (MB)':>12} {'pico mem (MB)':>14}"
+    )
+    for formato in args.formatos.split(","):
+        duracion, primer_byte, tamano, pico = medir(
+            formato, columnas, args.filas, args.chunk
+        )
+        print(
+            f"{formato:>8} {duracion:>11.2f} {args.filas / duracion:>10,.0f} "
+            f"{primer_byte * 1000:>14.1f} {tamano / 1e6:>12.1f} {pico / 1e6:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
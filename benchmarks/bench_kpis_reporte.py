@@ -0,0 +1,195 @@
+"""
+Benchmark de los KPIs del Reporte General.
+
+Compara la implementación anterior (una consulta por KPI y otra para el
+gráfico, todas sobre reservation/payment) con report_queries.kpis_generales
+(una sola sentencia sobre los resúmenes diarios). Reporta viajes a la base y
+tiempo por llamada; con --latencia-ms se simula una base remota agregando esa
+demora a cada viaje.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_kpis_reporte.py --reservas 100000 --latencia-ms 2
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, func  # noqa: E402
+
+from config import Config  # noqa: E402
+
+
+def crear_app(uri):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+
+    from app import create_app
+
+    return create_app(BenchConfig)
+
+
+def poblar(reservas, sedes):
+    from app import db
+    from app.main.rollups import reconstruir_resumenes
+    from app.models import Payment, Reservation, Sede
+
+    db.drop_all()
+    db.create_all()
+    for i in range(sedes):
+        db.session.add(Sede(nombre=f"Sede {i}", prefijo=f"S{i:02d}"[:3]))
+    db.session.commit()
+
+    rnd = random.Random(42)
+    inicio = datetime(date.today().year - 2, 1, 1)
+    siguiente_id = 1
+    while siguiente_id <= reservas:
+        lote = range(siguiente_id, min(siguiente_id + 5000, reservas + 1))
+        filas_reserva, filas_abono = [], []
+        for i in lote:
+            fecha = inicio + timedelta(days=rnd.randrange(3 * 365))
+            total = Decimal(rnd.choice([898, 1098, 1298, 3200]))
+            abonado = total if rnd.random() < 0.6 else Decimal(200)
+            filas_reserva.append(
+                {
+                    "id": i,
+                    "sede_id": rnd.randint(1, sedes),
+                    "codigo_reserva": f"BK{i:08d}",
+                    "nombre_padres": "Cliente",
+                    "telefono": "999999999",
+                    "fecha_celebracion": fecha,
+                    "fecha_dia": fecha.date(),
+                    "modalidad": "Paquete LUDI",
+                    "paquete": rnd.choice(["Hot Dog", "Pan con Pollo"]),
+                    "estado": "Abonado",
+                    "total": total,
+                    "total_abonado": abonado,
+                    "saldo": total - abonado,
+                }
+            )
+            filas_abono.append(
+                {
+                    "reservation_id": i,
+                    "fecha_abono": (fecha - timedelta(days=15)).date(),
+                    "metodo_pago": rnd.choice(["Efectivo", "Yape/Plin", "Tarjeta"]),
+                    "monto": abonado,
+                    "modalidad": "Paquete LUDI",
+                }
+            )
+        db.session.execute(db.insert(Reservation), filas_reserva)
+        db.session.execute(db.insert(Payment), filas_abono)
+        db.session.commit()
+        siguiente_id += len(lote)
+
+    reconstruir_resumenes()
+
+
+def kpis_anteriores(anio, sede_id):
+    """Implementación anterior de reportes_general (KPIs + gráfico)."""
+    from app import db
+    from app.models import Payment, Reservation
+
+    query_reservas = db.select(func.sum(Reservation.total))
+    query_pagos = db.select(func.sum(Payment.monto))
+    query_count = db.select(func.count(Reservation.id))
+    if sede_id:
+        query_reservas = query_reservas.where(Reservation.sede_id == sede_id)
+        query_pagos = query_pagos.join(Reservation).where(Reservation.sede_id == sede_id)
+        query_count = query_count.where(Reservation.sede_id == sede_id)
+
+    total_ventas = db.session.scalar(query_reservas) or 0
+    total_ingresos = db.session.scalar(query_pagos) or 0
+    total_reservas = db.session.scalar(query_count) or 0
+
+    query_chart = db.select(
+        func.extract("month", Reservation.fecha_celebracion).label("mes"),
+        func.sum(Reservation.total).label("total"),
+    ).where(func.extract("year", Reservation.fecha_celebracion) == anio)
+    if sede_id:
+        query_chart = query_chart.where(Reservation.sede_id == sede_id)
+    meses = [0] * 12
+    for mes, total in db.session.execute(query_chart.group_by("mes")).all():
+        meses[int(mes) - 1] = float(total)
+
+    return total_ventas, total_ingresos, total_reservas, meses
+
+
+def medir(nombre, funcion, repeticiones, contador):
+    from app import db
+
+    funcion()  # Calentamiento (caché de sentencias, páginas en memoria)
+    db.session.rollback()
+    contador["viajes"] = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+        db.session.rollback()
+    duracion = (time.perf_counter() - inicio) / repeticiones
+    viajes = contador["viajes"] / repeticiones
+    print(f"{nombre:>28} {viajes:>8.0f} {duracion * 1000:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", help="URI de la base (por defecto, SQLite temporal)")
+    parser.add_argument("--reservas", type=int, default=50000)
+    parser.add_argument("--sedes", type=int, default=3)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_kpis.db")
+    app = crear_app(uri)
+
+    from app import db
+    from app.main.report_queries import kpis_generales
+
+    with app.app_context():
+        print(f"Poblando {args.reservas:,} reservas en {args.sedes} sedes...")
+        poblar(args.reservas, args.sedes)
+
+        contador = {"viajes": 0}
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def contar(*_):
+            contador["viajes"] += 1
+            if args.latencia_ms:
+                time.sleep(args.latencia_ms / 1000)
+
+        anio = date.today().year
+        anterior = kpis_anteriores(anio, None)
+        nuevo = kpis_generales(anio, None)
+        coinciden = (
+            anterior[0] == nuevo["total_ventas"]
+            and anterior[1] == nuevo["total_cobrado"]
+            and anterior[2] == nuevo["total_reservas"]
+            and anterior[3] == nuevo["ventas_por_mes"]
+        )
+        print(f"Resultados iguales: {'sí' if coinciden else 'NO'}\n")
+
+        print(f"{'implementación':>28} {'viajes':>8} {'ms/llamada':>12}")
+        for sede_id in (None, 1):
+            etiqueta = "todas" if sede_id is None else f"sede {sede_id}"
+            medir(
+                f"anterior ({etiqueta})",
+                lambda: kpis_anteriores(anio, sede_id),
+                args.repeticiones,
+                contador,
+            )
+            medir(
+                f"una consulta ({etiqueta})",
+                lambda: kpis_generales(anio, sede_id),
+                args.repeticiones,
+                contador,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark de /auth/login con distintos costos de hash.
+
+Por cada método de PASSWORD_HASH_METHOD (y cada tamaño de pool de
+verificación) varios hilos inician sesión a la vez durante unos segundos,
+mientras otro hilo pide una página liviana (/auth/login GET) para medir
+cuánto la afecta la ráfaga de logins. Reporta logins/s, latencias p50/p95
+del login y p95 de la página liviana.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_login.py --hilos 8 --segundos 5
+    python benchmarks/bench_login.py --metodos scrypt:16384:8:1,pbkdf2:sha256:600000 --pools 0,2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import Config  # noqa: E402
+
+METODOS = "pbkdf2:sha256:100000,pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1"
+
+
+def crear_app(uri):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {"connect_args": {"timeout": 30}} if uri.startswith("sqlite") else {}
+        )
+        WTF_CSRF_ENABLED = False
+
+    from app import create_app
+
+    return create_app(BenchConfig)
+
+
+def preparar_usuarios(app, cantidad):
+    from app import db
+    from app.models import Sede, User
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        sede = Sede(nombre="Bench", prefijo="BN")
+        db.session.add(sede)
+        for i in range(cantidad):
+            user = User(username=f"bench{i}", sede=sede)
+            user.set_password("bench123")
+            db.session.add(user)
+        db.session.commit()
+
+
+def rehashear(app, metodo):
+    """Deja todos los hashes con el método a medir (sin medir el rehash)."""
+    from app import db
+    from app.models import User
+
+    app.config["PASSWORD_HASH_METHOD"] = metodo
+    with app.app_context():
+        for user in User.query.all():
+            user.set_password("bench123")
+        db.session.commit()
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    return statistics.quantiles(valores, n=100)[p - 1] if len(valores) > 1 else valores[0]
+
+
+def medir(app, hilos, segundos):
+    latencias_login = []
+    latencias_pagina = []
+    fin = time.perf_counter() + segundos
+    barrera = threading.Barrier(hilos + 1)
+
+    def login(n):
+        cliente = app.test_client()
+        datos = {"username": f"bench{n}", "password": "bench123"}
+        barrera.wait()
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            respuesta = cliente.post("/auth/login", data=datos)
+            latencias_login.append(time.perf_counter() - inicio)
+            assert respuesta.status_code == 302, respuesta.status_code
+            cliente.get("/auth/logout")
+
+    def pagina():
+        cliente = app.test_client()
+        barrera.wait()
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            cliente.get("/auth/login")
+            latencias_pagina.append(time.perf_counter() - inicio)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login, args=(n,)) for n in range(hilos)]
+    threads.append(threading.Thread(target=pagina))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return latencias_login, latencias_pagina
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", help="URI de la base (por defecto, SQLite temporal)")
+    parser.add_argument("--metodos", default=METODOS)
+    parser.add_argument("--pools", default="0,2", help="PASSWORD_VERIFY_WORKERS")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=5)
+    args = parser.parse_args()
+
+    uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_login.db")
+    app = crear_app(uri)
+    preparar_usuarios(app, args.hilos)
+
+    print(
+        f"{'método':<24} {'pool':>4} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'página p95 ms':>14}"
+    )
+    for metodo in args.metodos.split(","):
+        rehashear(app, metodo)
+        for pool in (int(p) for p in args.pools.split(",")):
+            app.config["PASSWORD_VERIFY_WORKERS"] = pool
+            logins, paginas = medir(app, args.hilos, args.segundos)
+            print(
+                f"{metodo:<24} {pool:>4} {len(logins) / args.segundos:>9.1f} "
+                f"{statistics.median(logins) * 1000:>8.1f} "
+                f"{percentil(logins, 95) * 1000:>8.1f} "
+                f"{percentil(paginas, 95) * 1000:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Techo de memoria de reportes y exportaciones para un volumen de datos dado.
+
+Crea una base con app.main.datos_sinteticos.generar (--reservas) y pide cada
+endpoint con el cliente de pruebas de Flask, midiendo con tracemalloc el pico
+de memoria del request completo (incluido el envío de las exportaciones en
+streaming). Si algún pico supera --techo-mb, lo informa y termina con código
+1, así sirve como verificación antes de un deploy o en CI.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_memoria.py --reservas 100000 --techo-mb 150
+    python benchmarks/bench_memoria.py --db mysql+pymysql://root@localhost/bench
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_servicios import crear_app, iniciar_sesion, poblar  # noqa: E402
+
+URLS = (
+    "/reportes/general",
+    "/reportes/ventas",
+    "/reportes/productos",
+    "/reportes/exportar_excel",
+    "/reportes/exportar/reservas.xlsx",
+    "/reportes/exportar/abonos.jsonl",
+    "/reportes/exportar/deudores.csv",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", help="URI de la base (por defecto, SQLite temporal)")
+    parser.add_argument("--reservas", type=int, default=100000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--techo-mb", type=float, default=150.0)
+    args = parser.parse_args()
+
+    from app.memoria import afirmar_techo
+
+    uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    app = crear_app(uri)
+    datos = poblar(app, args.reservas, args.semilla)
+    print(f"Datos: {args.reservas} reservas, {datos['abonos']} abonos")
+    cliente = iniciar_sesion(app)
+
+    def pedir(url):
+        respuesta = cliente.get(url)
+        cuerpo = respuesta.get_data()  # consume el streaming
+        if respuesta.status_code != 200:
+            raise AssertionError(f"{url}: status {respuesta.status_code}")
+        return len(cuerpo)
+
+    fallas = 0
+    for url in URLS:
+        try:
+            medicion = afirmar_techo(lambda: pedir(url), args.techo_mb)
+        except AssertionError as e:
+            fallas += 1
+            print(f"  FALLA {url}: {e}")
+            continue
+        print(f"  {url:<40} pico {medicion['pico_mb']:>8.2f} MB")
+
+    if fallas:
+        print(f"\n{fallas} endpoints superan el techo de {args.techo_mb} MB")
+        raise SystemExit(1)
+    print(f"\nOK: todos por debajo de {args.techo_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
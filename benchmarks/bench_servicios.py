@@ -0,0 +1,242 @@
+"""
+Benchmark de la capa de servicios y de los reportes sobre datos sintéticos.
+
+Para cada tamaño (cantidad de reservas) crea una base nueva con
+app.main.datos_sinteticos.generar y mide, repitiendo cada operación:
+
+- get_reservations_by_date_range / get_payments_by_date_range (un mes, una sede)
+- get_next_reservation_code
+- create_payment (sobre reservas pendientes distintas)
+- las vistas /reportes/general, /reportes/ventas y /reportes/productos
+
+Guarda los resultados en JSON (mediana, p95 y mínimo en ms por operación) y,
+con --comparar, muestra la variación contra un JSON de una corrida anterior.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_servicios.py --tamanos 10000,100000
+    python benchmarks/bench_servicios.py --tamanos 1000000 --salida antes.json
+    python benchmarks/bench_servicios.py --tamanos 100000 --comparar antes.json
+    python benchmarks/bench_servicios.py --db mysql+pymysql://root@localhost/bench
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import Config  # noqa: E402
+
+# Reservas por sede: con menos sedes los turnos se llenan y sobran canceladas
+RESERVAS_POR_SEDE = 4000
+
+
+def crear_app(uri):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        WTF_CSRF_ENABLED = False
+
+    from app import create_app
+
+    return create_app(BenchConfig)
+
+
+def poblar(app, reservas, semilla):
+    from app import db
+    from app.main.catalogo import sembrar_catalogo
+    from app.main.datos_sinteticos import generar
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        sembrar_catalogo()
+        return generar(
+            sedes=max(3, reservas // RESERVAS_POR_SEDE),
+            usuarios=10,
+            reservas=reservas,
+            semilla=semilla,
+            informar=lambda texto: None,
+        )
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 3),
+        "min_ms": round(tiempos[0], 3),
+        "repeticiones": repeticiones,
+    }
+
+
+def operaciones(app, cliente):
+    """{nombre: funcion(i)}; cada función corre dentro de un app context."""
+    from app import db
+    from app.main import services
+    from app.models import Reservation, Sede, User
+
+    with app.app_context():
+        sede = db.session.execute(db.select(Sede.id, Sede.prefijo).limit(1)).one()
+        user_id = db.session.scalar(db.select(User.id).limit(1))
+        # Mes con más celebraciones de la sede (el peor caso habitual)
+        dia = db.session.scalar(
+            db.select(Reservation.fecha_dia)
+            .where(Reservation.sede_id == sede.id)
+            .group_by(Reservation.fecha_dia)
+            .order_by(db.func.count().desc())
+            .limit(1)
+        )
+        if isinstance(dia, str):
+            dia = date.fromisoformat(dia)
+        pendientes = list(
+            db.session.scalars(
+                db.select(Reservation.id)
+                .where(Reservation.saldo > 0, Reservation.estado != "Cancelado")
+                .limit(1000)
+            )
+        )
+
+    desde = datetime(dia.year, dia.month, 1)
+    hasta = datetime(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+
+    def en_contexto(funcion):
+        def correr(i):
+            with app.app_context():
+                funcion(i)
+                db.session.rollback()
+
+        return correr
+
+    def abonar(i):
+        services.create_payment(
+            {
+                "reservation_id": pendientes[i % len(pendientes)],
+                "metodo_pago": "Efectivo",
+                "monto": Decimal("1.00"),
+                "referencia": "BENCH",
+                "comentarios": None,
+            },
+            user_id,
+        )
+
+    def pagina(url):
+        def correr(i):
+            respuesta = cliente.get(url)
+            assert respuesta.status_code == 200, (url, respuesta.status_code)
+
+        return correr
+
+    return {
+        "get_reservations_by_date_range": en_contexto(
+            lambda i: services.get_reservations_by_date_range(
+                desde, hasta, sede_id=sede.id, carga="list"
+            )
+        ),
+        "get_payments_by_date_range": en_contexto(
+            lambda i: services.get_payments_by_date_range(
+                desde.date(), hasta.date(), sede_id=sede.id, carga="list"
+            )
+        ),
+        "get_next_reservation_code": en_contexto(
+            lambda i: services.get_next_reservation_code(sede.id, sede.prefijo)
+        ),
+        "create_payment": en_contexto(abonar),
+        "reporte_general": pagina("/reportes/general"),
+        "reporte_ventas": pagina(
+            f"/reportes/ventas?inicio={desde:%Y-%m-%d}&fin={hasta:%Y-%m-%d}"
+        ),
+        "reporte_productos": pagina("/reportes/productos"),
+    }
+
+
+def iniciar_sesion(app):
+    from app import db
+    from app.main.datos_sinteticos import PASSWORD_SINTETICO
+    from app.models import User
+
+    with app.app_context():
+        admin = db.session.scalar(db.select(User.username).where(User.is_admin))
+    cliente = app.test_client()
+    respuesta = cliente.post(
+        "/auth/login", data={"username": admin, "password": PASSWORD_SINTETICO}
+    )
+    assert respuesta.status_code == 302, respuesta.status_code
+    return cliente
+
+
+def comparar(anterior, actual):
+    previos = {r["reservas"]: r["operaciones"] for r in anterior["resultados"]}
+    for resultado in actual["resultados"]:
+        antes = previos.get(resultado["reservas"])
+        if not antes:
+            continue
+        print(f"\nComparación ({resultado['reservas']} reservas, mediana):")
+        for nombre, datos in resultado["operaciones"].items():
+            if nombre not in antes:
+                continue
+            previo, ahora = antes[nombre]["mediana_ms"], datos["mediana_ms"]
+            cambio = (ahora - previo) / previo * 100 if previo else 0.0
+            print(f"  {nombre:<32} {previo:>10.2f} -> {ahora:>10.2f} ms ({cambio:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", help="URI de la base (por defecto, SQLite temporal)")
+    parser.add_argument("--tamanos", default="10000,100000,1000000")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default="bench_servicios.json")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    uri = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    app = crear_app(uri)
+
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "motor": uri.split(":", 1)[0],
+        "python": platform.python_version(),
+        "repeticiones": args.repeticiones,
+        "resultados": [],
+    }
+
+    for tamano in (int(t) for t in args.tamanos.split(",")):
+        print(f"\n== {tamano} reservas ==")
+        datos = poblar(app, tamano, args.semilla)
+        print(f"Datos: {datos['abonos']} abonos, {datos['segundos']} s")
+
+        cliente = iniciar_sesion(app)
+        resultado = {"reservas": tamano, "datos": datos, "operaciones": {}}
+        for nombre, funcion in operaciones(app, cliente).items():
+            funcion(0)  # calentamiento (cachés, planes de consulta)
+            medicion = medir(funcion, args.repeticiones)
+            resultado["operaciones"][nombre] = medicion
+            print(
+                f"  {nombre:<32} mediana {medicion['mediana_ms']:>9.2f} ms  "
+                f"p95 {medicion['p95_ms']:>9.2f} ms"
+            )
+        informe["resultados"].append(resultado)
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, indent=2)
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            comparar(json.load(archivo), informe)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,10 +21,101 @@ class Config:
     DB_HOSTNAME = os.environ.get("DB_HOSTNAME") or "localhost"
     DB_NAME = os.environ.get("DB_NAME") or "ludicus_db"  # La DB que creaste
 
-    # URI de conexión de SQLAlchemy para MySQL
-    SQLALCHEMY_DATABASE_URI = (
+    # URI de conexión de SQLAlchemy para MySQL. DATABASE_URL la reemplaza
+    # completa (ej: "sqlite:///ludicus.db" para pruebas y benchmarks)
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or (
         f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOSTNAME}/{DB_NAME}"
         "?charset=utf8mb4"
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # --- Réplica de Lectura (opcional) ---
+    # Reportes, exportaciones y endpoints de solo lectura consultan esta base;
+    # las escrituras siguen en SQLALCHEMY_DATABASE_URI (ver app/replica.py).
+    SQLALCHEMY_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URL")
+    # Atraso máximo aceptado (s); con más, se lee de la principal
+    REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG") or 30)
+    # Cada cuántos segundos un worker revisa atraso y disponibilidad
+    REPLICA_CHECK_INTERVAL = float(os.environ.get("REPLICA_CHECK_INTERVAL") or 5)
+    # Tras escribir, el usuario lee de la principal durante estos segundos
+    REPLICA_READ_YOUR_WRITES = float(os.environ.get("REPLICA_READ_YOUR_WRITES") or 30)
+
+    # --- Logging (ver app/logs.py) ---
+    LOG_LEVEL = os.environ.get("LOG_LEVEL") or "INFO"
+    # Niveles por módulo, ej: "app.api=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_LEVELS = os.environ.get("LOG_LEVELS") or ""
+    # "json" (una línea por registro) o "texto"
+    LOG_FORMAT = os.environ.get("LOG_FORMAT") or "json"
+    # Fracción de los registros DEBUG que se escriben (1 = todos)
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE") or 1)
+    # Registros en espera de escritura; con la cola llena se descartan
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE") or 10000)
+
+    # --- Métricas por Request (ver app/metricas.py) ---
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "").lower() not in (
+        "0",
+        "false",
+    )
+    # Header Server-Timing con tiempos de SQL, plantillas y total (lo ve
+    # cualquier cliente, por eso está apagado salvo que se pida)
+    METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "").lower() in (
+        "1",
+        "true",
+    )
+    # Más repeticiones de una misma sentencia en un request se avisan como N+1
+    METRICS_N1_THRESHOLD = int(os.environ.get("METRICS_N1_THRESHOLD") or 10)
+    # GET /metrics exige "Authorization: Bearer <token>" o un admin logueado
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    # Abrir /metrics sin autenticación (solo si la red ya lo protege)
+    METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "").lower() in ("1", "true")
+
+    # --- Perfilado a Pedido (ver app/perfilador.py) ---
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "").lower() in ("1", "true")
+    # Carpeta de los .folded (por defecto, instance/perfiles)
+    PROFILER_DIR = os.environ.get("PROFILER_DIR")
+    # Segundos entre muestras y duración máxima del muestreo por request
+    PROFILER_INTERVAL = float(os.environ.get("PROFILER_INTERVAL") or 0.005)
+    PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS") or 60)
+    # Marcos listados en el header X-Perfil-Top
+    PROFILER_TOP = int(os.environ.get("PROFILER_TOP") or 5)
+    # Vigencia (s) de los tokens de `flask perfil firmar`
+    PROFILER_TOKEN_MAX_AGE = float(os.environ.get("PROFILER_TOKEN_MAX_AGE") or 3600)
+
+    # --- Memoria por Request (ver app/memoria.py) ---
+    # Endpoints a medir con tracemalloc, ej: "main.exportar_excel,main.reportes_general"
+    MEMORY_TRACE_ENDPOINTS = os.environ.get("MEMORY_TRACE_ENDPOINTS") or ""
+    # Pico (MB) por encima del cual el request se registra como warning
+    MEMORY_BUDGET_MB = float(os.environ.get("MEMORY_BUDGET_MB") or 200)
+    # Líneas de código con más memoria que se incluyen en el registro
+    MEMORY_TOP_LINES = int(os.environ.get("MEMORY_TOP_LINES") or 5)
+
+    # --- Paginación de Listados (/reservas, /abonos) ---
+    PAGE_SIZE = int(os.environ.get("PAGE_SIZE") or 50)
+    PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX") or 500)
+    # Contar el total de filas en cada página (una consulta COUNT extra).
+    # También se puede pedir por URL con ?contar=1
+    PAGE_COUNT_TOTAL = os.environ.get("PAGE_COUNT_TOTAL", "").lower() in ("1", "true")
+
+    # --- Códigos de Reserva ---
+    # Cantidad de números que cada worker reserva de golpe en la secuencia de la
+    # sede. Con 1 los códigos salen consecutivos; con bloques más grandes hay menos
+    # contención entre workers, a cambio de posibles saltos en la numeración.
+    RESERVATION_CODE_BLOCK_SIZE = int(os.environ.get("RESERVATION_CODE_BLOCK_SIZE") or 1)
+
+    # --- Caché de Catálogos (sedes, adicionales, opciones de reserva) ---
+    # Cada cuántos segundos un worker comprueba en la base si un catálogo cambió.
+    # Los cambios hechos desde el admin se ven en los demás workers a lo sumo
+    # tras este tiempo (en el worker que hizo el cambio, de inmediato).
+    CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL") or 30)
+
+    # --- Contraseñas ---
+    # Método y costo del hash (formato de werkzeug). Si se cambia, cada usuario
+    # se migra al nuevo al iniciar sesión. Ej: "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = (
+        os.environ.get("PASSWORD_HASH_METHOD") or "scrypt:32768:8:1"
+    )
+    PASSWORD_SALT_LENGTH = int(os.environ.get("PASSWORD_SALT_LENGTH") or 16)
+    # Hilos por worker para verificar contraseñas (0 = en el hilo del request)
+    PASSWORD_VERIFY_WORKERS = int(os.environ.get("PASSWORD_VERIFY_WORKERS") or 0)
+    PASSWORD_VERIFY_TIMEOUT = float(os.environ.get("PASSWORD_VERIFY_TIMEOUT") or 10)
@@ -0,0 +1,31 @@
+"""Añadir secuencia de códigos de reserva por sede
+
+Revision ID: 3a1c5e7b9d20
+Revises: 0f97991c7d32
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a1c5e7b9d20'
+down_revision = '0f97991c7d32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reservation_sequence',
+    sa.Column('sede_id', sa.Integer(), nullable=False),
+    sa.Column('siguiente', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sede_id'], ['sede.id'], ),
+    sa.PrimaryKeyConstraint('sede_id')
+    )
+    # Las secuencias se inicializan solas (desde el último código de cada sede)
+    # la primera vez que se asigna un código.
+
+
+def downgrade():
+    op.drop_table('reservation_sequence')
@@ -0,0 +1,37 @@
+"""Añadir total_abonado y saldo a Reservation
+
+Revision ID: 5b7d2f4a8c61
+Revises: 3a1c5e7b9d20
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d2f4a8c61'
+down_revision = '3a1c5e7b9d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_abonado', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('saldo', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+
+    # Backfill inicial (equivalente a 'flask saldos backfill')
+    op.execute(
+        "UPDATE reservation SET "
+        "total_abonado = (SELECT COALESCE(SUM(monto), 0) FROM payment "
+        "WHERE payment.reservation_id = reservation.id), "
+        "saldo = COALESCE(total, 0) - (SELECT COALESCE(SUM(monto), 0) FROM payment "
+        "WHERE payment.reservation_id = reservation.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.drop_column('saldo')
+        batch_op.drop_column('total_abonado')
@@ -0,0 +1,46 @@
+"""Índices compuestos y columna fecha_dia en Reservation
+
+Revision ID: 7c9e1a3b5d42
+Revises: 5b7d2f4a8c61
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c9e1a3b5d42'
+down_revision = '5b7d2f4a8c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fecha_dia', sa.Date(), nullable=True))
+
+    # DATE() existe tanto en MySQL como en SQLite
+    op.execute("UPDATE reservation SET fecha_dia = DATE(fecha_celebracion)")
+
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.alter_column('fecha_dia', existing_type=sa.Date(), nullable=False)
+        batch_op.create_index('ix_reservation_sede_fecha', ['sede_id', 'fecha_celebracion', 'id'], unique=False)
+        batch_op.create_index('ix_reservation_sede_fecha_dia', ['sede_id', 'fecha_dia'], unique=False)
+        batch_op.create_index('ix_reservation_sede_estado_created', ['sede_id', 'estado', 'created_at'], unique=False)
+        batch_op.create_index('ix_reservation_sede_saldo', ['sede_id', 'saldo', 'id'], unique=False)
+
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.create_index('ix_payment_reservation_fecha', ['reservation_id', 'fecha_abono'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.drop_index('ix_payment_reservation_fecha')
+
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservation_sede_saldo')
+        batch_op.drop_index('ix_reservation_sede_estado_created')
+        batch_op.drop_index('ix_reservation_sede_fecha_dia')
+        batch_op.drop_index('ix_reservation_sede_fecha')
+        batch_op.drop_column('fecha_dia')
@@ -0,0 +1,62 @@
+"""Añadir resúmenes diarios de ventas y cobros
+
+Revision ID: 9d4f6b8a0e13
+Revises: 7c9e1a3b5d42
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f6b8a0e13'
+down_revision = '7c9e1a3b5d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resumen_ventas_diario',
+    sa.Column('sede_id', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('modalidad', sa.String(length=100), nullable=False),
+    sa.Column('paquete', sa.String(length=100), nullable=False),
+    sa.Column('total_ventas', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sede_id'], ['sede.id'], ),
+    sa.PrimaryKeyConstraint('sede_id', 'dia', 'modalidad', 'paquete')
+    )
+    op.create_table('resumen_cobros_diario',
+    sa.Column('sede_id', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('metodo_pago', sa.String(length=50), nullable=False),
+    sa.Column('modalidad', sa.String(length=100), nullable=False),
+    sa.Column('total_cobrado', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sede_id'], ['sede.id'], ),
+    sa.PrimaryKeyConstraint('sede_id', 'dia', 'metodo_pago', 'modalidad')
+    )
+
+    # Carga inicial desde los datos existentes
+    op.execute(
+        "INSERT INTO resumen_ventas_diario "
+        "(sede_id, dia, modalidad, paquete, total_ventas, cantidad) "
+        "SELECT sede_id, fecha_dia, COALESCE(modalidad, ''), COALESCE(paquete, ''), "
+        "COALESCE(SUM(total), 0), COUNT(id) FROM reservation "
+        "GROUP BY sede_id, fecha_dia, COALESCE(modalidad, ''), COALESCE(paquete, '')"
+    )
+    op.execute(
+        "INSERT INTO resumen_cobros_diario "
+        "(sede_id, dia, metodo_pago, modalidad, total_cobrado, cantidad) "
+        "SELECT r.sede_id, p.fecha_abono, COALESCE(p.metodo_pago, ''), "
+        "COALESCE(p.modalidad, ''), SUM(p.monto), COUNT(p.id) "
+        "FROM payment p JOIN reservation r ON p.reservation_id = r.id "
+        "GROUP BY r.sede_id, p.fecha_abono, COALESCE(p.metodo_pago, ''), "
+        "COALESCE(p.modalidad, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('resumen_cobros_diario')
+    op.drop_table('resumen_ventas_diario')
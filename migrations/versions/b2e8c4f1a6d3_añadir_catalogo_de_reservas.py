@@ -0,0 +1,99 @@
+"""Añadir catálogo de reservas (salones, horarios, modalidades, opciones)
+
+Revision ID: b2e8c4f1a6d3
+Revises: 9d4f6b8a0e13
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e8c4f1a6d3'
+down_revision = '9d4f6b8a0e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    version_catalogo = op.create_table('version_catalogo',
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('nombre')
+    )
+    salon = op.create_table('salon',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sede_id', sa.Integer(), nullable=True),
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('min_ninos', sa.Integer(), nullable=False),
+    sa.Column('min_adultos', sa.Integer(), nullable=False),
+    sa.Column('orden', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sede_id'], ['sede.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sede_id', 'nombre', name='uq_salon_sede_nombre')
+    )
+    horario = op.create_table('horario',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('salon_id', sa.Integer(), nullable=False),
+    sa.Column('texto', sa.String(length=50), nullable=False),
+    sa.Column('orden', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['salon_id'], ['salon.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    modalidad = op.create_table('modalidad',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sede_id', sa.Integer(), nullable=True),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('precio', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('precio_fijo', sa.Boolean(), nullable=False),
+    sa.Column('min_ninos', sa.Integer(), nullable=False),
+    sa.Column('min_adultos', sa.Integer(), nullable=False),
+    sa.Column('orden', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sede_id'], ['sede.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sede_id', 'nombre', name='uq_modalidad_sede_nombre')
+    )
+    opcion_paquete = op.create_table('opcion_paquete',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('modalidad_id', sa.Integer(), nullable=False),
+    sa.Column('texto', sa.String(length=100), nullable=False),
+    sa.Column('orden', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['modalidad_id'], ['modalidad.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Carga inicial: el antiguo OPCIONES_RESERVA de app/api/routes.py
+    op.bulk_insert(salon, [
+        {'id': 1, 'sede_id': None, 'nombre': 'Salón 1', 'min_ninos': 17, 'min_adultos': 17, 'orden': 0},
+        {'id': 2, 'sede_id': None, 'nombre': 'Salón 2', 'min_ninos': 12, 'min_adultos': 12, 'orden': 1},
+    ])
+    op.bulk_insert(horario, [
+        {'salon_id': 1, 'texto': '3:00 PM - 5:30 PM', 'orden': 0},
+        {'salon_id': 1, 'texto': '6:30 PM - 9:00 PM', 'orden': 1},
+        {'salon_id': 1, 'texto': '11:00 AM - 1:30 PM', 'orden': 2},
+        {'salon_id': 2, 'texto': '3:30 PM - 6:00 PM', 'orden': 0},
+        {'salon_id': 2, 'texto': '7:00 PM - 9:30 PM', 'orden': 1},
+        {'salon_id': 2, 'texto': '11:30 AM - 2:00 PM', 'orden': 2},
+    ])
+    op.bulk_insert(modalidad, [
+        {'id': 1, 'sede_id': None, 'nombre': 'Exclusivo', 'precio': 3200.00, 'precio_fijo': True, 'min_ninos': 0, 'min_adultos': 0, 'orden': 0},
+        {'id': 2, 'sede_id': None, 'nombre': 'Paquete LUDI', 'precio': 39.90, 'precio_fijo': False, 'min_ninos': 0, 'min_adultos': 0, 'orden': 1},
+        {'id': 3, 'sede_id': None, 'nombre': 'Paquete JESSI', 'precio': 49.90, 'precio_fijo': False, 'min_ninos': 0, 'min_adultos': 0, 'orden': 2},
+        {'id': 4, 'sede_id': None, 'nombre': 'Paquete LUDI SUPER ESTRELLA', 'precio': 59.90, 'precio_fijo': False, 'min_ninos': 0, 'min_adultos': 0, 'orden': 3},
+    ])
+    op.bulk_insert(opcion_paquete, [
+        {'modalidad_id': 2, 'texto': 'Hot Dog', 'orden': 0},
+        {'modalidad_id': 2, 'texto': 'Pan con Pollo', 'orden': 1},
+        {'modalidad_id': 3, 'texto': 'Hot Dog', 'orden': 0},
+        {'modalidad_id': 4, 'texto': 'Chicharrón', 'orden': 0},
+    ])
+    op.bulk_insert(version_catalogo, [{'nombre': 'reservas', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('opcion_paquete')
+    op.drop_table('modalidad')
+    op.drop_table('horario')
+    op.drop_table('salon')
+    op.drop_table('version_catalogo')
@@ -0,0 +1,26 @@
+"""Añadir auth_version a User
+
+Revision ID: c4a9e2d7f1b8
+Revises: b2e8c4f1a6d3
+Create Date: 2026-10-18 13:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e2d7f1b8'
+down_revision = 'b2e8c4f1a6d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('auth_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('auth_version')
@@ -0,0 +1,45 @@
+"""Añadir reserva_slot (ocupación de horarios)
+
+Revision ID: d6b1f3a8c2e5
+Revises: c4a9e2d7f1b8
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6b1f3a8c2e5'
+down_revision = 'c4a9e2d7f1b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reserva_slot',
+    sa.Column('sede_id', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('salon', sa.String(length=50), nullable=False),
+    sa.Column('horario', sa.String(length=50), nullable=False),
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['reservation_id'], ['reservation.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sede_id'], ['sede.id'], ),
+    sa.PrimaryKeyConstraint('sede_id', 'dia', 'salon', 'horario'),
+    sa.UniqueConstraint('reservation_id')
+    )
+
+    # Carga inicial: en cada turno con varias reservas activas queda la más
+    # antigua (las demás se listan con 'flask slots reconstruir')
+    op.execute(
+        "INSERT INTO reserva_slot (sede_id, dia, salon, horario, reservation_id) "
+        "SELECT sede_id, fecha_dia, COALESCE(salon, ''), COALESCE(horario, ''), "
+        "MIN(id) FROM reservation "
+        "WHERE estado <> 'Cancelado' "
+        "AND (COALESCE(salon, '') = '' OR COALESCE(horario, '') <> '') "
+        "GROUP BY sede_id, fecha_dia, COALESCE(salon, ''), COALESCE(horario, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('reserva_slot')
@@ -0,0 +1,31 @@
+"""Añadir latido_replica (salud de la réplica de lectura)
+
+Revision ID: e8a2c5d9f7b4
+Revises: d6b1f3a8c2e5
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a2c5d9f7b4'
+down_revision = 'd6b1f3a8c2e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('latido_replica',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('marca', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # El latido vivía como una fila más de version_catalogo
+    op.execute("DELETE FROM version_catalogo WHERE nombre = 'latido_replica'")
+
+
+def downgrade():
+    op.drop_table('latido_replica')
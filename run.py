@@ -1,3 +1,4 @@
+import logging
 import os
 
 from app import create_app, db
@@ -5,6 +6,7 @@ from app.models import Sede, User
 
 # Crear la aplicación Flask usando la factory
 app = create_app()
+logger = logging.getLogger(__name__)
 
 
 @app.shell_context_processor
@@ -18,27 +20,33 @@ def make_shell_context():
 def setup_database(app_context):
     """Crea las tablas en MySQL y el usuario admin inicial."""
     with app_context:
-        print("Creando todas las tablas en la base de datos MySQL (si no existen)...")
+        logger.info("Creando todas las tablas en la base de datos (si no existen)...")
         # Esto creará las tablas en tu DB 'ludicus_db'
         db.create_all()
 
         # --- CREAR SEDE POR DEFECTO ---
         default_sede = Sede.query.filter_by(prefijo="TR").first()
         if not default_sede:
-            print("Creando sede por defecto 'Trujillo' (TR)...")
+            logger.info("Creando sede por defecto 'Trujillo' (TR)...")
             default_sede = Sede(nombre="Trujillo", prefijo="TR")
             db.session.add(default_sede)
 
         # Crear usuario 'ludireserva' del mockup de login
         if not User.query.filter_by(username="ludireserva").first():
-            print("Creando usuario admin 'ludireserva'...")
+            logger.info("Creando usuario admin 'ludireserva'...")
             admin_user = User(username="ludireserva", sede=default_sede)
             admin_user.set_password("admin123")  # ¡Esta será tu contraseña para entrar!
             db.session.add(admin_user)
             db.session.commit()
-            print("Usuario 'ludireserva' creado con contraseña 'admin123'.")
+            logger.info("Usuario 'ludireserva' creado con contraseña 'admin123'.")
         else:
-            print("El usuario 'ludireserva' ya existe.")
+            logger.info("El usuario 'ludireserva' ya existe.")
+
+        # --- CATÁLOGO DE RESERVAS (salones, horarios, modalidades) ---
+        from app.main.catalogo import sembrar_catalogo
+
+        if sembrar_catalogo():
+            logger.info("Catálogo de reservas inicial creado.")
 
 
 if __name__ == "__main__":
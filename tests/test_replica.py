@@ -0,0 +1,155 @@
+"""
+Ruteo de lecturas a la réplica con dos archivos SQLite (ver app/replica.py).
+
+Copiar el archivo de la principal sobre el de la réplica equivale a
+replicar; lo que se escribe después en la principal es el "atraso".
+
+    python -m pytest tests
+"""
+
+import shutil
+import sqlite3
+import time
+from datetime import date, datetime
+
+import pytest
+from flask import g
+
+from app import create_app, db, replica
+from app.main import catalogo
+from app.main.cache import incrementar_version, version_catalogo
+from app.models import LatidoReplica, Modalidad, Reservation, Sede, User
+from config import Config
+
+
+@pytest.fixture
+def bases(tmp_path):
+    principal = tmp_path / "principal.db"
+    copia = tmp_path / "replica.db"
+
+    class ConfigPrueba(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{principal}"
+        SQLALCHEMY_REPLICA_URI = f"sqlite:///{copia}"
+        REPLICA_MAX_LAG = 3600
+        REPLICA_CHECK_INTERVAL = 0
+        REPLICA_READ_YOUR_WRITES = 0
+        METRICS_ENABLED = False
+
+    replica._estado.update(disponible=False, revisar_en=0.0, lag=None)
+    for cache in (catalogo._sedes, catalogo._adicionales, catalogo._opciones):
+        cache.descartar()
+
+    app = create_app(ConfigPrueba)
+    with app.app_context():
+        db.create_all(bind_key=None)  # solo la principal
+        sede = Sede(nombre="Trujillo", prefijo="TR")
+        usuario = User(username="admin", sede=sede, is_admin=True)
+        usuario.set_password("admin123")
+        latido = LatidoReplica(id=1, marca=int(time.time()))
+        db.session.add_all([sede, usuario, latido])
+        catalogo.sembrar_catalogo()
+        db.session.commit()
+        db.engines[None].dispose()
+
+    # "Replicar": la réplica queda igual a la principal en este momento
+    shutil.copyfile(principal, copia)
+    return app, principal, copia
+
+
+def _contar_reservas():
+    return db.session.scalar(db.select(db.func.count(Reservation.id)))
+
+
+def _agregar_reserva(app):
+    with app.app_context():
+        db.session.add(
+            Reservation(
+                sede_id=1,
+                codigo_reserva="TR00001",
+                nombre_padres="Ana",
+                telefono="999999999",
+                fecha_celebracion=datetime(2026, 12, 5, 15),
+                fecha_dia=date(2026, 12, 5),
+                modalidad="Paquete LUDI",
+                user_id=1,
+                estado="Reservado",
+            )
+        )
+        db.session.commit()
+
+
+def test_lecturas_marcadas_van_a_la_replica(bases):
+    app, _, _ = bases
+    _agregar_reserva(app)  # solo en la principal
+
+    with app.test_request_context():
+        assert _contar_reservas() == 1
+        g._usar_replica = True
+        assert _contar_reservas() == 0
+        with replica.en_principal():
+            assert _contar_reservas() == 1
+        assert _contar_reservas() == 0
+
+
+def test_escrituras_van_a_la_principal(bases):
+    app, principal, _ = bases
+
+    with app.test_request_context():
+        g._usar_replica = True
+        db.session.execute(db.update(Sede).values(nombre="Trujillo Centro"))
+        db.session.commit()
+        assert g._escribio
+
+    with sqlite3.connect(principal) as conn:
+        nombre = conn.execute("SELECT nombre FROM sede").fetchone()[0]
+    assert nombre == "Trujillo Centro"
+
+
+def test_replica_atrasada_vuelve_a_la_principal(bases):
+    app, _, copia = bases
+    _agregar_reserva(app)
+    with sqlite3.connect(copia) as conn:
+        hace_dos_horas = int(time.time()) - 7200
+        conn.execute("UPDATE latido_replica SET marca = ?", (hace_dos_horas,))
+
+    with app.test_request_context():
+        g._usar_replica = True
+        assert _contar_reservas() == 1
+        assert replica._estado["lag"] > app.config["REPLICA_MAX_LAG"]
+
+
+def test_replica_caida_vuelve_a_la_principal(bases):
+    app, _, copia = bases
+    _agregar_reserva(app)
+    copia.unlink()
+
+    with app.test_request_context():
+        g._usar_replica = True
+        assert _contar_reservas() == 1
+        assert not replica._estado["disponible"]
+
+
+def test_catalogo_versionado_no_toma_datos_de_la_replica(bases):
+    app, _, _ = bases
+    cliente = app.test_client()
+    cliente.post("/auth/login", data={"username": "admin", "password": "admin123"})
+
+    respuesta = cliente.get("/api/opciones-reserva?sede_id=1")
+    precio = respuesta.get_json()["precios_paquete"]["Paquete LUDI"]
+
+    # Cambio de precio desde el admin: la réplica todavía no lo tiene
+    with app.app_context():
+        modalidad = db.session.scalar(
+            db.select(Modalidad).where(Modalidad.nombre == "Paquete LUDI")
+        )
+        modalidad.precio = precio + 10
+        incrementar_version("reservas")
+        db.session.commit()
+        version = version_catalogo("reservas")
+    catalogo._opciones.descartar()
+
+    respuesta = cliente.get(f"/api/opciones-reserva?sede_id=1&v={version}")
+    assert respuesta.headers["ETag"] == f'"reservas-1-v{version}"'
+    assert respuesta.get_json()["precios_paquete"]["Paquete LUDI"] == precio + 10